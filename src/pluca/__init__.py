@@ -1,24 +1,377 @@
 """Pluggable Cache Architecture for Python."""
 
-import hashlib
-from collections.abc import Callable, Iterable, Mapping
+# Batches and pipelines live in ``pluca.batch``; the ``Cache`` class alone
+# exceeds the module line limit.
+# pylint: disable=too-many-lines
+
+import asyncio
+import inspect
+import logging
+import math
+import pickle
+import random
+import threading
+import time
+from collections.abc import (Awaitable, Callable, Generator, Iterable,
+                             Iterator, Mapping)
+from concurrent.futures import Executor, ThreadPoolExecutor
 from functools import partial, wraps
-from typing import Any
+from typing import TYPE_CHECKING, Any, BinaryIO, NamedTuple
 
-from .adapter import CacheAdapter
+from .adapter import AdapterOps, CacheAdapter, Capability
+from .codec import LazyValue, decode
+from .flight import SingleFlight
+from .keymap import KeyMapper, encode_key
+
+if TYPE_CHECKING:
+    from .batch import Batch, Pipeline
 
 __version__ = '0.7.0'
 
+_MISSING = object()
+
+logger = logging.getLogger(__name__)
+
+
+class _Envelope(NamedTuple):
+    # Value stored by ``get_put()`` with a refresh policy. ``expires``
+    # records when the value becomes stale, and ``delta`` how long it took
+    # to compute it.
+    value: Any
+    expires: float
+    delta: float = 0.0
+
+
+class _Negative(NamedTuple):
+    # Exception raised by a function called by ``get_put()``, cached as a
+    # negative result. The exception is pickled on its own, so that
+    # entries are still read when it cannot be unpickled.
+    data: bytes
+
+
+_WRAPPERS = (_Envelope, _Negative)
+
+
+class _Policy(NamedTuple):
+    # Storage and refresh options of ``get_put()`` and the decorator.
+    max_age: float | None
+    stale_ttl: float | None = None
+    early_refresh: float | None = None
+    jitter: Callable[[float], float] | None = None
+    negative_ttl: float | None = None
+    negative_exceptions: tuple[type[BaseException], ...] = ()
+
+    @property
+    def uses_envelope(self) -> bool:
+        return self.stale_ttl is not None or self.early_refresh is not None
+
+    @property
+    def uses_wrappers(self) -> bool:
+        return self.uses_envelope or bool(self.negative_exceptions)
+
+
+def _make_policy(max_age: float | None,
+                 stale_ttl: float | None,
+                 early_refresh: float | None,
+                 jitter: Callable[[float], float] | None,
+                 negative_ttl: float | None = None,
+                 negative_exceptions: (type[BaseException]
+                                       | Iterable[type[BaseException]]) = (),
+                 ) -> _Policy:
+    for name, option in (('stale_ttl', stale_ttl),
+                         ('early_refresh', early_refresh)):
+        if option is None:
+            continue
+        if max_age is None:
+            raise ValueError(f'{name} requires max_age')
+        if option < 0:
+            raise ValueError(f'{name} must be greater or equal to zero, '
+                             f'got {option}')
+
+    if negative_ttl is not None and negative_ttl < 0:
+        raise ValueError('negative_ttl must be greater or equal to zero, '
+                         f'got {negative_ttl}')
+    if isinstance(negative_exceptions, type):
+        negative_exceptions = (negative_exceptions,)
+    negative_exceptions = tuple(negative_exceptions)
+    if negative_exceptions and negative_ttl is None:
+        raise ValueError('negative_exceptions requires negative_ttl')
+
+    return _Policy(max_age, stale_ttl, early_refresh, jitter,
+                   negative_ttl, negative_exceptions)
+
+
+def _make_jitter(jitter: float | str | None
+                 ) -> Callable[[float], float] | None:
+    # Return a function that shortens a max age by a random amount of up to
+    # ``jitter`` seconds, or up to a percentage of the max age.
+    if jitter is None:
+        return None
+
+    if isinstance(jitter, str):
+        if not jitter.endswith('%'):
+            raise ValueError('jitter must be a number of seconds or a '
+                             f'percentage, got {jitter!r}')
+        fraction = float(jitter[:-1]) / 100
+        if not 0 <= fraction <= 1:
+            raise ValueError('jitter percentage must be between 0% and '
+                             f'100%, got {jitter!r}')
+        return lambda max_age: max_age * (1 - fraction * random.random())
+
+    if jitter < 0:
+        raise ValueError('jitter must be greater or equal to zero, '
+                         f'got {jitter}')
+    seconds = float(jitter)
+    return lambda max_age: max(0.0, max_age - seconds * random.random())
+
+
+def _refresh_early(envelope: _Envelope, beta: float, now: float) -> bool:
+    # XFetch: refresh with a probability that rises as expiration
+    # approaches, scaled by the time the value took to compute.
+    return (now - envelope.delta * beta * math.log(1.0 - random.random())
+            >= envelope.expires)
+
+
+def _make_arg_key(func: Callable[..., Any],
+                  ignore: Iterable[str]) -> Callable[[tuple[Any, ...],
+                                                      dict[str, Any]], Any]:
+    # Return a function that normalizes call arguments into a tuple of
+    # argument values in parameter order, with defaults applied and ignored
+    # arguments removed. Callables without a signature, such as some
+    # builtins, use the arguments as they are passed.
+    ignored = frozenset(ignore)
+    try:
+        sig = inspect.signature(func)
+    except (ValueError, TypeError):
+        if ignored:
+            raise ValueError('Cannot ignore arguments of callables without '
+                             'a signature') from None
+        return _plain_arg_key
+
+    unknown = ignored - sig.parameters.keys()
+    if unknown:
+        raise ValueError(f'Unknown arguments to ignore: {sorted(unknown)}')
+
+    bind = _make_bind(sig, ignored)
+    if any(param.kind not in (inspect.Parameter.POSITIONAL_ONLY,
+                              inspect.Parameter.POSITIONAL_OR_KEYWORD)
+           for param in sig.parameters.values()):
+        return bind
+    return _make_bind_fast(tuple(sig.parameters.values()), ignored, bind)
+
+
+def _plain_arg_key(args: tuple[Any, ...], kwargs: dict[str, Any]) -> Any:
+    return (args, sorted(kwargs.items()))
+
+
+def _make_bind(sig: inspect.Signature, ignored: frozenset[str],
+               ) -> Callable[[tuple[Any, ...], dict[str, Any]], Any]:
+    def bind(args: tuple[Any, ...], kwargs: dict[str, Any]) -> Any:
+        bound = sig.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return tuple(
+            (sorted(value.items())
+             if sig.parameters[name].kind is inspect.Parameter.VAR_KEYWORD
+             else value)
+            for name, value in bound.arguments.items()
+            if name not in ignored)
+
+    return bind
+
+
+def _keyword_tail(kwargs: dict[str, Any], names: tuple[str, ...],
+                  defaults: dict[str, Any]) -> tuple[Any, ...] | None:
+    # Return the values of parameters not passed positionally, or
+    # ``None`` if a required one is missing.
+    try:
+        return tuple(kwargs[name] if name in kwargs else defaults[name]
+                     for name in names)
+    except KeyError:
+        return None
+
+
+def _make_bind_fast(params: tuple[inspect.Parameter, ...],
+                    ignored: frozenset[str],
+                    bind: Callable[[tuple[Any, ...], dict[str, Any]], Any],
+                    ) -> Callable[[tuple[Any, ...], dict[str, Any]], Any]:
+    # Calls to functions with only positional or keyword parameters take
+    # a fast path that does not call ``Signature.bind()``, and falls back
+    # to ``bind`` for calls it does not handle.
+    names = tuple(param.name for param in params)
+    nparams = len(names)
+    defaults = {param.name: param.default for param in params
+                if param.default is not inspect.Parameter.empty}
+    keyword_names = [
+        frozenset(param.name for param in params[i:]
+                  if param.kind is not inspect.Parameter.POSITIONAL_ONLY)
+        for i in range(nparams + 1)]
+    # Default values of parameters not passed positionally, for each
+    # number of positional arguments, or ``None`` if any is required.
+    default_tails = [
+        (tuple(defaults[name] for name in names[i:])
+         if defaults.keys() >= set(names[i:]) else None)
+        for i in range(nparams + 1)]
+    keep = tuple(i for i, name in enumerate(names) if name not in ignored)
+
+    def bind_fast(args: tuple[Any, ...], kwargs: dict[str, Any]) -> Any:
+        nargs = len(args)
+        if nargs > nparams or not kwargs.keys() <= keyword_names[nargs]:
+            return bind(args, kwargs)
+        if nargs < nparams:
+            tail = (_keyword_tail(kwargs, names[nargs:], defaults) if kwargs
+                    else default_tails[nargs])
+            if tail is None:
+                return bind(args, kwargs)
+            args += tail
+        if ignored:
+            return tuple(args[i] for i in keep)
+        return args
+
+    return bind_fast
+
+
+def _call_key(key: Callable[..., Any], args: tuple[Any, ...],
+              kwargs: dict[str, Any]) -> Any:
+    return key(*args, **kwargs)
+
+
+def _stores_wrappers(codec: Any) -> bool:
+    # Tell whether values stored with a codec are read back as the same
+    # wrapper types. Codecs such as JSON and marshal do not preserve them.
+    if codec is None:
+        return True
+    for probe in (_Envelope(None, 0.0), _Negative(b'')):
+        try:
+            if not isinstance(decode(codec.encode(probe)), type(probe)):
+                return False
+        except Exception:  # pylint: disable=broad-exception-caught
+            return False
+    return True
+
+
+def _adapter_codecs(adapter: Any) -> Iterator[Any]:
+    # Yield the codecs of an adapter and, for composite adapters, of all
+    # their child tiers.
+    codec = getattr(adapter, 'codec', None)
+    if codec is not None:
+        yield codec
+    for cache in getattr(adapter, 'caches', ()):
+        yield from _adapter_codecs(cache.adapter)
+
+
+def _raise_negative(negative: _Negative) -> None:
+    # Raise the exception held by a negative result. Results that cannot
+    # be read back are treated as misses.
+    try:
+        error = pickle.loads(negative.data)
+    except Exception:  # pylint: disable=broad-exception-caught
+        logger.debug('Failed to load negative result', exc_info=True)
+        return
+    raise error
+
+
+def unwrap(value: Any) -> Any:
+    """Return the value held by an entry read from an adapter.
+
+    ``get_put()`` and the decorator may store values in internal wrappers,
+    for example to record when they must be refreshed. Code that reads
+    entries from adapters directly uses this function to get the cached
+    value, like ``Cache.get()`` does.
+
+    Args:
+        value: Value read from an adapter.
+
+    Returns:
+        The cached value.
+
+    """
+    if isinstance(value, _Envelope):
+        return value.value
+    if isinstance(value, _Negative):
+        return None
+    return value
+
+
+def _unwrap_lazy(handle: LazyValue) -> Any:
+    return unwrap(handle.value)
+
 
 class CacheError(Exception):
     """Base exception type for cache-related errors."""
 
 
 class Cache:
-    """Pluggable Cache Architecture (pluca) cache API."""
-
-    def __init__(self, adapter: CacheAdapter) -> None:
+    """Pluggable Cache Architecture (pluca) cache API.
+
+    Args:
+        adapter: Cache adapter used to store entries.
+        key_mapper: Key mapper used to map cache keys before passing them to
+            the adapter. If ``None``, a default ``KeyMapper`` is used. The
+            default mapper produces binary keys when the adapter declares
+            the ``Capability.BINARY_KEYS`` capability.
+        single_flight: De-duplicate concurrent computations of missing
+            values in ``get_put()`` and the decorator. Only one thread
+            computes the value for a key, and the others wait for its
+            result.
+        flight_timeout: Maximum time in seconds threads wait for a value
+            computed by another thread when ``single_flight`` is enabled.
+            When the timeout expires, the thread computes the value
+            itself. If ``None``, threads wait indefinitely.
+        refresh_workers: Maximum number of threads refreshing stale
+            values in the background (see ``get_put()``).
+        jitter: Shorten the maximum age of each stored entry by a random
+            amount, so that entries stored together do not expire
+            together. Either a number of seconds, or a percentage of the
+            maximum age as a string such as ``'10%'``. Entries without a
+            maximum age are not affected.
+
+    Raises:
+        ValueError: If ``key_mapper`` produces binary keys and the adapter
+            does not support them, if ``flight_timeout`` is negative, if
+            ``refresh_workers`` is lower than 1, or if ``jitter`` is
+            invalid.
+
+    """
+
+    def __init__(self, adapter: CacheAdapter,
+                 key_mapper: KeyMapper | None = None,
+                 single_flight: bool = False,
+                 flight_timeout: float | None = None,
+                 refresh_workers: int = 1,
+                 jitter: float | str | None = None) -> None:
         self._adapter = adapter
+        self._ops = AdapterOps(adapter)
+        self._get_mapped_or = self._ops.get_mapped_or
+
+        binary_keys = (self._ops.capabilities is not None
+                       and Capability.BINARY_KEYS in self._ops.capabilities)
+        if key_mapper is None:
+            key_mapper = KeyMapper(binary=binary_keys)
+        elif key_mapper.binary and not binary_keys:
+            raise ValueError(f'{type(adapter).__name__} does not support '
+                             'binary keys')
+        self._key_mapper = key_mapper
+        self._map_key: Callable[[Any], Any] = key_mapper.map_key
+
+        self._flight = (SingleFlight(flight_timeout) if single_flight
+                        else None)
+
+        if refresh_workers < 1:
+            raise ValueError('refresh_workers must be greater than zero')
+        self._refresh_workers = refresh_workers
+        self._refresh_executor: ThreadPoolExecutor | None = None
+        self._refresh_lock = threading.Lock()
+        self._refreshing: set[Any] = set()
+
+        self._jitter = _make_jitter(jitter)
+        self._lossy_codec = next((codec for codec in _adapter_codecs(adapter)
+                                  if not _stores_wrappers(codec)), None)
+
+        self._non_blocking = (
+            self._ops.capabilities is not None
+            and Capability.NON_BLOCKING in self._ops.capabilities)
+        self._async_executor: ThreadPoolExecutor | None = None
+        self._async_flights: dict[Any, asyncio.Task[Any]] = {}
 
     def __getattr__(self, name: str) -> Any:
         return getattr(self._adapter, name)
@@ -28,10 +381,27 @@ class Cache:
         """Return the adapter used by this cache."""
         return self._adapter
 
-    def _map_key(self, key: Any) -> str:
-        algo = hashlib.sha1()
-        algo.update(repr((type(key), key)).encode('utf-8'))
-        return algo.hexdigest()
+    @property
+    def key_mapper(self) -> KeyMapper:
+        """Return the key mapper used by this cache."""
+        return self._key_mapper
+
+    @property
+    def ops(self) -> AdapterOps:
+        """Return the adapter operations used by this cache.
+
+        Operations are bound to native adapter methods or to their
+        fallbacks, according to the adapter capabilities. This is an
+        internal interface for modules extending caches, such as
+        ``pluca.batch``.
+
+        """
+        return self._ops
+
+    @property
+    def jitter(self) -> Callable[[float], float] | None:
+        """Return the function that jitters maximum ages, or ``None``."""
+        return self._jitter
 
     def put(self, key: Any, value: Any,
             max_age: float | None = None) -> None:
@@ -50,29 +420,77 @@ class Cache:
         if max_age is not None and max_age < 0:
             raise ValueError('Cache max_age must be greater or equal to zero, '
                              f'got {max_age}')
+        if self._jitter is not None and max_age is not None:
+            max_age = self._jitter(max_age)
         self._adapter.put_mapped(self._map_key(key), value, max_age)
 
-    def get(self, key: Any, default: Any = ...) -> Any:
+    def get(self, key: Any, default: Any = ...,
+            touch: float | None = None) -> Any:
         """Get a value from the cache.
 
         Args:
             key: Entry key.
             default: Value returned when ``key`` is missing. If omitted,
                 ``KeyError`` is raised.
+            touch: If not ``None``, a found entry is given this new maximum
+                age in seconds, so that entries expire after a period of
+                inactivity (sliding expiration). See ``touch()``.
 
         Returns:
             The cached value or ``default`` when provided.
 
         Raises:
             KeyError: If ``key`` does not exist and no default is provided.
+            ValueError: If ``touch`` is negative.
+
+        """
+        mkey = self._map_key(key)
+        value = self._get_mapped_or(mkey, _MISSING)
+        if value is _MISSING:
+            if default is Ellipsis:
+                raise KeyError(key)
+            return default
+        if touch is not None:
+            try:
+                self._touch_mapped(mkey, touch)
+            except KeyError:
+                # Removed or expired since it was read.
+                pass
+        return unwrap(value) if isinstance(value, _WRAPPERS) else value
+
+    def touch(self, key: Any, max_age: float | None = None) -> None:
+        """Set a new maximum age for an entry.
+
+        Adapters declaring ``Capability.TOUCH`` update the expiration time
+        without reading or rewriting the value. Others read and store the
+        value again.
+
+        Entries stored by ``get_put()`` or the decorator with ``stale_ttl``
+        or ``early_refresh`` keep their refresh schedule.
+
+        Args:
+            key: Entry key.
+            max_age: New maximum age in seconds, counted from now. If
+                ``None``, the entry does not expire.
+
+        Raises:
+            KeyError: If the key does not exist.
+            ValueError: If ``max_age`` is negative.
 
         """
         try:
-            return self._adapter.get_mapped(self._map_key(key))
+            self._touch_mapped(self._map_key(key), max_age)
         except KeyError as ex:
-            if default is Ellipsis:
-                raise KeyError(key) from ex
-        return default
+            raise KeyError(key) from ex
+
+    def _touch_mapped(self, mkey: Any, max_age: float | None) -> None:
+        if max_age is not None:
+            if max_age < 0:
+                raise ValueError('Cache max_age must be greater or equal '
+                                 f'to zero, got {max_age}')
+            if self._jitter is not None:
+                max_age = self._jitter(max_age)
+        self._ops.touch_mapped(mkey, max_age)
 
     def remove(self, key: Any) -> None:
         """Remove a cache entry.
@@ -103,17 +521,7 @@ class Cache:
             ``True`` when the key exists, otherwise ``False``.
 
         """
-        mkey = self._map_key(key)
-        try:
-            return self._adapter.has_mapped(mkey)
-        except NotImplementedError:
-            pass
-
-        try:
-            self._adapter.get_mapped(mkey)
-            return True
-        except KeyError:
-            return False
+        return self._ops.has_mapped(self._map_key(key))
 
     def put_many(self,
                  data: Mapping[Any, Any] | Iterable[tuple[Any, Any]],
@@ -137,55 +545,56 @@ class Cache:
             mapped = tuple((self._map_key(key), value)
                            for (key, value) in data)
 
-        try:
-            self._adapter.put_many_mapped(mapped, max_age)
-            return
-        except NotImplementedError:
-            pass
+        self._put_many_mapped(mapped, max_age)
 
-        for (mkey, value) in mapped:
-            self._adapter.put_mapped(mkey, value, max_age)
+    def _put_many_mapped(self, mapped: tuple[tuple[Any, Any], ...],
+                         max_age: float | None) -> None:
+        if self._jitter is not None and max_age is not None:
+            self._ops.put_many_jittered_mapped(mapped, max_age, self._jitter)
+        else:
+            self._ops.put_many_mapped(mapped, max_age)
 
     def get_many(self, keys: Iterable[Any],
-                 default: Any = ...) -> list[tuple[Any, Any]]:
+                 default: Any = ...,
+                 lazy: bool = False) -> list[tuple[Any, Any]]:
         """Get multiple values from the cache.
 
         Args:
             keys: Iterable of entry keys.
             default: Value returned for missing keys. If omitted, missing keys
                 are omitted from the result.
+            lazy: Return ``pluca.codec.LazyValue`` handles instead of values.
+                Handles decode their value on first access to their
+                ``value`` attribute, so values that are not used are never
+                deserialized.
 
         Returns:
-            A list of ``(key, value)`` tuples.
+            A list of ``(key, value)`` tuples, or of ``(key, handle)``
+            tuples if ``lazy`` is true.
 
         """
         all_keys = tuple(keys)
         mapped_keys = tuple(self._map_key(key) for key in all_keys)
 
-        try:
-            mapped_data = self._adapter.get_many_mapped(mapped_keys,
-                                                        default=default)
-            mapped_result = dict(mapped_data)
-            result = []
-            for key, mkey in zip(all_keys, mapped_keys):
-                if mkey in mapped_result:
-                    result.append((key, mapped_result[mkey]))
-                elif default is not Ellipsis:
-                    result.append((key, default))
-            return result
-        except NotImplementedError:
-            pass
+        if lazy:
+            if default is not Ellipsis:
+                default = LazyValue.resolved(default)
+            get_many_mapped = self._ops.get_many_lazy_mapped
+        else:
+            get_many_mapped = self._ops.get_many_mapped
 
+        mapped_result = dict(get_many_mapped(mapped_keys, default=_MISSING))
         result = []
         for key, mkey in zip(all_keys, mapped_keys):
-            try:
-                value = self._adapter.get_mapped(mkey)
-            except KeyError:
-                if default is Ellipsis:
-                    continue
-                value = default
-            result.append((key, value))
-
+            value = mapped_result.get(mkey, _MISSING)
+            if value is not _MISSING:
+                if lazy:
+                    value = LazyValue(_unwrap_lazy, value)
+                elif isinstance(value, _WRAPPERS):
+                    value = unwrap(value)
+                result.append((key, value))
+            elif default is not Ellipsis:
+                result.append((key, default))
         return result
 
     def remove_many(self, keys: Iterable[Any]) -> None:
@@ -197,48 +606,448 @@ class Cache:
             keys: Iterable of entry keys.
 
         """
-        mapped_keys = tuple(self._map_key(key) for key in keys)
+        self._ops.remove_many_mapped(tuple(self._map_key(key)
+                                           for key in keys))
 
-        try:
-            self._adapter.remove_many_mapped(mapped_keys)
+    def put_bytes(self, key: Any, data: Any,
+                  max_age: float | None = None) -> None:
+        """Store a bytes-like value in the cache without serializing it.
+
+        Args:
+            key: Entry key.
+            data: Bytes-like value to cache.
+            max_age: Maximum age in seconds. If ``None``, the entry does not
+                expire.
+
+        Raises:
+            ValueError: If ``max_age`` is negative.
+
+        """
+        if max_age is not None and max_age < 0:
+            raise ValueError('Cache max_age must be greater or equal to zero, '
+                             f'got {max_age}')
+        if self._jitter is not None and max_age is not None:
+            max_age = self._jitter(max_age)
+        self._ops.put_bytes_mapped(self._map_key(key), data, max_age)
+
+    def get_bytes(self, key: Any, default: Any = ...) -> Any:
+        """Get a bytes-like value from the cache.
+
+        The returned object may be a read-only ``memoryview`` over the
+        storage buffer (for example, a memory-mapped file), which avoids
+        copying the value.
+
+        Args:
+            key: Entry key.
+            default: Value returned when ``key`` is missing. If omitted,
+                ``KeyError`` is raised.
+
+        Returns:
+            The cached bytes-like value or ``default`` when provided.
+
+        Raises:
+            KeyError: If ``key`` does not exist and no default is provided.
+            TypeError: If the cached value is not bytes-like.
+
+        """
+        if default is not Ellipsis:
+            return self._ops.get_bytes_mapped_or(self._map_key(key), default)
+        data = self._ops.get_bytes_mapped_or(self._map_key(key), _MISSING)
+        if data is _MISSING:
+            raise KeyError(key)
+        return data
+
+    def put_many_bytes(self,
+                       data: Mapping[Any, Any] | Iterable[tuple[Any, Any]],
+                       max_age: float | None = None) -> None:
+        """Store multiple bytes-like values without serializing them.
+
+        Args:
+            data: Mapping or iterable of ``(key, data)`` pairs.
+            max_age: Maximum age in seconds applied to all stored entries.
+
+        """
+        if max_age is not None and max_age < 0:
+            raise ValueError('Cache max_age must be greater or equal to zero, '
+                             f'got {max_age}')
+        if isinstance(data, Mapping):
+            data = data.items()
+        if self._jitter is not None and max_age is not None:
+            for key, value in data:
+                self._ops.put_bytes_mapped(self._map_key(key), value,
+                                           self._jitter(max_age))
             return
-        except NotImplementedError:
-            pass
+        self._ops.put_many_bytes_mapped(tuple((self._map_key(key), value)
+                                              for (key, value) in data),
+                                        max_age)
 
-        for mkey in mapped_keys:
-            try:
-                self._adapter.remove_mapped(mkey)
-            except KeyError:
-                pass
+    def get_many_bytes(self, keys: Iterable[Any],
+                       default: Any = ...) -> list[tuple[Any, Any]]:
+        """Get multiple bytes-like values from the cache.
+
+        Args:
+            keys: Iterable of entry keys.
+            default: Value returned for missing keys. If omitted, missing keys
+                are omitted from the result.
+
+        Returns:
+            A list of ``(key, data)`` tuples.
+
+        """
+        all_keys = tuple(keys)
+        mapped_keys = tuple(self._map_key(key) for key in all_keys)
+
+        mapped_result = dict(self._ops.get_many_bytes_mapped(
+            mapped_keys, default=default))
+        result = []
+        for key, mkey in zip(all_keys, mapped_keys):
+            if mkey in mapped_result:
+                result.append((key, mapped_result[mkey]))
+            elif default is not Ellipsis:
+                result.append((key, default))
+        return result
+
+    def put_stream(self, key: Any, fileobj: BinaryIO,
+                   max_age: float | None = None) -> None:
+        """Store data read from a binary file object.
+
+        Adapters that support streams copy the data in chunks, so that
+        large values are never held in memory at once. Streamed entries
+        are raw bytes entries, which can also be read with
+        ``get_bytes()``.
+
+        Args:
+            key: Entry key.
+            fileobj: Binary file object to read data from, up to its end.
+            max_age: Maximum age in seconds. If ``None``, the entry does not
+                expire.
+
+        Raises:
+            ValueError: If ``max_age`` is negative.
+
+        """
+        if max_age is not None and max_age < 0:
+            raise ValueError('Cache max_age must be greater or equal to zero, '
+                             f'got {max_age}')
+        if self._jitter is not None and max_age is not None:
+            max_age = self._jitter(max_age)
+        self._ops.put_stream_mapped(self._map_key(key), fileobj, max_age)
+
+    def open_stream(self, key: Any) -> BinaryIO:
+        """Open a bytes entry for reading as a binary file object.
+
+        The returned object should be closed after use; it can be used
+        as a context manager.
+
+        Args:
+            key: Entry key.
+
+        Returns:
+            A readable binary file object.
+
+        Raises:
+            KeyError: If ``key`` does not exist.
+            TypeError: If the cached value is not bytes-like.
+
+        """
+        try:
+            return self._ops.open_stream_mapped(self._map_key(key))
+        except KeyError as ex:
+            raise KeyError(key) from ex
 
     def gc(self) -> None:
         """Run cache garbage collection."""
         self._adapter.gc()
 
     def get_put(self, key: Any, func: Callable[[], Any],
-                max_age: float | None = None) -> Any:
+                max_age: float | None = None,
+                stale_ttl: float | None = None,
+                early_refresh: float | None = None,
+                negative_ttl: float | None = None,
+                negative_exceptions: (type[BaseException]
+                                      | Iterable[type[BaseException]]) = (),
+                ) -> Any:
         """Get a value or compute and store it when missing.
 
         Args:
             key: Entry key.
             func: Callable used to produce the value on cache miss.
             max_age: Maximum age in seconds for a newly stored value.
+            stale_ttl: Grace period in seconds after ``max_age`` during
+                which a stale value is returned immediately, while a new
+                value is computed by a background thread. Each key is
+                refreshed by at most one thread at a time. Requires
+                ``max_age``.
+            early_refresh: Recompute values before they expire, with a
+                probability that rises as expiration approaches and with
+                the time ``func`` took to compute the value (XFetch).
+                Larger values refresh earlier; ``1.0`` is a good default.
+                With ``stale_ttl``, early refreshes run in the
+                background. Requires ``max_age``.
+            negative_ttl: Maximum age in seconds for negative results:
+                ``None`` returned by ``func``, and exceptions listed in
+                ``negative_exceptions``. If ``None``, ``None`` results are
+                stored with ``max_age``.
+            negative_exceptions: Exception types raised by ``func`` that are
+                cached as negative results. They are raised again on
+                cache hits, until they expire. Requires ``negative_ttl``.
 
         Returns:
             Cached value when present, otherwise the value returned by
             ``func``.
 
+        Raises:
+            ValueError: If ``stale_ttl`` or ``early_refresh`` are negative,
+                or are used without ``max_age``, if ``negative_ttl`` is
+                negative, if ``negative_exceptions`` is used without
+                ``negative_ttl``, or if ``stale_ttl``, ``early_refresh`` or
+                ``negative_exceptions`` are used with a codec that cannot
+                store them, such as JSON or marshal.
+
         """
-        mkey = self._map_key(key)
+        policy = _make_policy(max_age, stale_ttl, early_refresh,
+                              self._jitter, negative_ttl, negative_exceptions)
+        self._check_policy(policy)
+        return self._get_put_mapped(self._map_key(key), func, policy)
+
+    def _check_policy(self, policy: _Policy) -> None:
+        if policy.uses_wrappers and self._lossy_codec is not None:
+            codec = self._lossy_codec
+            raise ValueError('stale_ttl, early_refresh and '
+                             'negative_exceptions cannot be used with the '
+                             f'{getattr(codec, "name", codec)!r} codec')
+
+    def get_put_many(self, keys: Iterable[Any],
+                     loader: Callable[[list[Any]], Mapping[Any, Any]
+                                      | Iterable[tuple[Any, Any]]],
+                     max_age: float | None = None) -> list[tuple[Any, Any]]:
+        """Get multiple values, loading and storing the missing ones.
+
+        All keys are looked up with a single ``get_many()`` call, ``loader``
+        is called once with the keys that were not found, and the values it
+        returns are stored with a single ``put_many()`` call.
+
+        Args:
+            keys: Iterable of entry keys.
+            loader: Callable taking a list of missing keys and returning a
+                mapping or iterable of ``(key, value)`` pairs. Keys missing
+                from its result are not stored.
+            max_age: Maximum age in seconds for newly stored values.
+
+        Returns:
+            A list of ``(key, value)`` tuples, in the order of ``keys``.
+            Keys neither found nor loaded are omitted.
+
+        Raises:
+            ValueError: If ``max_age`` is negative.
+
+        """
+        if max_age is not None and max_age < 0:
+            raise ValueError('Cache max_age must be greater or equal to zero, '
+                             f'got {max_age}')
+
+        all_keys = tuple(keys)
+        mapped_keys = tuple(self._map_key(key) for key in all_keys)
+        found = self._get_fresh_many_mapped(mapped_keys)
+
+        missing = {mkey: key for key, mkey in zip(all_keys, mapped_keys)
+                   if mkey not in found}
+        if missing:
+            loaded = loader(list(missing.values()))
+            if isinstance(loaded, Mapping):
+                loaded = loaded.items()
+            new = tuple((self._map_key(key), value) for key, value in loaded)
+            if new:
+                self._put_many_mapped(new, max_age)
+            found.update(new)
+
+        return [(key, found[mkey]) for key, mkey in zip(all_keys, mapped_keys)
+                if mkey in found]
+
+    def _get_put_mapped(self, mkey: Any, func: Callable[[], Any],
+                        policy: _Policy) -> Any:
+        return self._resolve_mapped(mkey, self._get_mapped_or(mkey, _MISSING),
+                                    func, policy)
+
+    def _resolve_mapped(self, mkey: Any, value: Any, func: Callable[[], Any],
+                        policy: _Policy) -> Any:
+        # Return the value found for a key, or compute and store it if it
+        # is missing or needs to be refreshed.
+        if isinstance(value, _Negative):
+            _raise_negative(value)
+            value = _MISSING
+        if value is not _MISSING:
+            if not isinstance(value, _Envelope):
+                return value
+            now = time.time()
+            fresh = value.expires > now
+            if fresh and (policy.early_refresh is None
+                          or not _refresh_early(value, policy.early_refresh,
+                                                now)):
+                return value.value
+            if policy.stale_ttl is not None:
+                self._refresh(mkey, func, policy)
+                return value.value
+            if fresh:
+                return self._put_computed(mkey, func, policy)
+
+        if self._flight is not None:
+            return self._flight.do(mkey, partial(self._compute_put_mapped,
+                                                 mkey, func, policy))
+
+        return self._put_computed(mkey, func, policy)
+
+    def _compute_put_mapped(self, mkey: Any, func: Callable[[], Any],
+                            policy: _Policy) -> Any:
+        # Another thread may have stored the value between our lookup and
+        # the start of this flight.
+        value = self._get_mapped_or(mkey, _MISSING)
+        if isinstance(value, _Negative):
+            _raise_negative(value)
+            value = _MISSING
+        if value is not _MISSING and (not isinstance(value, _Envelope)
+                                      or value.expires > time.time()):
+            return unwrap(value)
+
+        return self._put_computed(mkey, func, policy)
+
+    def _put_computed(self, mkey: Any, func: Callable[[], Any],
+                      policy: _Policy) -> Any:
+        start = time.perf_counter()
+        try:
+            value = func()
+        except policy.negative_exceptions as ex:
+            self._store_negative(mkey, ex, policy)
+            raise
+        self._store_computed(mkey, value, time.perf_counter() - start,
+                             policy)
+        return value
+
+    def _store_negative(self, mkey: Any, error: BaseException,
+                        policy: _Policy) -> None:
+        assert policy.negative_ttl is not None
+        max_age = policy.negative_ttl
+        if policy.jitter is not None:
+            max_age = policy.jitter(max_age)
         try:
-            return self._adapter.get_mapped(mkey)
-        except KeyError:
-            pass
+            data = pickle.dumps(error)
+            # Exceptions whose arguments do not match their constructor
+            # are pickled, but cannot be unpickled.
+            pickle.loads(data)
+            self._adapter.put_mapped(mkey, _Negative(data), max_age)
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.debug('Failed to cache negative result for %r', mkey,
+                         exc_info=True)
+
+    def _store_computed(self, mkey: Any, value: Any, delta: float,
+                        policy: _Policy) -> None:
+        negative = value is None and policy.negative_ttl is not None
+        max_age = policy.negative_ttl if negative else policy.max_age
+        if policy.jitter is not None and max_age is not None:
+            max_age = policy.jitter(max_age)
+
+        if negative or not policy.uses_envelope:
+            self._ops.put_costed_mapped(mkey, value, max_age, delta)
+            return
 
-        value = func()
-        self._adapter.put_mapped(mkey, value, max_age)
+        assert max_age is not None
+        self._ops.put_costed_mapped(
+            mkey, _Envelope(value, time.time() + max_age, delta),
+            max_age + (policy.stale_ttl or 0), delta)
+
+    async def _arun(self, func: Callable[..., Any], *args: Any) -> Any:
+        # Run a blocking adapter call off the event loop.
+        if self._async_executor is None:
+            if self._non_blocking:
+                return func(*args)
+            self._async_executor = ThreadPoolExecutor(
+                1, thread_name_prefix='pluca-aio')
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._async_executor,
+                                          partial(func, *args))
+
+    async def _aget_put_mapped(self, mkey: Any,
+                               func: Callable[[], Awaitable[Any]],
+                               policy: _Policy) -> Any:
+        value = await self._arun(self._get_mapped_or, mkey, _MISSING)
+        if isinstance(value, _Negative):
+            _raise_negative(value)
+            value = _MISSING
+        if value is not _MISSING:
+            if not isinstance(value, _Envelope):
+                return value
+            now = time.time()
+            fresh = value.expires > now
+            if fresh and (policy.early_refresh is None
+                          or not _refresh_early(value, policy.early_refresh,
+                                                now)):
+                return value.value
+            if policy.stale_ttl is not None:
+                self._aflight(mkey, func, policy)
+                return value.value
+
+        # Shield the shared task from cancellation of any of its awaiters.
+        return await asyncio.shield(self._aflight(mkey, func, policy))
+
+    def _aflight(self, mkey: Any, func: Callable[[], Awaitable[Any]],
+                 policy: _Policy) -> asyncio.Task[Any]:
+        # Return the task computing a key in the running loop, starting it
+        # if there is none.
+        task = self._async_flights.get(mkey)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            return task
+
+        task = asyncio.ensure_future(self._acompute_put_mapped(mkey, func,
+                                                               policy))
+        self._async_flights[mkey] = task
+
+        def done(task: asyncio.Task[Any]) -> None:
+            if self._async_flights.get(mkey) is task:
+                del self._async_flights[mkey]
+            if not task.cancelled() and task.exception() is not None:
+                logger.debug('Failed to compute cache entry %r', mkey,
+                             exc_info=task.exception())
+
+        task.add_done_callback(done)
+        return task
+
+    async def _acompute_put_mapped(self, mkey: Any,
+                                   func: Callable[[], Awaitable[Any]],
+                                   policy: _Policy) -> Any:
+        start = time.perf_counter()
+        try:
+            value = await func()
+        except policy.negative_exceptions as ex:
+            await self._arun(self._store_negative, mkey, ex, policy)
+            raise
+        await self._arun(self._store_computed, mkey, value,
+                         time.perf_counter() - start, policy)
         return value
 
+    def _refresh(self, mkey: Any, func: Callable[[], Any],
+                 policy: _Policy) -> None:
+        with self._refresh_lock:
+            if mkey in self._refreshing:
+                return
+            self._refreshing.add(mkey)
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(
+                    self._refresh_workers,
+                    thread_name_prefix='pluca-refresh')
+            executor = self._refresh_executor
+
+        executor.submit(self._run_refresh, mkey, func, policy)
+
+    def _run_refresh(self, mkey: Any, func: Callable[[], Any],
+                     policy: _Policy) -> None:
+        try:
+            self._put_computed(mkey, func, policy)
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception('Failed to refresh stale cache entry %r', mkey)
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(mkey)
+
     def shutdown(self) -> None:
         """Shutdown the cache.
 
@@ -247,38 +1056,320 @@ class Cache:
         used anymore.
 
         """
+        with self._refresh_lock:
+            executor = self._refresh_executor
+            self._refresh_executor = None
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        if self._async_executor is not None:
+            self._async_executor.shutdown()
+            self._async_executor = None
         self._adapter.shutdown()
 
     def __call__(self, func: Callable[..., Any] | None = None,
-                 max_age: int | None = None) -> Callable[..., Any]:
+                 max_age: int | None = None,
+                 stale_ttl: float | None = None,
+                 early_refresh: float | None = None,
+                 jitter: float | str | None = None,
+                 key: Callable[..., Any] | None = None,
+                 ignore: Iterable[str] = (),
+                 negative_ttl: float | None = None,
+                 negative_exceptions: (type[BaseException]
+                                       | Iterable[type[BaseException]]) = (),
+                 ) -> Callable[..., Any]:
         """Wrap a callable with cache lookup and storage.
 
         Can be used directly as ``@cache`` or with options as
         ``@cache(max_age=...)``.
 
+        Results are cached by the values of the callable arguments, bound
+        to its parameters, so that calls passing the same values as
+        positional or keyword arguments, or relying on default values,
+        share the same cache entry.
+
         Args:
             func: Callable to wrap.
             max_age: Maximum age in seconds for cached results.
+            stale_ttl: Grace period in seconds for serving stale results
+                while they are refreshed in the background. See
+                ``get_put()``.
+            early_refresh: Probabilistic early refresh factor. See
+                ``get_put()``.
+            jitter: TTL jitter for cached results, overriding the cache
+                ``jitter`` setting. See ``Cache``.
+            key: Callable that receives the same arguments as ``func`` and
+                returns the key of their result, instead of the argument
+                values.
+            ignore: Names of arguments that are not part of the key, such
+                as ``self`` or connection objects.
+            negative_ttl: Maximum age in seconds for negative results. See
+                ``get_put()``.
+            negative_exceptions: Exception types cached as negative
+                results. See ``get_put()``.
 
         Returns:
             A wrapped callable that caches return values by arguments.
 
+        Raises:
+            ValueError: If ``stale_ttl`` or ``early_refresh`` are negative,
+                or are used without ``max_age``, if ``jitter`` is invalid,
+                if ``ignore`` names unknown arguments, or if it is used
+                with ``key``, if the negative result options are invalid,
+                or if the options are not supported by the codec. See
+                ``get_put()``.
+
         """
+        policy = _make_policy(
+            max_age, stale_ttl, early_refresh,
+            self._jitter if jitter is None else _make_jitter(jitter),
+            negative_ttl, negative_exceptions)
+        self._check_policy(policy)
+
+        ignore = tuple(ignore)
+        if key is not None and ignore:
+            raise ValueError('key and ignore cannot be used together')
 
         if func is None:
-            return partial(self.__call__, max_age=max_age)
+            return partial(self.__call__, max_age=max_age,
+                           stale_ttl=stale_ttl, early_refresh=early_refresh,
+                           jitter=jitter, key=key, ignore=ignore,
+                           negative_ttl=negative_ttl,
+                           negative_exceptions=policy.negative_exceptions)
+
+        # Encode the function part of keys once.
+        prefix = encode_key(('__pluca.decorator__', func.__module__,
+                             func.__qualname__))
+        if key is None:
+            arg_key = _make_arg_key(func, ignore)
+        else:
+            arg_key = partial(_call_key, key)
+        map_key = self._map_key
+        get_mapped_or = self._get_mapped_or
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                mkey = map_key(prefix + encode_key(arg_key(args, kwargs)))
+                return await self._aget_put_mapped(
+                    mkey, partial(func, *args, **kwargs), policy)
+
+            return async_wrapper
 
         @wraps(func)
         def wrapper(*args, **kwargs) -> Any:  # type: ignore[no-untyped-def]
-            key = ('__pluca.decorator__', func.__qualname__,
-                   args, sorted(kwargs.items()))
-            try:
-                return self.get(key)
-            except KeyError:
-                pass
+            mkey = map_key(prefix + encode_key(arg_key(args, kwargs)))
+            value = get_mapped_or(mkey, _MISSING)
+            if value is not _MISSING and not isinstance(value, _WRAPPERS):
+                return value
+            return self._resolve_mapped(mkey, value,
+                                        partial(func, *args, **kwargs),
+                                        policy)
+
+        return wrapper
+
+    def batched(self, func: Callable[..., Any] | None = None,
+                max_age: float | None = None) -> Callable[..., Any]:
+        """Wrap a batch callable with per-item cache lookup and storage.
+
+        The wrapped callable must take an iterable of items as its first
+        argument, and return a mapping from items to results. Each item is
+        cached separately: all items are looked up with a single
+        ``get_many()`` call, the callable is called only with the items
+        that were not found, and its results are stored with a single
+        ``put_many()`` call. Other arguments are part of the item keys.
+
+        Can be used directly as ``@cache.batched`` or with options as
+        ``@cache.batched(max_age=...)``.
 
-            data = func(*args, **kwargs)
-            self.put(key, data, max_age)
-            return data
+        Args:
+            func: Callable to wrap.
+            max_age: Maximum age in seconds for cached results.
+
+        Returns:
+            A wrapped callable that returns a dictionary mapping items to
+            results, in the order of the items. Items missing from the
+            mapping returned by ``func`` are also missing from the result.
+
+        """
+
+        if func is None:
+            return partial(self.batched, max_age=max_age)
+
+        # Encode the function part of keys once.
+        prefix = encode_key(('__pluca.batched__', func.__module__,
+                             func.__qualname__))
+
+        @wraps(func)
+        def wrapper(items: Iterable[Any], *args: Any,
+                    **kwargs: Any) -> dict[Any, Any]:
+            extra = (args, sorted(kwargs.items()))
+            keys = {item: prefix + encode_key((item, extra))
+                    for item in items}
+
+            found = dict(zip(keys, (
+                value for _, value in self.get_many(keys.values(),
+                                                    _MISSING))))
+            missing = [item for item, value in found.items()
+                       if value is _MISSING]
+            for item in missing:
+                del found[item]
+            if missing:
+                computed = func(missing, *args, **kwargs)
+                new = [(item, computed[item]) for item in missing
+                       if item in computed]
+                self.put_many(((keys[item], value) for item, value in new),
+                              max_age)
+                found.update(new)
+
+            return {item: found[item] for item in keys if item in found}
 
         return wrapper
+
+    def batch(self) -> 'Batch':
+        """Create a batch of writes applied together.
+
+        Writes done through the batch are buffered, and reads through it
+        see them. When used as a context manager, the batch is committed
+        when the context exits, or discarded if it exits with an
+        exception:
+
+        >>> import pluca.memory
+        >>> cache = Cache(pluca.memory.Adapter())
+        >>> with cache.batch() as batch:
+        ...     batch.put('foo', 'bar')
+        ...     batch.get('foo')
+        'bar'
+        >>> cache.get('foo')
+        'bar'
+
+        Returns:
+            A new ``pluca.batch.Batch`` object.
+
+        """
+        # pylint: disable-next=import-outside-toplevel,cyclic-import
+        from .batch import Batch
+        return Batch(self)
+
+    def pipeline(self) -> 'Pipeline':
+        """Create a pipeline of operations run with grouped adapter calls.
+
+        Operations return futures, which are resolved when the pipeline is
+        executed:
+
+        >>> import pluca.memory
+        >>> cache = Cache(pluca.memory.Adapter())
+        >>> pipeline = cache.pipeline()
+        >>> stored = pipeline.put('foo', 'bar')
+        >>> found = pipeline.get('foo')
+        >>> pipeline.execute()
+        >>> found.result()
+        'bar'
+
+        Returns:
+            A new ``pluca.batch.Pipeline`` object.
+
+        """
+        # pylint: disable-next=import-outside-toplevel,cyclic-import
+        from .batch import Pipeline
+        return Pipeline(self)
+
+    def map(self, func: Callable[[Any], Any], iterable: Iterable[Any],
+            executor: Executor | None = None,
+            max_age: float | None = None,
+            batch_size: int = 100) -> Generator[Any, None, None]:
+        """Map a function over items, caching each result.
+
+        Results share their cache entries with the decorator, so
+        ``cache.map(func, items)`` finds results stored by calls to
+        ``cache(func)(item)``, and vice versa. All items are looked up with
+        a single ``get_many()`` call, and only the items that were not
+        found are passed to ``func``. New results are stored with one
+        ``put_many()`` call per ``batch_size`` results.
+
+        Like ``Executor.map()``, items are looked up and submitted to
+        ``executor`` when this method is called, and results are returned
+        in the order of the items as they become available.
+
+        Args:
+            func: Callable taking one item. Pass undecorated functions,
+                since results are cached by this method.
+            iterable: Items to map ``func`` over.
+            executor: Executor used to call ``func``, such as a
+                ``ThreadPoolExecutor`` or a ``ProcessPoolExecutor``. If
+                ``None``, ``func`` is called in the calling thread, as
+                results are consumed.
+            max_age: Maximum age in seconds for cached results.
+            batch_size: Number of new results stored per ``put_many()``
+                call.
+
+        Returns:
+            A generator of the results of ``func`` for each item. Closing
+            it stores the results computed so far.
+
+        Raises:
+            ValueError: If ``max_age`` is negative, or if ``batch_size`` is
+                lower than 1.
+
+        """
+        if max_age is not None and max_age < 0:
+            raise ValueError('Cache max_age must be greater or equal to zero, '
+                             f'got {max_age}')
+        if batch_size < 1:
+            raise ValueError('batch_size must be greater than 0, '
+                             f'got {batch_size}')
+
+        prefix = encode_key(('__pluca.decorator__', func.__module__,
+                             func.__qualname__))
+        arg_key = _make_arg_key(func, ())
+        items = tuple(iterable)
+        mkeys = tuple(self._map_key(prefix + encode_key(arg_key((item,), {})))
+                      for item in items)
+
+        found = self._get_fresh_many_mapped(mkeys)
+
+        # Equal items are computed once.
+        missing = {mkey: item for item, mkey in zip(items, mkeys)
+                   if mkey not in found}
+        if executor is None:
+            computed: Iterator[Any] = (func(item)
+                                       for item in missing.values())
+        else:
+            computed = executor.map(func, missing.values())
+
+        return self._map_results(mkeys, found, computed, max_age, batch_size)
+
+    def _get_fresh_many_mapped(self, mkeys: Iterable[Any]) -> dict[Any, Any]:
+        # Look up many values, leaving out stale and negative entries, which
+        # are computed again.
+        found = dict(self._ops.get_many_mapped(mkeys))
+        now = time.time()
+        for mkey, value in tuple(found.items()):
+            if isinstance(value, _WRAPPERS):
+                if isinstance(value, _Envelope) and value.expires > now:
+                    found[mkey] = value.value
+                else:
+                    del found[mkey]
+        return found
+
+    def _map_results(self, mkeys: tuple[Any, ...], found: dict[Any, Any],
+                     computed: Iterator[Any], max_age: float | None,
+                     batch_size: int) -> Generator[Any, None, None]:
+        pending: list[tuple[Any, Any]] = []
+        try:
+            for mkey in mkeys:
+                value = found.get(mkey, _MISSING)
+                if value is _MISSING:
+                    # ``computed`` has one result for each missing key.
+                    value = next(computed, _MISSING)
+                    assert value is not _MISSING
+                    found[mkey] = value
+                    pending.append((mkey, value))
+                    if len(pending) >= batch_size:
+                        self._put_many_mapped(tuple(pending), max_age)
+                        pending.clear()
+                yield value
+        finally:
+            # Store the results computed so far, even if the caller
+            # stopped iterating early.
+            if pending:
+                self._put_many_mapped(tuple(pending), max_age)
@@ -1,5 +1,86 @@
-from collections.abc import Iterable, Mapping
-from typing import Any, Protocol, runtime_checkable
+import contextlib
+import enum
+import io
+from collections.abc import Callable, Iterable, Mapping
+from typing import (Any, BinaryIO, ContextManager, Protocol,
+                    runtime_checkable)
+
+from pluca.codec import LazyValue
+
+_MISSING = object()
+
+
+class Capability(enum.Flag):
+    """Optional adapter capabilities.
+
+    Adapters declare the optional operations they support natively in a
+    ``capabilities`` attribute. Capabilities are read once, when a cache is
+    created, so that unsupported operations cost nothing per call.
+
+    """
+
+    NONE = 0
+
+    #: ``has_mapped()`` is supported.
+    HAS = enum.auto()
+
+    #: ``put_many_mapped()`` is supported.
+    PUT_MANY = enum.auto()
+
+    #: ``get_many_mapped()`` is supported.
+    GET_MANY = enum.auto()
+
+    #: ``remove_many_mapped()`` is supported.
+    REMOVE_MANY = enum.auto()
+
+    #: ``get_mapped_or()`` is implemented.
+    GET_OR = enum.auto()
+
+    #: Mapped keys can be ``bytes`` (see ``KeyMapper``).
+    BINARY_KEYS = enum.auto()
+
+    #: ``put_bytes_mapped()`` and ``get_bytes_mapped_or()`` are
+    #: implemented.
+    BYTES = enum.auto()
+
+    #: ``put_many_bytes_mapped()`` and ``get_many_bytes_mapped()`` are
+    #: implemented.
+    BYTES_MANY = enum.auto()
+
+    #: ``put_stream_mapped()`` and ``open_stream_mapped()`` are
+    #: implemented.
+    STREAMS = enum.auto()
+
+    #: ``get_many_lazy_mapped()`` is implemented.
+    GET_MANY_LAZY = enum.auto()
+
+    #: Adapter methods do not block on I/O, so ``pluca.aio.AsyncCache``
+    #: can call them from the event loop.
+    NON_BLOCKING = enum.auto()
+
+    #: Coroutine methods ``aput_mapped()``, ``aget_mapped_or()``,
+    #: ``aremove_mapped()``, ``aput_many_mapped()`` and
+    #: ``aget_many_mapped()`` are implemented (see ``pluca.aio``).
+    ASYNC = enum.auto()
+
+    #: ``put_many_mapped()`` accepts a ``jitter`` callable, applied to
+    #: the maximum age of each entry.
+    JITTER = enum.auto()
+
+    #: ``put_mapped()`` accepts a ``cost`` keyword argument: the time in
+    #: seconds it took to compute the value, which adapters may use to
+    #: choose entries to evict.
+    COST = enum.auto()
+
+    #: ``transaction()`` is implemented. It returns a context manager in
+    #: which writes are applied together and committed once, when the
+    #: context exits without an exception.
+    TRANSACTION = enum.auto()
+
+    #: ``touch_mapped(mkey, max_age)`` is implemented. It sets a new
+    #: maximum age for an entry without rewriting its value, and raises
+    #: ``KeyError`` if the entry does not exist.
+    TOUCH = enum.auto()
 
 
 @runtime_checkable
@@ -7,7 +88,17 @@ class CacheAdapter(Protocol):
     """Adapter protocol used by ``pluca.Cache``.
 
     Optional optimization methods should raise ``NotImplementedError``
-    when unsupported.
+    when unsupported. Adapters should also declare the optional methods
+    they support in a ``capabilities`` attribute (see ``Capability``).
+
+    Adapters may also implement ``get_mapped_or(mkey, default)``, which
+    returns ``default`` instead of raising ``KeyError`` on misses. This
+    method is not part of the protocol, so that adapters without it still
+    satisfy ``isinstance()`` checks. The same goes for the raw bytes
+    methods of the ``Capability.BYTES`` and ``Capability.BYTES_MANY``
+    capabilities, the stream methods
+    of the ``Capability.STREAMS`` capability and the lazy lookup method of
+    the ``Capability.GET_MANY_LAZY`` capability.
     """
 
     def put_mapped(self, mkey: Any, value: Any,
@@ -43,3 +134,265 @@ class CacheAdapter(Protocol):
 
     def shutdown(self) -> None:
         ...
+
+
+def get_capabilities(adapter: CacheAdapter) -> Capability | None:
+    """Return the capabilities declared by an adapter.
+
+    Args:
+        adapter: Cache adapter.
+
+    Returns:
+        The declared capabilities, or ``None`` if the adapter does not
+        declare any.
+
+    Raises:
+        TypeError: If the declared capabilities are not a ``Capability``.
+
+    """
+    capabilities = getattr(adapter, 'capabilities', None)
+    if capabilities is None:
+        return None
+    if not isinstance(capabilities, Capability):
+        raise TypeError('Adapter capabilities must be a Capability, '
+                        f'got {capabilities!r}')
+    return capabilities
+
+
+class AdapterOps:
+    """Optional adapter operations bound to native or fallback code.
+
+    Each operation is bound once, when the object is created, to either
+    the adapter native method or a fallback implemented with the required
+    adapter methods, according to the adapter declared capabilities.
+
+    For adapters that do not declare capabilities, each operation probes
+    the native method on its first call, and then binds itself to the
+    native method, or to the fallback if ``NotImplementedError`` was
+    raised.
+
+    Args:
+        adapter: Cache adapter.
+
+    """
+
+    get_mapped_or: Callable[[Any, Any], Any]
+    has_mapped: Callable[[Any], bool]
+    put_many_mapped: Callable[..., None]
+    get_many_mapped: Callable[..., list[tuple[Any, Any]]]
+    remove_many_mapped: Callable[[Iterable[Any]], None]
+    put_bytes_mapped: Callable[..., None]
+    get_bytes_mapped_or: Callable[[Any, Any], Any]
+    put_many_bytes_mapped: Callable[..., None]
+    get_many_bytes_mapped: Callable[..., list[tuple[Any, Any]]]
+    put_stream_mapped: Callable[..., None]
+    open_stream_mapped: Callable[[Any], BinaryIO]
+    get_many_lazy_mapped: Callable[..., list[tuple[Any, LazyValue]]]
+    put_many_jittered_mapped: Callable[..., None]
+    put_costed_mapped: Callable[[Any, Any, float | None, float], None]
+    transaction: Callable[[], ContextManager[None]]
+    touch_mapped: Callable[[Any, float | None], None]
+
+    def __init__(self, adapter: CacheAdapter) -> None:
+        self.adapter = adapter
+        self.capabilities = get_capabilities(adapter)
+
+        self._bind_optional('get_mapped_or', Capability.GET_OR,
+                            self._get_mapped_or)
+        self._bind_optional('put_bytes_mapped', Capability.BYTES,
+                            self._put_bytes_mapped)
+        self._bind_optional('get_bytes_mapped_or', Capability.BYTES,
+                            self._get_bytes_mapped_or)
+        # Adapters storing raw bytes one entry at a time still store them
+        # raw in batches, rather than serialized with put_many_mapped().
+        self._bind_optional('put_many_bytes_mapped', Capability.BYTES_MANY,
+                            (self._put_many_bytes_mapped
+                             if self.put_bytes_mapped == self._put_bytes_mapped
+                             else self._put_each_bytes_mapped))
+        self._bind_optional('get_many_bytes_mapped', Capability.BYTES_MANY,
+                            self._get_many_bytes_mapped)
+        self._bind_optional('put_stream_mapped', Capability.STREAMS,
+                            self._put_stream_mapped)
+        self._bind_optional('open_stream_mapped', Capability.STREAMS,
+                            self._open_stream_mapped)
+        self._bind_optional('get_many_lazy_mapped', Capability.GET_MANY_LAZY,
+                            self._get_many_lazy_mapped)
+        self._bind_optional('transaction', Capability.TRANSACTION,
+                            contextlib.nullcontext)
+        self._bind_optional('touch_mapped', Capability.TOUCH,
+                            self._touch_mapped)
+
+        self._bind('has_mapped', Capability.HAS, self._has_mapped)
+        self._bind('put_many_mapped', Capability.PUT_MANY,
+                   self._put_many_mapped)
+        self._bind('get_many_mapped', Capability.GET_MANY,
+                   self._get_many_mapped)
+        self._bind('remove_many_mapped', Capability.REMOVE_MANY,
+                   self._remove_many_mapped)
+
+        if (self.capabilities is not None
+                and Capability.JITTER in self.capabilities):
+            self.put_many_jittered_mapped = self._put_many_jittered_native
+        else:
+            self.put_many_jittered_mapped = self._put_many_jittered_mapped
+
+        if (self.capabilities is not None
+                and Capability.COST in self.capabilities):
+            self.put_costed_mapped = self._put_costed_native
+        else:
+            self.put_costed_mapped = self._put_costed_mapped
+
+    def _bind_optional(self, name: str, capability: Capability,
+                       fallback: Callable[..., Any]) -> None:
+        # Bind a method that is not part of the adapter protocol.
+        if self.capabilities is None:
+            native = getattr(self.adapter, name, None)
+        elif capability in self.capabilities:
+            native = getattr(self.adapter, name)
+        else:
+            native = None
+        setattr(self, name, native or fallback)
+
+    def _bind(self, name: str, capability: Capability,
+              fallback: Callable[..., Any]) -> None:
+        native = getattr(self.adapter, name)
+
+        if self.capabilities is not None:
+            setattr(self, name,
+                    native if capability in self.capabilities else fallback)
+            return
+
+        def probe(*args: Any, **kwargs: Any) -> Any:
+            try:
+                result = native(*args, **kwargs)
+            except NotImplementedError:
+                setattr(self, name, fallback)
+                return fallback(*args, **kwargs)
+            setattr(self, name, native)
+            return result
+
+        setattr(self, name, probe)
+
+    def _get_mapped_or(self, mkey: Any, default: Any) -> Any:
+        try:
+            return self.adapter.get_mapped(mkey)
+        except KeyError:
+            return default
+
+    def _has_mapped(self, mkey: Any) -> bool:
+        return self.get_mapped_or(mkey, _MISSING) is not _MISSING
+
+    def _put_many_mapped(self,
+                         data: Mapping[Any, Any] | Iterable[tuple[Any, Any]],
+                         max_age: float | None = None) -> None:
+        if isinstance(data, Mapping):
+            data = data.items()
+        for mkey, value in data:
+            self.adapter.put_mapped(mkey, value, max_age)
+
+    def _put_many_jittered_native(self, data: Iterable[tuple[Any, Any]],
+                                  max_age: float | None,
+                                  jitter: Callable[[float], float]) -> None:
+        self.put_many_mapped(data, max_age, jitter=jitter)
+
+    def _put_many_jittered_mapped(self, data: Iterable[tuple[Any, Any]],
+                                  max_age: float | None,
+                                  jitter: Callable[[float], float]) -> None:
+        if max_age is None:
+            self.put_many_mapped(data, max_age)
+            return
+        for mkey, value in data:
+            self.adapter.put_mapped(mkey, value, jitter(max_age))
+
+    def _put_costed_native(self, mkey: Any, value: Any,
+                           max_age: float | None, cost: float) -> None:
+        # ``cost`` is not part of the adapter protocol.
+        put_mapped: Callable[..., None] = self.adapter.put_mapped
+        put_mapped(mkey, value, max_age, cost=cost)
+
+    def _put_costed_mapped(self, mkey: Any, value: Any,
+                           max_age: float | None, _cost: float) -> None:
+        self.adapter.put_mapped(mkey, value, max_age)
+
+    def _touch_mapped(self, mkey: Any, max_age: float | None) -> None:
+        self.adapter.put_mapped(mkey, self.adapter.get_mapped(mkey), max_age)
+
+    def _get_many_mapped(self, keys: Iterable[Any],
+                         default: Any = ...) -> list[tuple[Any, Any]]:
+        result = []
+        for mkey in keys:
+            value = self.get_mapped_or(mkey, _MISSING)
+            if value is _MISSING:
+                if default is Ellipsis:
+                    continue
+                value = default
+            result.append((mkey, value))
+        return result
+
+    def _remove_many_mapped(self, keys: Iterable[Any]) -> None:
+        for mkey in keys:
+            try:
+                self.adapter.remove_mapped(mkey)
+            except KeyError:
+                pass
+
+    def _put_bytes_mapped(self, mkey: Any, data: Any,
+                          max_age: float | None = None) -> None:
+        self.adapter.put_mapped(mkey, bytes(data), max_age)
+
+    def _get_bytes_mapped_or(self, mkey: Any, default: Any) -> Any:
+        value = self.get_mapped_or(mkey, _MISSING)
+        if value is _MISSING:
+            return default
+        if not isinstance(value, (bytes, bytearray, memoryview)):
+            raise TypeError('Cache entry is not bytes-like, '
+                            f'got {type(value).__name__}')
+        return value
+
+    def _put_many_bytes_mapped(self,
+                               data: Iterable[tuple[Any, Any]],
+                               max_age: float | None = None) -> None:
+        self.put_many_mapped(tuple((mkey, bytes(value))
+                                   for mkey, value in data),
+                             max_age)
+
+    def _put_each_bytes_mapped(self,
+                               data: Iterable[tuple[Any, Any]],
+                               max_age: float | None = None) -> None:
+        for mkey, value in data:
+            self.put_bytes_mapped(mkey, value, max_age)
+
+    def _get_many_bytes_mapped(self, keys: Iterable[Any],
+                               default: Any = ...) -> list[tuple[Any, Any]]:
+        result = []
+        for mkey in keys:
+            value = self.get_bytes_mapped_or(mkey, _MISSING)
+            if value is _MISSING:
+                if default is Ellipsis:
+                    continue
+                value = default
+            result.append((mkey, value))
+        return result
+
+    def _put_stream_mapped(self, mkey: Any, fileobj: BinaryIO,
+                           max_age: float | None = None) -> None:
+        self.put_bytes_mapped(mkey, fileobj.read(), max_age)
+
+    def _open_stream_mapped(self, mkey: Any) -> BinaryIO:
+        data = self.get_bytes_mapped_or(mkey, _MISSING)
+        if data is _MISSING:
+            raise KeyError(mkey)
+        return io.BytesIO(data)
+
+    def _get_many_lazy_mapped(
+            self, keys: Iterable[Any],
+            default: Any = ...) -> list[tuple[Any, LazyValue]]:
+        keys = tuple(keys)
+        found = dict(self.get_many_mapped(keys))
+        result = []
+        for mkey in keys:
+            if mkey in found:
+                result.append((mkey, LazyValue.resolved(found[mkey])))
+            elif default is not Ellipsis:
+                result.append((mkey, default))
+        return result
@@ -0,0 +1,248 @@
+import asyncio
+import inspect
+from collections.abc import Awaitable, Callable, Iterable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any
+
+from pluca import Cache, unwrap
+from pluca.adapter import Capability, get_capabilities
+
+_MISSING = object()
+
+_ASYNC_METHODS = ('aput_mapped', 'aget_mapped_or', 'aremove_mapped',
+                  'aput_many_mapped', 'aget_many_mapped')
+
+
+class AsyncCache:
+    """asyncio interface to a pluca cache.
+
+    Calls to blocking adapters run on a bounded thread pool, so that they
+    do not block the event loop. Batch methods run as a single job.
+
+    Adapters that declare ``Capability.NON_BLOCKING`` are called directly
+    from the event loop. Adapters that declare ``Capability.ASYNC``
+    provide coroutine versions of their methods, which are awaited
+    instead.
+
+    Adapters that are not thread-safe must be used with a single worker
+    (the default). SQLite connections must also be opened with
+    ``check_same_thread=False``.
+
+    Args:
+        cache: Cache to wrap.
+        max_workers: Maximum number of threads running blocking adapter
+            calls.
+
+    Raises:
+        ValueError: If ``max_workers`` is lower than 1.
+
+    >>> import asyncio
+    >>> import pluca.memory
+    >>> acache = AsyncCache(pluca.Cache(pluca.memory.Adapter()))
+    >>> async def main() -> None:
+    ...     await acache.put('foo', 'bar')
+    ...     print(await acache.get('foo'))
+    >>> asyncio.run(main())
+    bar
+
+    """
+
+    def __init__(self, cache: Cache, max_workers: int = 1) -> None:
+        if max_workers < 1:
+            raise ValueError('max_workers must be greater than zero')
+
+        self._cache = cache
+        self.max_workers = max_workers
+
+        capabilities = get_capabilities(cache.adapter) or Capability.NONE
+        self._executor: ThreadPoolExecutor | None = None
+        if Capability.NON_BLOCKING not in capabilities:
+            self._executor = ThreadPoolExecutor(
+                max_workers, thread_name_prefix='pluca-aio')
+
+        self._native: dict[str, Callable[..., Awaitable[Any]]] = {}
+        if Capability.ASYNC in capabilities:
+            for name in _ASYNC_METHODS:
+                self._native[name] = getattr(cache.adapter, name)
+
+    @property
+    def cache(self) -> Cache:
+        """Return the wrapped cache."""
+        return self._cache
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self._executor is None:
+            return func(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor,
+                                          partial(func, *args))
+
+    async def put(self, key: Any, value: Any,
+                  max_age: float | None = None) -> None:
+        """Store a value in the cache.
+
+        See ``pluca.Cache.put()``.
+
+        """
+        aput_mapped = self._native.get('aput_mapped')
+        if aput_mapped is None:
+            await self._run(self._cache.put, key, value, max_age)
+            return
+        if max_age is not None and max_age < 0:
+            raise ValueError('Cache max_age must be greater or equal to zero, '
+                             f'got {max_age}')
+        jitter = self._cache.jitter
+        if jitter is not None and max_age is not None:
+            max_age = jitter(max_age)
+        await aput_mapped(self._cache.key_mapper.map_key(key), value,
+                          max_age)
+
+    async def get(self, key: Any, default: Any = ...) -> Any:
+        """Get a value from the cache.
+
+        See ``pluca.Cache.get()``.
+
+        """
+        aget_mapped_or = self._native.get('aget_mapped_or')
+        if aget_mapped_or is None:
+            return await self._run(self._cache.get, key, default)
+        value = await aget_mapped_or(self._cache.key_mapper.map_key(key),
+                                     _MISSING)
+        if value is not _MISSING:
+            return unwrap(value)
+        if default is Ellipsis:
+            raise KeyError(key)
+        return default
+
+    async def remove(self, key: Any) -> None:
+        """Remove a cache entry.
+
+        See ``pluca.Cache.remove()``.
+
+        """
+        aremove_mapped = self._native.get('aremove_mapped')
+        if aremove_mapped is None:
+            await self._run(self._cache.remove, key)
+            return
+        try:
+            await aremove_mapped(self._cache.key_mapper.map_key(key))
+        except KeyError as ex:
+            raise KeyError(key) from ex
+
+    async def has(self, key: Any) -> bool:
+        """Check whether a key is present in the cache.
+
+        See ``pluca.Cache.has()``.
+
+        """
+        return bool(await self._run(self._cache.has, key))
+
+    async def put_many(self,
+                       data: Mapping[Any, Any] | Iterable[tuple[Any, Any]],
+                       max_age: float | None = None) -> None:
+        """Store multiple entries in the cache.
+
+        See ``pluca.Cache.put_many()``.
+
+        """
+        if isinstance(data, Mapping):
+            data = data.items()
+        data = tuple(data)
+
+        aput_many_mapped = self._native.get('aput_many_mapped')
+        if aput_many_mapped is None:
+            await self._run(self._cache.put_many, data, max_age)
+            return
+        if max_age is not None and max_age < 0:
+            raise ValueError('Cache max_age must be greater or equal to zero, '
+                             f'got {max_age}')
+        map_key = self._cache.key_mapper.map_key
+        jitter = self._cache.jitter
+        if jitter is not None and max_age is not None:
+            # Each entry gets its own maximum age.
+            aput_mapped = self._native['aput_mapped']
+            for key, value in data:
+                await aput_mapped(map_key(key), value, jitter(max_age))
+            return
+        await aput_many_mapped(tuple((map_key(key), value)
+                                     for key, value in data),
+                               max_age)
+
+    async def get_many(self, keys: Iterable[Any],
+                       default: Any = ...) -> list[tuple[Any, Any]]:
+        """Get multiple values from the cache.
+
+        See ``pluca.Cache.get_many()``.
+
+        """
+        all_keys = tuple(keys)
+
+        aget_many_mapped = self._native.get('aget_many_mapped')
+        if aget_many_mapped is None:
+            return list(await self._run(self._cache.get_many, all_keys,
+                                        default))
+
+        map_key = self._cache.key_mapper.map_key
+        mapped_keys = tuple(map_key(key) for key in all_keys)
+        mapped_result = dict(await aget_many_mapped(mapped_keys,
+                                                    default=_MISSING))
+        result = []
+        for key, mkey in zip(all_keys, mapped_keys):
+            value = mapped_result.get(mkey, _MISSING)
+            if value is not _MISSING:
+                result.append((key, unwrap(value)))
+            elif default is not Ellipsis:
+                result.append((key, default))
+        return result
+
+    async def remove_many(self, keys: Iterable[Any]) -> None:
+        """Remove multiple cache entries.
+
+        See ``pluca.Cache.remove_many()``.
+
+        """
+        await self._run(self._cache.remove_many, tuple(keys))
+
+    async def get_put(self, key: Any, func: Callable[[], Any],
+                      max_age: float | None = None) -> Any:
+        """Get a value or compute and store it when missing.
+
+        Args:
+            key: Entry key.
+            func: Callable used to produce the value on cache miss. It may
+                be a coroutine function.
+            max_age: Maximum age in seconds for a newly stored value.
+
+        Returns:
+            Cached value when present, otherwise the value returned by
+            ``func``.
+
+        """
+        value = await self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        value = func()
+        if inspect.isawaitable(value):
+            value = await value
+        await self.put(key, value, max_age)
+        return value
+
+    async def flush(self) -> None:
+        """Remove all entries from the cache."""
+        await self._run(self._cache.flush)
+
+    async def gc(self) -> None:
+        """Run cache garbage collection."""
+        await self._run(self._cache.gc)
+
+    async def shutdown(self) -> None:
+        """Shutdown the cache and the thread pool.
+
+        See ``pluca.Cache.shutdown()``.
+
+        """
+        await self._run(self._cache.shutdown)
+        if self._executor is not None:
+            self._executor.shutdown()
@@ -0,0 +1,421 @@
+import time
+from collections.abc import Iterable, Mapping
+from concurrent.futures import Future
+from types import TracebackType
+from typing import Any, NamedTuple
+
+from pluca import Cache, unwrap
+
+_MISSING = object()
+_REMOVED = object()
+
+
+class _Write(NamedTuple):
+    # Write buffered by a batch or a pipeline. ``expires`` is the time
+    # when the value expires, used to serve reads from the buffer.
+    value: Any
+    max_age: float | None
+    expires: float | None
+
+
+def _write_many_mapped(cache: Cache, writes: Mapping[Any, Any]) -> None:
+    # Apply buffered writes: ``_Write`` tuples or ``_REMOVED`` by mapped
+    # key. Entries are stored with one ``put_many_mapped()`` call per
+    # maximum age, and removed with one ``remove_many_mapped()`` call.
+    puts: dict[float | None, list[tuple[Any, Any]]] = {}
+    removes = []
+    for mkey, write in writes.items():
+        if write is _REMOVED:
+            removes.append(mkey)
+        else:
+            puts.setdefault(write.max_age, []).append((mkey, write.value))
+    for max_age, items in puts.items():
+        if cache.jitter is not None and max_age is not None:
+            cache.ops.put_many_jittered_mapped(tuple(items), max_age,
+                                               cache.jitter)
+        else:
+            cache.ops.put_many_mapped(tuple(items), max_age)
+    if removes:
+        cache.ops.remove_many_mapped(tuple(removes))
+
+
+class Batch:
+    """Buffer cache writes and apply them together.
+
+    Writes are kept in the batch until it is committed. Reads through the
+    batch see its pending writes. On commit, entries are stored with one
+    ``put_many()`` call for each distinct maximum age, and removed with one
+    ``remove_many()`` call, all inside an adapter transaction when the
+    adapter supports them (see ``Capability.TRANSACTION``). Repeated writes
+    to a key are coalesced, so each entry is written at most once.
+
+    Batches are usually created with ``Cache.batch()`` and used as context
+    managers, which commit pending writes when the context exits, or
+    discard them if it exits with an exception. Batches are not
+    thread-safe.
+
+    Args:
+        cache: Cache the writes are applied to.
+
+    """
+
+    def __init__(self, cache: Cache) -> None:
+        self.cache = cache
+        self._map_key = cache.key_mapper.map_key
+        # Pending writes by mapped key: ``_Write`` tuples, or ``_REMOVED``.
+        self._pending: dict[Any, Any] = {}
+
+    def __enter__(self) -> 'Batch':
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None,
+                 exc_value: BaseException | None,
+                 traceback: TracebackType | None) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def put(self, key: Any, value: Any,
+            max_age: float | None = None) -> None:
+        """Store a value when the batch is committed.
+
+        Args:
+            key: Entry key.
+            value: Value to cache.
+            max_age: Maximum age in seconds. If ``None``, the entry does not
+                expire.
+
+        Raises:
+            ValueError: If ``max_age`` is negative.
+
+        """
+        self._put_mapped(self._map_key(key), value, max_age)
+
+    def put_many(self, data: Mapping[Any, Any] | Iterable[tuple[Any, Any]],
+                 max_age: float | None = None) -> None:
+        """Store multiple entries when the batch is committed.
+
+        Args:
+            data: Mapping or iterable of ``(key, value)`` pairs.
+            max_age: Maximum age in seconds applied to all stored entries.
+
+        Raises:
+            ValueError: If ``max_age`` is negative.
+
+        """
+        if isinstance(data, Mapping):
+            data = data.items()
+        for key, value in data:
+            self._put_mapped(self._map_key(key), value, max_age)
+
+    def _put_mapped(self, mkey: Any, value: Any,
+                    max_age: float | None) -> None:
+        if max_age is None:
+            expires = None
+        elif max_age < 0:
+            raise ValueError('Cache max_age must be greater or equal to zero, '
+                             f'got {max_age}')
+        else:
+            expires = time.time() + max_age
+        self._pending[mkey] = _Write(value, max_age, expires)
+
+    def remove(self, key: Any) -> None:
+        """Remove an entry when the batch is committed.
+
+        Unlike ``Cache.remove()``, missing keys are ignored, so that removes
+        do not need to read the cache.
+
+        Args:
+            key: Entry key.
+
+        """
+        self._pending[self._map_key(key)] = _REMOVED
+
+    def remove_many(self, keys: Iterable[Any]) -> None:
+        """Remove multiple entries when the batch is committed.
+
+        Missing keys are ignored.
+
+        Args:
+            keys: Iterable of entry keys.
+
+        """
+        for key in keys:
+            self.remove(key)
+
+    def get(self, key: Any, default: Any = ...) -> Any:
+        """Get a value, including values pending in the batch.
+
+        Args:
+            key: Entry key.
+            default: Value returned when ``key`` is missing. If omitted,
+                ``KeyError`` is raised.
+
+        Returns:
+            The pending or cached value, or ``default`` when provided.
+
+        Raises:
+            KeyError: If ``key`` does not exist and no default is provided.
+
+        """
+        value = self._get_mapped_or(self._map_key(key), _MISSING)
+        if value is _MISSING:
+            if default is Ellipsis:
+                raise KeyError(key)
+            return default
+        return value
+
+    def has(self, key: Any) -> bool:
+        """Check whether a key is present, including pending writes.
+
+        Args:
+            key: Entry key.
+
+        Returns:
+            ``True`` when the key exists, otherwise ``False``.
+
+        """
+        mkey = self._map_key(key)
+        if mkey in self._pending:
+            return self._get_pending_or(mkey, _MISSING) is not _MISSING
+        return self.cache.ops.has_mapped(mkey)
+
+    def get_many(self, keys: Iterable[Any],
+                 default: Any = ...) -> list[tuple[Any, Any]]:
+        """Get multiple values, including values pending in the batch.
+
+        Keys without pending writes are looked up with a single
+        ``get_many()`` call.
+
+        Args:
+            keys: Iterable of entry keys.
+            default: Value returned for missing keys. If omitted, missing keys
+                are omitted from the result.
+
+        Returns:
+            A list of ``(key, value)`` tuples.
+
+        """
+        all_keys = tuple(keys)
+        mapped_keys = tuple(self._map_key(key) for key in all_keys)
+
+        found = dict(self.cache.ops.get_many_mapped(
+            tuple(mkey for mkey in mapped_keys if mkey not in self._pending)))
+
+        result = []
+        for key, mkey in zip(all_keys, mapped_keys):
+            if mkey in self._pending:
+                value = self._get_pending_or(mkey, _MISSING)
+            else:
+                value = unwrap(found.get(mkey, _MISSING))
+            if value is not _MISSING:
+                result.append((key, value))
+            elif default is not Ellipsis:
+                result.append((key, default))
+        return result
+
+    def _get_mapped_or(self, mkey: Any, default: Any) -> Any:
+        if mkey in self._pending:
+            return self._get_pending_or(mkey, default)
+        return unwrap(self.cache.ops.get_mapped_or(mkey, default))
+
+    def _get_pending_or(self, mkey: Any, default: Any) -> Any:
+        pending = self._pending[mkey]
+        if pending is _REMOVED:
+            return default
+        if pending.expires is not None and pending.expires <= time.time():
+            return default
+        return pending.value
+
+    def commit(self) -> None:
+        """Apply the pending writes to the cache."""
+        pending, self._pending = self._pending, {}
+        with self.cache.ops.transaction():
+            _write_many_mapped(self.cache, pending)
+
+    def discard(self) -> None:
+        """Discard the pending writes."""
+        self._pending = {}
+
+
+class _Op(NamedTuple):
+    # Operation queued in a pipeline.
+    kind: str
+    key: Any
+    mkey: Any
+    arg: Any
+    future: 'Future[Any]'
+
+
+class Pipeline:
+    """Queue cache operations and run them with grouped adapter calls.
+
+    Each operation returns a ``concurrent.futures.Future`` that is resolved
+    when the pipeline is executed. Operations run in the order they were
+    queued, but consecutive reads are sent to the adapter with a single
+    ``get_many()`` call, and consecutive writes with one ``put_many()``
+    call per maximum age and one ``remove_many()`` call. All operations run
+    inside an adapter transaction when the adapter supports them (see
+    ``Capability.TRANSACTION``), so this helps most with adapters where
+    round trips or commits are expensive.
+
+    Pipelines are usually created with ``Cache.pipeline()``. When used as
+    context managers, they are executed when the context exits without an
+    exception. Pipelines are not thread-safe.
+
+    Args:
+        cache: Cache the operations run on.
+
+    """
+
+    def __init__(self, cache: Cache) -> None:
+        self.cache = cache
+        self._map_key = cache.key_mapper.map_key
+        self._queue: list[_Op] = []
+
+    def __enter__(self) -> 'Pipeline':
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None,
+                 exc_value: BaseException | None,
+                 traceback: TracebackType | None) -> None:
+        if exc_type is None:
+            self.execute()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def _queue_op(self, kind: str, key: Any, arg: Any = None) -> 'Future[Any]':
+        future: Future[Any] = Future()
+        self._queue.append(_Op(kind, key, self._map_key(key), arg, future))
+        return future
+
+    def get(self, key: Any, default: Any = ...) -> 'Future[Any]':
+        """Queue a lookup.
+
+        Args:
+            key: Entry key.
+            default: Value returned when ``key`` is missing. If omitted, the
+                future raises ``KeyError``.
+
+        Returns:
+            A future resolved with the cached value or ``default``.
+
+        """
+        return self._queue_op('get', key, default)
+
+    def has(self, key: Any) -> 'Future[Any]':
+        """Queue a check of whether a key is present in the cache.
+
+        Args:
+            key: Entry key.
+
+        Returns:
+            A future resolved with ``True`` if the key exists, otherwise
+            ``False``.
+
+        """
+        return self._queue_op('has', key)
+
+    def put(self, key: Any, value: Any,
+            max_age: float | None = None) -> 'Future[Any]':
+        """Queue the storage of a value.
+
+        Args:
+            key: Entry key.
+            value: Value to cache.
+            max_age: Maximum age in seconds. If ``None``, the entry does not
+                expire.
+
+        Returns:
+            A future resolved with ``None`` once the value is stored.
+
+        Raises:
+            ValueError: If ``max_age`` is negative.
+
+        """
+        if max_age is not None and max_age < 0:
+            raise ValueError('Cache max_age must be greater or equal to zero, '
+                             f'got {max_age}')
+        return self._queue_op('put', key, _Write(value, max_age, None))
+
+    def remove(self, key: Any) -> 'Future[Any]':
+        """Queue the removal of an entry.
+
+        Unlike ``Cache.remove()``, missing keys are ignored.
+
+        Args:
+            key: Entry key.
+
+        Returns:
+            A future resolved with ``None`` once the entry is removed.
+
+        """
+        return self._queue_op('remove', key, _REMOVED)
+
+    def execute(self) -> None:
+        """Run the queued operations and resolve their futures.
+
+        Operations whose futures were cancelled are skipped. If an adapter
+        call fails, the transaction is rolled back when the adapter
+        supports them, and the exception is set on all futures.
+
+        Raises:
+            BaseException: Any exception raised by the adapter, after it is
+                set on the futures of the operations.
+
+        """
+        queue, self._queue = self._queue, []
+        queue = [op for op in queue
+                 if op.future.set_running_or_notify_cancel()]
+
+        # ``(result, error)`` tuples, in the order of the queue.
+        results: list[tuple[Any, BaseException | None]] = []
+        try:
+            with self.cache.ops.transaction():
+                start = 0
+                while start < len(queue):
+                    reads = queue[start].kind in ('get', 'has')
+                    end = start + 1
+                    while (end < len(queue)
+                           and (queue[end].kind in ('get', 'has')) == reads):
+                        end += 1
+                    if reads:
+                        results.extend(self._read(queue[start:end]))
+                    else:
+                        _write_many_mapped(
+                            self.cache,
+                            {op.mkey: op.arg for op in queue[start:end]})
+                        results.extend([(None, None)] * (end - start))
+                    start = end
+        except BaseException as ex:
+            for op in queue:
+                op.future.set_exception(ex)
+            raise
+
+        for op, (result, error) in zip(queue, results):
+            if error is None:
+                op.future.set_result(result)
+            else:
+                op.future.set_exception(error)
+
+    def _read(self,
+              ops: list[_Op]) -> list[tuple[Any, BaseException | None]]:
+        found = dict(self.cache.ops.get_many_lazy_mapped(
+            tuple(dict.fromkeys(op.mkey for op in ops))))
+        results: list[tuple[Any, BaseException | None]] = []
+        for op in ops:
+            handle = found.get(op.mkey, _MISSING)
+            if op.kind == 'has':
+                results.append((handle is not _MISSING, None))
+            elif handle is not _MISSING:
+                results.append((unwrap(handle.value), None))
+            elif op.arg is Ellipsis:
+                results.append((None, KeyError(op.key)))
+            else:
+                results.append((op.arg, None))
+        return results
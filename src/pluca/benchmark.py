@@ -1,11 +1,14 @@
 
 import argparse
 import dbm.dumb
+import functools
 import gc
+import hashlib
 import os
 import random
 import string
 import sys
+import threading
 import time
 import tempfile
 from typing import Any, NamedTuple
@@ -17,6 +20,8 @@ import pluca.memory
 import pluca.null
 import pluca.sqlite3
 import pluca.dbm
+from pluca.codec import Codec, JsonCodec, MarshalCodec, PickleCodec, RawCodec
+from pluca.keymap import KeyMapper
 
 
 class _ATuple(NamedTuple):
@@ -129,6 +134,172 @@ def benchmark(name: str, entries: int,
     gc.collect()
 
 
+def _legacy_map_key(key: Any) -> str:
+    return hashlib.sha1(repr((type(key), key)).encode('utf-8')).hexdigest()
+
+
+def print_key_mapper_header(entries: int) -> None:
+    # pylint: disable-next=[bad-builtin]
+    print(f'''
+Key mapping cost with {entries:,} keys of each kind.
+                              str           int          tuple        object
+Key mapper              secs     op/s secs     op/s secs     op/s secs     op/s
+----------------------- ------------- ------------- ------------- -------------
+''', end='')
+
+
+def benchmark_key_mapper(name: str, entries: int,
+                         map_key: Callable[[Any], Any]) -> None:
+    prng = _Random()
+
+    key_sets: list[list[Any]] = [
+        [prng.random_string() for _ in range(entries)],
+        [prng.randint(-1_000_000, 1_000_000) for _ in range(entries)],
+        [(prng.random_string(), prng.randint(0, 1_000), prng.random())
+         for _ in range(entries)],
+        [prng.random_tuple() for _ in range(entries)],
+    ]
+
+    gc_enabled = gc.isenabled()
+    gc.disable()
+
+    durations = []
+    for keys in key_sets:
+        start = time.time()
+        for key in keys:
+            map_key(key)
+        durations.append(time.time() - start)
+
+    if gc_enabled:
+        gc.enable()
+
+    # pylint: disable-next=[bad-builtin]
+    print(f'{name:22.22} ' + ''.join(
+        f'{duration:4.1f} {entries / duration:9,.1f}'
+        for duration in durations))
+
+
+def _get_plain_data(nr: int) -> list[Any]:
+    # Values supported by all structured codecs.
+    prng = _Random()
+    return [{'id': prng.randint(-1_000_000, 1_000_000),
+             'name': prng.random_string(),
+             'scores': [prng.random() for _ in range(5)],
+             'active': prng.random() > 0.5}
+            for _ in range(nr)]
+
+
+def print_codec_header(entries: int) -> None:
+    # pylint: disable-next=[bad-builtin]
+    print(f'''
+Value codec cost with {entries:,} values.
+                           encode        decode     size
+Codec                   secs     op/s secs     op/s  bytes
+----------------------- ------------- ------------- ------
+''', end='')
+
+
+def benchmark_codec(name: str, codec: Codec, values: list[Any]) -> None:
+    gc_enabled = gc.isenabled()
+    gc.disable()
+
+    encode_start = time.time()
+    encoded = [codec.encode(value) for value in values]
+    encode_duration = time.time() - encode_start
+
+    decode_start = time.time()
+    for data in encoded:
+        codec.decode(data)
+    decode_duration = time.time() - decode_start
+
+    if gc_enabled:
+        gc.enable()
+
+    entries = len(values)
+    size = sum(len(data) for data in encoded) / entries
+
+    # pylint: disable-next=[bad-builtin]
+    print(f'{name:22.22} '
+          f'{encode_duration:4.1f} {entries / encode_duration:9,.1f}'
+          f'{decode_duration:4.1f} {entries / decode_duration:9,.1f}'
+          f'{size:6.0f}')
+
+
+def print_single_flight_header(threads: int, keys: int) -> None:
+    # pylint: disable-next=[bad-builtin]
+    print(f'''
+Computations of {keys:,} expired hot keys with {threads} concurrent threads.
+Mode                    secs   computations
+----------------------- ---- --------------
+''', end='')
+
+
+def benchmark_single_flight(name: str, threads: int, keys: int,
+                            **kwargs: Any) -> None:
+    cache = pluca.Cache(pluca.memory.Adapter(), **kwargs)
+    computations = 0
+    lock = threading.Lock()
+
+    def compute() -> int:
+        nonlocal computations
+        with lock:
+            computations += 1
+        time.sleep(0.01)  # Simulate an expensive backend call.
+        return 1
+
+    barrier = threading.Barrier(threads)
+
+    def run() -> None:
+        barrier.wait()
+        for key in range(keys):
+            cache.get_put(key, compute)
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+
+    start = time.time()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    duration = time.time() - start
+
+    # pylint: disable-next=[bad-builtin]
+    print(f'{name:22.22} {duration:4.1f} {computations:14,}')
+
+
+def print_decorator_header(calls: int) -> None:
+    # pylint: disable-next=[bad-builtin]
+    print(f'''
+Decorator cache hit cost with {calls:,} calls.
+Decorator               secs     op/s
+----------------------- -------------
+''', end='')
+
+
+def benchmark_decorator(name: str, calls: int,
+                        decorator: Callable[[Callable[..., Any]],
+                                            Callable[..., Any]]) -> None:
+    @decorator
+    def func(alpha: int, beta: str, gamma: float = 1.0) -> float:
+        return alpha * len(beta) * gamma
+
+    func(1, 'foo')
+
+    gc_enabled = gc.isenabled()
+    gc.disable()
+
+    start = time.time()
+    for _ in range(calls):
+        func(1, 'foo')
+    duration = time.time() - start
+
+    if gc_enabled:
+        gc.enable()
+
+    # pylint: disable-next=[bad-builtin]
+    print(f'{name:22.22} {duration:4.1f} {calls / duration:9,.1f}')
+
+
 def _main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument('-e', '--entries',
@@ -185,6 +356,46 @@ def _main() -> None:
         benchmark('DBM dumb', args.entries, pluca.dbm.Adapter, db=dbd)
         dbd.close()
 
+    print_key_mapper_header(args.entries)
+
+    benchmark_key_mapper('repr()+SHA-1 (legacy)', args.entries,
+                         _legacy_map_key)
+    benchmark_key_mapper('SHA-1 (default)', args.entries,
+                         KeyMapper().map_key)
+    benchmark_key_mapper('BLAKE2b 8 bytes', args.entries,
+                         KeyMapper(digest='blake2b', digest_size=8).map_key)
+    benchmark_key_mapper('BLAKE2b 8 bytes memo', args.entries,
+                         KeyMapper(digest='blake2b', digest_size=8,
+                                   memo=args.entries).map_key)
+
+    print_codec_header(args.entries)
+
+    values = _get_plain_data(args.entries)
+    benchmark_codec('Pickle protocol 2', PickleCodec(protocol=2), values)
+    benchmark_codec('Pickle (default)', PickleCodec(), values)
+    benchmark_codec('Marshal', MarshalCodec(), values)
+    benchmark_codec('JSON', JsonCodec(), values)
+    raw_values = [JsonCodec().encode(value) for value in values]
+    benchmark_codec('Raw (JSON bytes)', RawCodec(), raw_values)
+
+    print_decorator_header(args.entries)
+
+    benchmark_decorator('functools.lru_cache', args.entries,
+                        functools.lru_cache(maxsize=None))
+    benchmark_decorator('Memory', args.entries,
+                        pluca.Cache(pluca.memory.Adapter()))
+    benchmark_decorator('Memory key memo', args.entries,
+                        pluca.Cache(pluca.memory.Adapter(),
+                                    key_mapper=KeyMapper(memo=1024)))
+    benchmark_decorator('Memory key=', args.entries,
+                        pluca.Cache(pluca.memory.Adapter())(
+                            key=lambda alpha, beta, gamma=1.0: alpha))
+
+    print_single_flight_header(16, 100)
+
+    benchmark_single_flight('No single-flight', 16, 100)
+    benchmark_single_flight('Single-flight', 16, 100, single_flight=True)
+
 
 if __name__ == '__main__':
     _main()
@@ -0,0 +1,550 @@
+import bz2
+import json
+import lzma
+import marshal
+import mmap
+import pickle
+import struct
+import threading
+import zlib
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, NamedTuple, Protocol, cast, runtime_checkable
+
+
+@runtime_checkable
+class Codec(Protocol):
+    """Value codec protocol used by pluca adapters.
+
+    Encoded data starts with the codec ``tag`` byte, so that data encoded
+    with different codecs can be decoded with ``decode()``. ``decode()``
+    must accept any object supporting the buffer protocol.
+    """
+
+    name: str
+    tag: bytes
+
+    def encode(self, value: Any) -> bytes:
+        ...
+
+    def decode(self, data: bytes) -> Any:
+        ...
+
+
+class PickleCodec:
+    """Pickle codec.
+
+    Pickle streams of protocol 2 and above start with the ``PROTO``
+    opcode, which is used as the codec tag. Entries stored by previous
+    pluca versions are therefore decoded by this codec.
+
+    Args:
+        protocol: Pickle protocol. Defaults to the highest protocol.
+
+    Raises:
+        ValueError: If ``protocol`` is lower than 2.
+
+    """
+
+    name = 'pickle'
+    tag = pickle.PROTO
+
+    def __init__(self, protocol: int = pickle.HIGHEST_PROTOCOL) -> None:
+        if protocol < 2:
+            raise ValueError('Pickle protocol must be 2 or higher')
+        self.protocol = protocol
+
+    def encode(self, value: Any) -> bytes:
+        return pickle.dumps(value, protocol=self.protocol)
+
+    def decode(self, data: bytes) -> Any:
+        return pickle.loads(data)
+
+
+class MarshalCodec:
+    """Marshal codec.
+
+    Faster than pickle, but only supports plain builtin types (``None``,
+    ``bool``, numbers, strings, ``bytes``, and tuples, lists, sets and
+    dicts of those), and data is only guaranteed to be readable by the
+    same Python version.
+
+    """
+
+    name = 'marshal'
+    tag = b'M'
+
+    def encode(self, value: Any) -> bytes:
+        return self.tag + marshal.dumps(value)
+
+    def decode(self, data: bytes) -> Any:
+        return marshal.loads(memoryview(data)[1:])
+
+
+class JsonCodec:
+    """JSON codec.
+
+    Only supports JSON-compatible values. Tuples are decoded as lists.
+
+    """
+
+    name = 'json'
+    tag = b'J'
+
+    def encode(self, value: Any) -> bytes:
+        return self.tag + json.dumps(value,
+                                     separators=(',', ':')).encode('utf-8')
+
+    def decode(self, data: bytes) -> Any:
+        return json.loads(bytes(data[1:]))
+
+
+class OutOfBandPickleCodec:
+    """Pickle codec with out-of-band buffers.
+
+    Values are pickled with protocol 5. Buffers of at least ``threshold``
+    bytes exposed through ``pickle.PickleBuffer`` (for example, NumPy
+    arrays) are stored out-of-band, as segments aligned to the memory
+    page size that follow the pickle stream. On decoding, these buffers
+    are passed to ``pickle`` as slices of the encoded data, without
+    copying. Decoding memory-mapped data therefore builds values that are
+    read-only views over the mapping.
+
+    Values without large buffers are encoded as plain pickles.
+
+    Args:
+        threshold: Minimum size, in bytes, of out-of-band buffers.
+
+    Raises:
+        ValueError: If ``threshold`` is negative.
+
+    """
+
+    name = 'pickle-oob'
+    tag = b'O'
+
+    _COUNTS = struct.Struct('<II')
+    _SEGMENT = struct.Struct('<QQ')
+
+    def __init__(self, threshold: int = 65536) -> None:
+        if threshold < 0:
+            raise ValueError('threshold must be greater or equal to zero')
+        self.threshold = threshold
+
+    def encode_segments(self, value: Any) -> list[Any]:
+        """Encode a value into a list of bytes-like segments.
+
+        Writing the segments in order produces the same data as
+        ``encode()``, without joining large buffers in memory.
+
+        Args:
+            value: Value to encode.
+
+        Returns:
+            The encoded segments.
+
+        """
+        buffers: list[memoryview] = []
+
+        def buffer_callback(buffer: pickle.PickleBuffer) -> bool:
+            try:
+                raw = buffer.raw()
+            except BufferError:  # Non-contiguous buffer.
+                return True
+            if raw.nbytes < self.threshold:
+                return True
+            buffers.append(raw)
+            return False
+
+        data = pickle.dumps(value, protocol=5,
+                            buffer_callback=buffer_callback)
+        if not buffers:
+            return [data]
+
+        header_size = (len(self.tag) + self._COUNTS.size
+                       + self._SEGMENT.size * len(buffers))
+        header = [self.tag, self._COUNTS.pack(len(buffers), len(data))]
+        segments: list[Any] = [b'', data]
+        offset = header_size + len(data)
+        for raw in buffers:
+            padding = -offset % mmap.PAGESIZE
+            if padding:
+                segments.append(bytes(padding))
+                offset += padding
+            header.append(self._SEGMENT.pack(offset, raw.nbytes))
+            segments.append(raw)
+            offset += raw.nbytes
+        segments[0] = b''.join(header)
+        return segments
+
+    def encode(self, value: Any) -> bytes:
+        return b''.join(self.encode_segments(value))
+
+    def decode(self, data: bytes) -> Any:
+        view = memoryview(data)
+        count, size = self._COUNTS.unpack_from(view, len(self.tag))
+        start = len(self.tag) + self._COUNTS.size
+        buffers = []
+        for _ in range(count):
+            offset, length = self._SEGMENT.unpack_from(view, start)
+            buffers.append(view[offset:offset + length])
+            start += self._SEGMENT.size
+        return pickle.loads(view[start:start + size], buffers=buffers)
+
+
+class RawCodec:
+    """Raw bytes codec.
+
+    Stores bytes-like values as they are. Decoded values are ``bytes``.
+
+    """
+
+    name = 'raw'
+    tag = b'R'
+
+    def encode(self, value: Any) -> bytes:
+        if not isinstance(value, (bytes, bytearray, memoryview)):
+            raise TypeError('Raw codec only accepts bytes-like values, '
+                            f'got {type(value).__name__}')
+        return self.tag + value
+
+    def decode(self, data: bytes) -> Any:
+        return bytes(data[1:])
+
+
+class _Compression(NamedTuple):
+    tag: bytes
+    compress: Callable[[bytes, int | None], bytes]
+    decompress: Callable[[bytes | memoryview], bytes]
+
+
+def _zlib_compress(data: bytes, level: int | None) -> bytes:
+    return zlib.compress(data, -1 if level is None else level)
+
+
+def _lzma_compress(data: bytes, level: int | None) -> bytes:
+    return lzma.compress(data, preset=level)
+
+
+def _bz2_compress(data: bytes, level: int | None) -> bytes:
+    return bz2.compress(data, 9 if level is None else level)
+
+
+_compressions: dict[str, _Compression] = {
+    'zlib': _Compression(b'Z', _zlib_compress, zlib.decompress),
+    'lzma': _Compression(b'X', _lzma_compress, lzma.decompress),
+    'bz2': _Compression(b'B', _bz2_compress, bz2.decompress),
+}
+
+_compressions_by_tag = {c.tag[0]: c for c in _compressions.values()}
+
+
+class CompressedCodec:
+    """Codec wrapper that compresses large encoded values.
+
+    Values whose encoded size reaches ``threshold`` bytes are compressed
+    and tagged with the compression format, so that ``decode()`` knows
+    which entries to decompress. Smaller values are stored as encoded by
+    the wrapped codec.
+
+    Args:
+        codec: Wrapped codec name or object.
+        compression: Compression format: ``'zlib'``, ``'lzma'`` or
+            ``'bz2'``.
+        threshold: Minimum encoded size, in bytes, of compressed values.
+        level: Compression level, or ``None`` for the format default.
+        workers: Number of threads used by ``encode_many()``. ``None``
+            encodes in the calling thread. Threads are started on the
+            first ``encode_many()`` call that uses them, and stopped by
+            ``shutdown()``.
+
+    Raises:
+        ValueError: If the compression format is unknown, or if
+            ``threshold`` or ``workers`` are invalid.
+
+    >>> codec = CompressedCodec('pickle', threshold=100)
+    >>> len(codec.encode('a' * 1000)) < 100
+    True
+    >>> decode(codec.encode('a' * 1000)) == 'a' * 1000
+    True
+
+    """
+
+    def __init__(self, codec: str | Codec,
+                 compression: str = 'zlib',
+                 threshold: int = 1024,
+                 level: int | None = None,
+                 workers: int | None = None) -> None:
+        try:
+            self._compression = _compressions[compression]
+        except KeyError as ex:
+            raise ValueError(f'Unknown compression: {compression!r}') from ex
+        if threshold < 0:
+            raise ValueError('threshold must be greater or equal to zero')
+        if workers is not None and workers < 1:
+            raise ValueError('workers must be greater than zero')
+
+        self.codec = get_codec(codec)
+        self.name = f'{self.codec.name}+{compression}'
+        self.tag = self.codec.tag
+        self.compression = compression
+        self.threshold = threshold
+        self.level = level
+        self.workers = workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._executor_lock = threading.Lock()
+
+    def encode(self, value: Any) -> bytes:
+        data = self.codec.encode(value)
+        if len(data) < self.threshold:
+            return data
+        return (self._compression.tag
+                + self._compression.compress(data, self.level))
+
+    def decode(self, data: bytes) -> Any:
+        return decode(data)
+
+    def encode_many(self, values: Iterable[Any]) -> list[bytes]:
+        """Encode many values, using worker threads if configured.
+
+        The stdlib compressors release the GIL while compressing, so
+        large batches are compressed in parallel.
+
+        Args:
+            values: Values to encode.
+
+        Returns:
+            The encoded values, in the same order.
+
+        """
+        if self.workers is None:
+            return [self.encode(value) for value in values]
+        values = list(values)
+        if len(values) < 2:
+            return [self.encode(value) for value in values]
+        return list(self._get_executor().map(self.encode, values))
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix='pluca-compress')
+            return self._executor
+
+    def shutdown(self) -> None:
+        """Stop the ``encode_many()`` worker threads, if started.
+
+        The codec can still be used afterwards, and starts new threads when
+        needed.
+
+        """
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+_codecs_by_name: dict[str, Codec] = {}
+_codecs_by_tag: dict[int, Codec] = {}
+
+
+def register_codec(codec: Codec) -> None:
+    """Register a codec.
+
+    Registered codecs can be selected by name, and their data can be
+    decoded by ``decode()``.
+
+    Args:
+        codec: Codec to register.
+
+    Raises:
+        ValueError: If the codec tag is not a single byte, or if another
+            codec or a compression format uses the same tag.
+
+    """
+    if len(codec.tag) != 1:
+        raise ValueError(f'Codec tag must be a single byte: {codec.tag!r}')
+    if codec.tag[0] in _compressions_by_tag:
+        raise ValueError(f'Codec tag {codec.tag!r} is used by compression')
+    registered = _codecs_by_tag.get(codec.tag[0])
+    if registered is not None and registered.name != codec.name:
+        raise ValueError(f'Codec tag {codec.tag!r} is already used by '
+                         f'{registered.name!r}')
+    _codecs_by_name[codec.name] = codec
+    _codecs_by_tag[codec.tag[0]] = codec
+
+
+def get_codec(codec: str | Codec) -> Codec:
+    """Resolve a codec.
+
+    Args:
+        codec: Codec name, or a codec object.
+
+    Returns:
+        The codec.
+
+    Raises:
+        ValueError: If no codec is registered with the given name.
+
+    >>> get_codec('json').name
+    'json'
+
+    """
+    if not isinstance(codec, str):
+        return codec
+    try:
+        return _codecs_by_name[codec]
+    except KeyError as ex:
+        raise ValueError(f'Unknown codec: {codec!r}') from ex
+
+
+def encode_many(codec: Codec, values: Iterable[Any]) -> list[bytes]:
+    """Encode many values with a codec.
+
+    Uses the ``encode_many()`` method of the codec if it has one.
+
+    Args:
+        codec: Codec used to encode values.
+        values: Values to encode.
+
+    Returns:
+        The encoded values, in the same order.
+
+    """
+    codec_encode_many = getattr(codec, 'encode_many', None)
+    if codec_encode_many is not None:
+        return cast(list[bytes], codec_encode_many(values))
+    return [codec.encode(value) for value in values]
+
+
+def decode(data: bytes | memoryview) -> Any:
+    """Decode data encoded by any registered codec.
+
+    Compressed data is decompressed first.
+
+    Args:
+        data: Encoded data, as ``bytes`` or a ``memoryview``.
+
+    Returns:
+        The decoded value.
+
+    Raises:
+        ValueError: If the data was not encoded by a registered codec.
+
+    >>> decode(get_codec('json').encode([1, 2]))
+    [1, 2]
+    >>> decode(get_codec('raw').encode(b'data'))
+    b'data'
+
+    """
+    try:
+        compression = _compressions_by_tag.get(data[0])
+        if compression is not None:
+            data = compression.decompress(data[1:])
+        codec = _codecs_by_tag[data[0]]
+    except (KeyError, IndexError) as ex:
+        raise ValueError('Data was not encoded by a known codec') from ex
+    # Codecs read their data through the buffer protocol, so views are
+    # decoded without copying them.
+    return codec.decode(cast(bytes, data))
+
+
+def decode_bytes(data: bytes | memoryview | Any
+                 ) -> bytes | bytearray | memoryview:
+    """Decode data holding a bytes-like value.
+
+    Data encoded by the raw codec is returned as a ``memoryview`` over
+    ``data`` that skips the tag byte, without copying. Other data is
+    decoded with ``decode()``.
+
+    Args:
+        data: Encoded data, or any object supporting the buffer protocol.
+
+    Returns:
+        The bytes-like value.
+
+    Raises:
+        TypeError: If the decoded value is not bytes-like.
+        ValueError: If the data was not encoded by a registered codec.
+
+    >>> bytes(decode_bytes(get_codec('raw').encode(b'data')))
+    b'data'
+
+    """
+    view = memoryview(data)
+    if view[:1] == RawCodec.tag:
+        return view[1:]
+    value = decode(view)
+    if not isinstance(value, (bytes, bytearray, memoryview)):
+        raise TypeError('Cache entry is not bytes-like, '
+                        f'got {type(value).__name__}')
+    return value
+
+
+class LazyValue:
+    """Handle to a value that is decoded on first access.
+
+    Args:
+        decoder: Callable that decodes ``data``.
+        data: Encoded data.
+
+    >>> lazy = LazyValue(decode, get_codec('json').encode([1, 2]))
+    >>> lazy.is_decoded
+    False
+    >>> lazy.value
+    [1, 2]
+    >>> lazy.is_decoded
+    True
+
+    """
+
+    __slots__ = ('_decoder', '_data', '_value')
+
+    def __init__(self, decoder: Callable[[Any], Any], data: Any) -> None:
+        self._decoder: Callable[[Any], Any] | None = decoder
+        self._data = data
+        self._value: Any = None
+
+    @classmethod
+    def resolved(cls, value: Any) -> 'LazyValue':
+        """Create a handle to an already decoded value.
+
+        Args:
+            value: The value.
+
+        Returns:
+            The handle.
+
+        """
+        lazy = cls.__new__(cls)
+        lazy._decoder = None
+        lazy._data = None
+        lazy._value = value
+        return lazy
+
+    @property
+    def is_decoded(self) -> bool:
+        """Return whether the value was already decoded."""
+        return self._decoder is None
+
+    @property
+    def value(self) -> Any:
+        """Return the value, decoding it on first access."""
+        if self._decoder is not None:
+            self._value = self._decoder(self._data)
+            self._decoder = None
+            self._data = None
+        return self._value
+
+    def __repr__(self) -> str:
+        if self._decoder is None:
+            return f'LazyValue.resolved({self._value!r})'
+        return '<LazyValue (not decoded)>'
+
+
+register_codec(PickleCodec())
+register_codec(MarshalCodec())
+register_codec(JsonCodec())
+register_codec(OutOfBandPickleCodec())
+register_codec(RawCodec())
@@ -1,17 +1,31 @@
-from collections.abc import Iterable, Mapping
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from contextlib import ExitStack, contextmanager
 from typing import Any
 
 import pluca
+from pluca.adapter import AdapterOps, Capability
 from pluca.utils import create_cache
 
+_MISSING = object()
+
 
 class CompositeAdapter:
     """Composite cache adapter for pluca."""
 
+    capabilities = (Capability.HAS
+                    | Capability.PUT_MANY
+                    | Capability.GET_MANY
+                    | Capability.REMOVE_MANY
+                    | Capability.GET_OR
+                    | Capability.JITTER
+                    | Capability.TRANSACTION
+                    | Capability.TOUCH)
+
     def __init__(self,
                  config: Iterable[Mapping[str, Any]] | None = None,
                  allowed_class_modules: tuple[str, ...] | None = None) -> None:
         self._caches: list[pluca.Cache] = []
+        self._ops: list[AdapterOps] = []
         self._allowed_class_modules = allowed_class_modules
 
         if config:
@@ -34,6 +48,7 @@ class CompositeAdapter:
     def add_cache(self, cache: pluca.Cache) -> None:
         """Add a cache."""
         self._caches.append(cache)
+        self._ops.append(AdapterOps(cache.adapter))
 
     @property
     def caches(self) -> list[pluca.Cache]:
@@ -46,12 +61,17 @@ class CompositeAdapter:
             cache.adapter.put_mapped(mkey, value, max_age)
 
     def get_mapped(self, mkey: Any) -> Any:
-        for cache in self._caches:
-            try:
-                return cache.adapter.get_mapped(mkey)
-            except KeyError:
-                pass
-        raise KeyError(mkey)
+        value = self.get_mapped_or(mkey, _MISSING)
+        if value is _MISSING:
+            raise KeyError(mkey)
+        return value
+
+    def get_mapped_or(self, mkey: Any, default: Any) -> Any:
+        for ops in self._ops:
+            value = ops.get_mapped_or(mkey, _MISSING)
+            if value is not _MISSING:
+                return value
+        return default
 
     def remove_mapped(self, mkey: Any) -> None:
         removed = False
@@ -64,62 +84,72 @@ class CompositeAdapter:
         if not removed:
             raise KeyError(mkey)
 
+    def touch_mapped(self, mkey: Any, max_age: float | None = None) -> None:
+        touched = False
+        for ops in self._ops:
+            try:
+                ops.touch_mapped(mkey, max_age)
+            except KeyError:
+                continue
+            touched = True
+        if not touched:
+            raise KeyError(mkey)
+
     def flush(self) -> None:
         for cache in self._caches:
             cache.flush()
 
     def has_mapped(self, mkey: Any) -> bool:
-        for cache in self._caches:
-            try:
-                if cache.adapter.has_mapped(mkey):
-                    return True
-            except NotImplementedError:
-                try:
-                    cache.adapter.get_mapped(mkey)
-                    return True
-                except KeyError:
-                    pass
-        return False
+        return any(ops.has_mapped(mkey) for ops in self._ops)
 
     def put_many_mapped(self,
                         data: Mapping[Any, Any] | Iterable[tuple[Any, Any]],
-                        max_age: float | None = None) -> None:
+                        max_age: float | None = None,
+                        jitter: Callable[[float], float] | None = None
+                        ) -> None:
         if isinstance(data, Mapping):
             items = tuple(data.items())
         else:
             items = tuple(data)
 
-        for cache in self._caches:
-            try:
-                cache.adapter.put_many_mapped(items, max_age)
-            except NotImplementedError:
-                for mkey, value in items:
-                    cache.adapter.put_mapped(mkey, value, max_age)
+        for ops in self._ops:
+            if jitter is None:
+                ops.put_many_mapped(items, max_age)
+            else:
+                ops.put_many_jittered_mapped(items, max_age, jitter)
 
     def get_many_mapped(self, keys: Iterable[Any],
                         default: Any = ...) -> list[tuple[Any, Any]]:
-        result = []
-        for mkey in keys:
-            found = False
-            for cache in self._caches:
-                try:
-                    value = cache.adapter.get_mapped(mkey)
-                except KeyError:
-                    continue
-                found = True
-                result.append((mkey, value))
+        all_mkeys = tuple(keys)
+
+        found: dict[Any, Any] = {}
+        missing = tuple(dict.fromkeys(all_mkeys))
+        for ops in self._ops:
+            if not missing:
                 break
-            if not found and default is not Ellipsis:
+            found.update(ops.get_many_mapped(missing))
+            missing = tuple(mkey for mkey in missing if mkey not in found)
+
+        result = []
+        for mkey in all_mkeys:
+            if mkey in found:
+                result.append((mkey, found[mkey]))
+            elif default is not Ellipsis:
                 result.append((mkey, default))
         return result
 
     def remove_many_mapped(self, keys: Iterable[Any]) -> None:
-        for mkey in keys:
-            for cache in self._caches:
-                try:
-                    cache.adapter.remove_mapped(mkey)
-                except KeyError:
-                    continue
+        items = tuple(keys)
+        for ops in self._ops:
+            ops.remove_many_mapped(items)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Run writes in a transaction on all child caches."""
+        with ExitStack() as stack:
+            for ops in self._ops:
+                stack.enter_context(ops.transaction())
+            yield
 
     def gc(self) -> None:
         """Run garbage collection on all child caches."""
@@ -131,6 +161,7 @@ class CompositeAdapter:
         for cache in self._caches:
             cache.shutdown()
         self._caches = []
+        self._ops = []
 
 
 Adapter = CompositeAdapter
@@ -1,11 +1,26 @@
-from collections.abc import Iterable, Mapping
+from collections.abc import Callable, Iterable, Mapping
 import dbm
+import math
 import pickle
+import struct
 import time
 from pathlib import Path
 from typing import Any, NamedTuple
 
+from pluca.adapter import Capability
+from pluca.codec import (Codec, CompressedCodec, RawCodec, decode,
+                         decode_bytes, encode_many, get_codec)
 
+_MISSING = object()
+
+# Records start with the big-endian expiration time (``inf`` for entries
+# that never expire), followed by the encoded value. Expiration times are
+# positive, so the first byte of a record never matches the pickle
+# ``PROTO`` opcode that starts records written by previous versions.
+_HEADER = struct.Struct('>d')
+
+
+# Legacy record format.
 class _Entry(NamedTuple):
     value: Any
     expires: float | None
@@ -16,9 +31,35 @@ class _Entry(NamedTuple):
 
 
 class DbmAdapter:
-    """DBM cache adapter for pluca."""
-
-    def __init__(self, db: Any):
+    """DBM cache adapter for pluca.
+
+    Args:
+        db: DBM file name, or an open DBM object.
+        binary_keys: Store keys as raw digest bytes instead of hexadecimal
+            strings.
+        codec: Codec name or object used to serialize values.
+        compression: Compress encoded values with ``'zlib'``, ``'lzma'``
+            or ``'bz2'``. ``None`` disables compression.
+        compress_threshold: Minimum encoded size, in bytes, of compressed
+            values.
+        compress_workers: Number of threads used to compress values in
+            ``put_many()`` batches. ``None`` compresses in the calling
+            thread.
+
+    """
+
+    capabilities = (Capability.HAS
+                    | Capability.PUT_MANY
+                    | Capability.GET_OR
+                    | Capability.BYTES
+                    | Capability.JITTER
+                    | Capability.TOUCH)
+
+    def __init__(self, db: Any, binary_keys: bool = False,
+                 codec: str | Codec = 'pickle',
+                 compression: str | None = None,
+                 compress_threshold: int = 1024,
+                 compress_workers: int | None = None):
         if isinstance(db, str):
             self.dbm = dbm.open(db, 'c')
         elif isinstance(db, Path):
@@ -26,21 +67,77 @@ class DbmAdapter:
         else:
             self.dbm = db
 
+        if binary_keys:
+            self.capabilities = (DbmAdapter.capabilities
+                                 | Capability.BINARY_KEYS)
+        self.binary_keys = binary_keys
+        self.codec = get_codec(codec)
+        if compression is not None:
+            self.codec = CompressedCodec(self.codec, compression,
+                                         threshold=compress_threshold,
+                                         workers=compress_workers)
+
     def put_mapped(self, mkey: Any, value: Any,
                    max_age: float | None = None) -> None:
-        expires = None if max_age is None else time.time() + max_age
-        self.dbm[mkey] = pickle.dumps(_Entry(value, expires))
+        expires = math.inf if max_age is None else time.time() + max_age
+        self.dbm[mkey] = _HEADER.pack(expires) + self.codec.encode(value)
+
+    def put_bytes_mapped(self, mkey: Any, data: Any,
+                         max_age: float | None = None) -> None:
+        expires = math.inf if max_age is None else time.time() + max_age
+        self.dbm[mkey] = _HEADER.pack(expires) + RawCodec.tag + data
 
     def get_mapped(self, mkey: Any) -> Any:
-        entry = pickle.loads(self.dbm[mkey])
-        if not entry.is_fresh:
-            del self.dbm[mkey]
+        value = self.get_mapped_or(mkey, _MISSING)
+        if value is _MISSING:
             raise KeyError(mkey)
-        return entry.value
+        return value
+
+    def get_mapped_or(self, mkey: Any, default: Any) -> Any:
+        return self._get_or(mkey, default, decode)
+
+    def get_bytes_mapped_or(self, mkey: Any, default: Any) -> Any:
+        return self._get_or(mkey, default, decode_bytes)
+
+    def _get_or(self, mkey: Any, default: Any,
+                decoder: Callable[[Any], Any]) -> Any:
+        data = self.dbm.get(mkey)
+        if data is None:
+            return default
+        if data[0] == pickle.PROTO[0]:
+            entry = pickle.loads(data)
+            if not entry.is_fresh:
+                del self.dbm[mkey]
+                return default
+            # Legacy records are rare, so re-encoding their value keeps a
+            # single decoding path.
+            return decoder(pickle.dumps(entry.value))
+        if _HEADER.unpack_from(data)[0] <= time.time():
+            del self.dbm[mkey]
+            return default
+        return decoder(memoryview(data)[_HEADER.size:])
 
     def remove_mapped(self, mkey: Any) -> None:
         del self.dbm[mkey]
 
+    def touch_mapped(self, mkey: Any, max_age: float | None = None) -> None:
+        data = self.dbm.get(mkey)
+        if data is None:
+            raise KeyError(mkey)
+        if data[0] == pickle.PROTO[0]:
+            entry = pickle.loads(data)
+            if not entry.is_fresh:
+                del self.dbm[mkey]
+                raise KeyError(mkey)
+            self.put_mapped(mkey, entry.value, max_age)
+            return
+        now = time.time()
+        if _HEADER.unpack_from(data)[0] <= now:
+            del self.dbm[mkey]
+            raise KeyError(mkey)
+        expires = math.inf if max_age is None else now + max_age
+        self.dbm[mkey] = _HEADER.pack(expires) + data[_HEADER.size:]
+
     def flush(self) -> None:
         for key in self.dbm.keys():
             del self.dbm[key]
@@ -50,8 +147,19 @@ class DbmAdapter:
 
     def put_many_mapped(self,
                         data: Mapping[Any, Any] | Iterable[tuple[Any, Any]],
-                        max_age: float | None = None) -> None:
-        raise NotImplementedError
+                        max_age: float | None = None,
+                        jitter: Callable[[float], float] | None = None
+                        ) -> None:
+        if isinstance(data, Mapping):
+            data = data.items()
+        expires = math.inf if max_age is None else time.time() + max_age
+        header = _HEADER.pack(expires)
+        items = list(data)
+        encoded = encode_many(self.codec, (value for _, value in items))
+        for (mkey, _), edata in zip(items, encoded):
+            if max_age is not None and jitter is not None:
+                header = _HEADER.pack(time.time() + jitter(max_age))
+            self.dbm[mkey] = header + edata
 
     def get_many_mapped(self, keys: Iterable[Any],
                         default: Any = ...) -> list[tuple[Any, Any]]:
@@ -62,9 +170,14 @@ class DbmAdapter:
 
     def gc(self) -> None:
         """Delete expired entries and compact the DBM store when possible."""
+        now = time.time()
         for key in self.dbm.keys():
-            entry = pickle.loads(self.dbm[key])
-            if not entry.is_fresh:
+            data = self.dbm[key]
+            if data[0] == pickle.PROTO[0]:
+                fresh = pickle.loads(data).is_fresh
+            else:
+                fresh = _HEADER.unpack_from(data)[0] > now
+            if not fresh:
                 del self.dbm[key]
 
         try:
@@ -75,6 +188,8 @@ class DbmAdapter:
     def shutdown(self) -> None:
         """Close the underlying DBM database handle."""
         self.dbm.close()
+        if isinstance(self.codec, CompressedCodec):
+            self.codec.shutdown()
 
 
 Adapter = DbmAdapter
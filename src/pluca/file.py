@@ -1,15 +1,23 @@
 import warnings
 import importlib
+import io
+import mmap as mmap_
 import os
-import pickle
+import shutil
+import tempfile
 import socket
 import time
-from contextlib import contextmanager
-from collections.abc import Iterable, Iterator, Mapping
+from contextlib import ExitStack, contextmanager
+from collections.abc import Callable, Iterable, Iterator, Mapping
 from pathlib import Path
 from types import ModuleType
 from typing import Any, BinaryIO, cast
 
+from pluca.adapter import Capability
+from pluca.codec import (Codec, CompressedCodec, OutOfBandPickleCodec,
+                         RawCodec, decode, decode_bytes, encode_many,
+                         get_codec)
+
 fcntl: ModuleType | None
 try:
     import fcntl
@@ -18,12 +26,16 @@ except ModuleNotFoundError:
 
 _FILE_MAX_AGE = 1_000_000_000
 
+_MISSING = object()
+
 _DIR_PREFIX = 'cache-'
 
 _MKDIR_STALE_AGE = 300.0
 _MKDIR_WAIT_TIMEOUT = 30.0
 _MKDIR_POLL_INTERVAL = 0.05
 
+_SPOOL_MAX_SIZE = 1024 * 1024
+
 
 def _resolve_locking(locking: str | None) -> str | None:
     if locking is None:
@@ -84,6 +96,40 @@ def _resolve_cache_root(cache_dir: Path, name: str) -> Path:
     return cache_root
 
 
+class _EntryStream(io.RawIOBase):
+    # Read-only file object over entry data that follows the codec tag.
+
+    def __init__(self, fd: BinaryIO, offset: int) -> None:
+        super().__init__()
+        self._fd = fd
+        self._offset = offset
+        fd.seek(offset)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int | None:
+        # Entry files are unbuffered, or spooled copies of them; both
+        # support readinto().
+        return cast(io.RawIOBase, self._fd).readinto(buffer)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            offset = max(offset, 0) + self._offset
+        return self._fd.seek(offset, whence) - self._offset
+
+    def tell(self) -> int:
+        return self._fd.tell() - self._offset
+
+    def close(self) -> None:
+        if not self.closed:
+            self._fd.close()
+        super().close()
+
+
 class FileAdapter:
     """File cache for pluca.
 
@@ -113,15 +159,49 @@ class FileAdapter:
             ``TimeoutError``. Set ``None`` to wait indefinitely.
         mkdir_poll_interval: Polling interval (seconds) used when waiting on
             existing ``locking='mkdir'`` lock directories.
+        codec: Codec name or object used to serialize values.
+        compression: Compress encoded values with ``'zlib'``, ``'lzma'``
+            or ``'bz2'``. ``None`` disables compression.
+        compress_threshold: Minimum encoded size, in bytes, of compressed
+            values.
+        compress_workers: Number of threads used to compress values in
+            ``put_many()`` batches. ``None`` compresses in the calling
+            thread.
+        mmap: Memory-map entry files on ``get_bytes()``, which returns a
+            read-only ``memoryview`` over the mapping instead of a copy of
+            the data. Entries are then always written to a new file that
+            replaces the old one, so that existing views are never
+            modified.
+        oob_threshold: Store buffers of at least this many bytes (for
+            example, NumPy array data) out-of-band with pickle protocol
+            5, and load them back as read-only views over the
+            memory-mapped entry file. ``None`` disables out-of-band
+            buffers. Entries are always written to a new file, as with
+            ``mmap``. Cannot be combined with ``codec`` and
+            ``compression``.
 
     """
 
+    capabilities = (Capability.HAS
+                    | Capability.PUT_MANY
+                    | Capability.GET_OR
+                    | Capability.BYTES
+                    | Capability.STREAMS
+                    | Capability.JITTER
+                    | Capability.TOUCH)
+
     def __init__(self, name: str = 'pluca',
                  cache_dir: Path | None = None,
                  locking: str | None = 'auto',
                  mkdir_stale_age: float | None = _MKDIR_STALE_AGE,
                  mkdir_wait_timeout: float | None = _MKDIR_WAIT_TIMEOUT,
-                 mkdir_poll_interval: float = _MKDIR_POLL_INTERVAL) -> None:
+                 mkdir_poll_interval: float = _MKDIR_POLL_INTERVAL,
+                 codec: str | Codec = 'pickle',
+                 compression: str | None = None,
+                 compress_threshold: int = 1024,
+                 compress_workers: int | None = None,
+                 mmap: bool = False,
+                 oob_threshold: int | None = None) -> None:
 
         if cache_dir is None:
             try:
@@ -145,15 +225,46 @@ class FileAdapter:
         self.mkdir_wait_timeout = mkdir_wait_timeout
         self.mkdir_poll_interval = mkdir_poll_interval
         self._hostname = socket.gethostname()
+        self.codec = get_codec(codec)
+        if oob_threshold is not None:
+            if self.codec.name != 'pickle' or compression is not None:
+                raise ValueError('oob_threshold cannot be used with other '
+                                 'codecs or compression')
+            self.codec = OutOfBandPickleCodec(oob_threshold)
+        elif compression is not None:
+            self.codec = CompressedCodec(self.codec, compression,
+                                         threshold=compress_threshold,
+                                         workers=compress_workers)
+        self._encode: Callable[[Any], Any] = getattr(
+            self.codec, 'encode_segments', self.codec.encode)
+        self.mmap = mmap
+        self.oob_threshold = oob_threshold
+        self._map_entries = mmap or oob_threshold is not None
 
         self.name = name
         self.cache_dir = cache_dir
 
-    def _dump(self, obj: Any, fd: BinaryIO) -> None:
-        pickle.dump(obj, fd)
+    def _dump(self, data: bytes | list[Any], fd: BinaryIO) -> None:
+        if not isinstance(data, list):
+            fd.write(data)
+            return
+        for segment in data:
+            if hasattr(segment, 'read'):
+                shutil.copyfileobj(segment, fd)
+            else:
+                fd.write(segment)
 
     def _load(self, fd: BinaryIO) -> Any:
-        return pickle.load(fd)
+        if self.oob_threshold is not None:
+            return decode(memoryview(mmap_.mmap(fd.fileno(), 0,
+                                                access=mmap_.ACCESS_READ)))
+        return decode(fd.read())
+
+    def _load_bytes(self, fd: BinaryIO) -> Any:
+        if self.mmap:
+            return decode_bytes(mmap_.mmap(fd.fileno(), 0,
+                                           access=mmap_.ACCESS_READ))
+        return decode_bytes(fd.read())
 
     def _get_filename(self, mkey: str) -> Path:
         return (self._cache_root
@@ -308,12 +419,16 @@ class FileAdapter:
             owner.unlink(missing_ok=True)
             lock_dir.rmdir()
 
-    def _write(self, filename: Path, value: Any) -> None:
+    def _write(self, filename: Path, data: bytes | list[Any],
+               max_age: float | None = None) -> None:
         temp = filename.with_suffix('.tmp')
         while True:
             try:
                 with open(temp, 'xb') as fd:
-                    self._dump(value, fd)
+                    self._dump(data, fd)
+                # Set the expiration time before the entry becomes visible,
+                # so that readers never see it with an expired mtime.
+                self._set_max_age(temp, max_age)
             except FileExistsError:
                 time.sleep(0.1)
             except Exception:
@@ -354,66 +469,156 @@ class FileAdapter:
 
     def put_mapped(self, mkey: Any, value: Any,
                    max_age: float | None = None) -> None:
+        self._put_data(mkey, self._encode(value), max_age)
+
+    def put_bytes_mapped(self, mkey: Any, data: Any,
+                         max_age: float | None = None) -> None:
+        self._put_data(mkey, RawCodec.tag + data, max_age)
+
+    def _put_data(self, mkey: Any, data: bytes | list[Any],
+                  max_age: float | None = None,
+                  replace: bool = False) -> None:
         filename = self._get_filename(mkey)
 
         if self.locking == 'mkdir':
             with self._lock_entry_mkdir(filename, create=True):
                 try:
-                    self._write(filename, value)
+                    self._write(filename, data, max_age)
                 except FileNotFoundError:
                     filename.parent.mkdir(parents=True)
-                    self._write(filename, value)
-                self._set_max_age(filename, max_age)
+                    self._write(filename, data, max_age)
             return
 
         if self.locking is None:
             try:
-                self._write(filename, value)
+                self._write(filename, data, max_age)
             except FileNotFoundError:
                 filename.parent.mkdir(parents=True)
-                self._write(filename, value)
-            self._set_max_age(filename, max_age)
+                self._write(filename, data, max_age)
             return
 
         with self._lock_entry(filename, shared=False, create=True) as fd:
             if fd is None:
                 raise RuntimeError('Failed to acquire entry file for write')
-            fd.seek(0)
-            fd.truncate(0)
-            self._dump(value, fd)
-            fd.flush()
-            self._set_max_age(filename, max_age)
+            if replace or self._map_entries:
+                # Keep data seen by views over the old file unchanged.
+                self._write(filename, data, max_age)
+            else:
+                fd.seek(0)
+                fd.truncate(0)
+                self._dump(data, fd)
+                fd.flush()
+                self._set_max_age(filename, max_age)
+
+    def put_stream_mapped(self, mkey: Any, fileobj: BinaryIO,
+                          max_age: float | None = None) -> None:
+        # Always write to a new file, so that a failing stream does not
+        # leave a partially written entry behind.
+        self._put_data(mkey, [RawCodec.tag, fileobj], max_age, replace=True)
+
+    def _open_fresh(self, filename: Path,
+                    lock: bool = False) -> BinaryIO | None:
+        with ExitStack() as stack:
+            try:
+                fd = stack.enter_context(open(filename, 'rb', buffering=0))
+            except FileNotFoundError:
+                return None
+            if lock:
+                assert fcntl is not None
+                # Held until the stream is closed.
+                fcntl.flock(fd.fileno(), fcntl.LOCK_SH)
+            stat = os.fstat(fd.fileno())
+            if stat.st_size == 0 or stat.st_mtime < time.time():
+                return None
+            # The caller owns the file from here on.
+            stack.pop_all()
+        return cast(BinaryIO, fd)
+
+    def open_stream_mapped(self, mkey: Any) -> BinaryIO:
+        filename = self._get_filename(mkey)
+
+        fd: BinaryIO | None
+        if self.locking == 'mkdir':
+            with self._lock_entry_mkdir(filename):
+                fd = self._open_fresh(filename)
+        elif self.locking is None:
+            fd = self._open_fresh(filename)
+        elif self.locking == 'flock':
+            fd = self._open_fresh(filename, lock=True)
+        else:
+            # Locks cannot outlive _lock_entry(), so copy the entry.
+            fd = None
+            with self._lock_entry(filename, shared=True) as lfd:
+                if (lfd is not None
+                        and os.fstat(lfd.fileno()).st_size > 0
+                        and not self._is_expired(filename)):
+                    lfd.seek(0)
+                    with ExitStack() as stack:
+                        fd = cast(BinaryIO, stack.enter_context(
+                            tempfile.SpooledTemporaryFile(_SPOOL_MAX_SIZE)))
+                        shutil.copyfileobj(lfd, fd)
+                        fd.seek(0)
+                        stack.pop_all()
+
+        if fd is None:
+            raise KeyError(mkey)
+
+        tag = fd.read(1)
+        if tag == RawCodec.tag:
+            return cast(BinaryIO, io.BufferedReader(_EntryStream(fd, 1)))
+        try:
+            return io.BytesIO(decode_bytes(tag + fd.read()))
+        finally:
+            fd.close()
 
     def get_mapped(self, mkey: Any) -> Any:
+        value = self.get_mapped_or(mkey, _MISSING)
+        if value is _MISSING:
+            raise KeyError(mkey)
+        return value
+
+    def get_mapped_or(self, mkey: Any, default: Any) -> Any:
+        return self._get_or(mkey, default, self._load)
+
+    def get_bytes_mapped_or(self, mkey: Any, default: Any) -> Any:
+        return self._get_or(mkey, default, self._load_bytes)
+
+    def _get_or(self, mkey: Any, default: Any,
+                loader: Callable[[BinaryIO], Any]) -> Any:
         filename = self._get_filename(mkey)
 
         if self.locking == 'mkdir':
             with self._lock_entry_mkdir(filename):
                 fresh_filename = self._get_fresh_filename(filename)
                 if not fresh_filename:
-                    raise KeyError(mkey)
+                    return default
                 with open(fresh_filename, 'rb') as fd:
-                    return self._load(fd)
+                    return loader(fd)
 
         if self.locking is None:
             fresh_filename = self._get_fresh_filename(filename)
             if not fresh_filename:
-                raise KeyError(mkey)
+                return default
             with open(fresh_filename, 'rb') as fd:
-                return self._load(fd)
+                return loader(fd)
 
         with self._lock_entry(filename, shared=True) as fd:
             if fd is None:
-                raise KeyError(mkey)
+                return default
+            # Entry files are empty until first written, and files
+            # replaced by writers while we waited for the lock are left
+            # empty as well.
+            if os.fstat(fd.fileno()).st_size == 0:
+                return default
             expired = self._is_expired(filename)
             if not expired:
                 fd.seek(0)
-                return self._load(fd)
+                return loader(fd)
 
         with self._lock_entry(filename, shared=False) as wfd:
             if wfd is not None and self._is_expired(filename):
                 filename.unlink(missing_ok=True)
-        raise KeyError(mkey)
+        return default
 
     def remove_mapped(self, mkey: Any) -> None:
         filename = self._get_filename(mkey)
@@ -438,6 +643,34 @@ class FileAdapter:
                 raise KeyError(mkey)
             filename.unlink(missing_ok=True)
 
+    def touch_mapped(self, mkey: Any, max_age: float | None = None) -> None:
+        filename = self._get_filename(mkey)
+
+        if self.locking == 'mkdir':
+            with self._lock_entry_mkdir(filename):
+                self._touch_entry(mkey, filename, max_age)
+            return
+
+        if self.locking is None:
+            self._touch_entry(mkey, filename, max_age)
+            return
+
+        with self._lock_entry(filename, shared=False) as fd:
+            if fd is None:
+                raise KeyError(mkey)
+            self._touch_entry(mkey, filename, max_age)
+
+    def _touch_entry(self, mkey: Any, filename: Path,
+                     max_age: float | None) -> None:
+        # Expiration times are file modification times, so entries are
+        # touched without rewriting their data.
+        try:
+            if self._get_fresh_filename(filename) is None:
+                raise KeyError(mkey)
+            self._set_max_age(filename, max_age)
+        except FileNotFoundError as ex:
+            raise KeyError(mkey) from ex
+
     def flush(self) -> None:
         if not self._cache_root.exists():
             return
@@ -492,8 +725,21 @@ class FileAdapter:
 
     def put_many_mapped(self,
                         data: Mapping[Any, Any] | Iterable[tuple[Any, Any]],
-                        max_age: float | None = None) -> None:
-        raise NotImplementedError
+                        max_age: float | None = None,
+                        jitter: Callable[[float], float] | None = None
+                        ) -> None:
+        if isinstance(data, Mapping):
+            data = data.items()
+        items = list(data)
+        encoded: list[Any]
+        if self.oob_threshold is None:
+            encoded = encode_many(self.codec, (value for _, value in items))
+        else:
+            encoded = [self._encode(value) for _, value in items]
+        for (mkey, _), edata in zip(items, encoded):
+            self._put_data(mkey, edata,
+                           (max_age if max_age is None or jitter is None
+                            else jitter(max_age)))
 
     def get_many_mapped(self, keys: Iterable[Any],
                         default: Any = ...) -> list[tuple[Any, Any]]:
@@ -532,7 +778,8 @@ class FileAdapter:
 
     def shutdown(self) -> None:
         """Shutdown the cache backend."""
-        return None
+        if isinstance(self.codec, CompressedCodec):
+            self.codec.shutdown()
 
 
 Adapter = FileAdapter
@@ -0,0 +1,90 @@
+import threading
+from collections.abc import Callable, Hashable
+from typing import Any
+
+
+class _Call:
+
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """De-duplicate concurrent calls by key.
+
+    While a call for a key is in flight, other callers asking for the same
+    key wait for its result instead of running their own function.
+
+    Args:
+        timeout: Maximum time in seconds callers wait for an in-flight
+            call. When the timeout expires, the caller runs its own
+            function. If ``None``, callers wait indefinitely.
+
+    Raises:
+        ValueError: If ``timeout`` is negative.
+
+    >>> flight = SingleFlight()
+    >>> flight.do('foo', lambda: 'bar')
+    'bar'
+
+    """
+
+    def __init__(self, timeout: float | None = None) -> None:
+        if timeout is not None and timeout < 0:
+            raise ValueError('timeout must be greater or equal to zero, '
+                             f'got {timeout}')
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Call a function, sharing its result with concurrent callers.
+
+        Args:
+            key: Call key.
+            func: Function called if no call for ``key`` is in flight.
+
+        Returns:
+            The value returned by ``func``, or by the in-flight call for
+            ``key``.
+
+        Raises:
+            BaseException: Any exception raised by ``func`` is raised for
+                the caller that ran it and all the callers waiting for it.
+
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        assert call is not None
+
+        if not leader:
+            if not call.done.wait(self.timeout):
+                return func()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = func()
+        except BaseException as ex:
+            call.error = ex
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.value
+
+    @property
+    def in_flight(self) -> int:
+        """Return the number of calls in flight."""
+        return len(self._calls)
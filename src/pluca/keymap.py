@@ -0,0 +1,126 @@
+import hashlib
+from collections.abc import Callable
+from functools import lru_cache, partial
+from typing import Any, cast
+
+_MEMO_TYPES = frozenset((str, bytes, int))
+
+_BLAKE2_ALGORITHMS = ('blake2b', 'blake2s')
+
+
+def encode_key(key: Any) -> bytes:
+    """Encode a cache key into bytes suitable for hashing.
+
+    ``str``, ``bytes``, ``int`` and ``tuple`` keys take fast paths that
+    avoid ``repr()`` of the key type. Any other key is encoded from the
+    ``repr()`` of ``(type(key), key)``. Each encoding is tagged, so keys of
+    different types never share an encoding.
+
+    Args:
+        key: Cache key.
+
+    Returns:
+        The encoded key.
+
+    >>> encode_key('foo')
+    b'sfoo'
+    >>> encode_key(255)
+    b'iff'
+    >>> encode_key(('foo', 1))
+    b"t('foo', 1)"
+
+    """
+    key_type = type(key)
+    if key_type is str:
+        return b's' + cast(str, key).encode('utf-8', 'surrogatepass')
+    if key_type is bytes:
+        return b'b' + cast(bytes, key)
+    if key_type is int:
+        return b'i' + f'{key:x}'.encode('ascii')
+    if key_type is tuple:
+        return b't' + repr(key).encode('utf-8', 'surrogatepass')
+    return b'r' + repr((key_type, key)).encode('utf-8', 'surrogatepass')
+
+
+def _make_hasher(digest: str,
+                 digest_size: int | None) -> Callable[[bytes], Any]:
+    hasher: Callable[[bytes], Any]
+    if digest_size is not None:
+        if digest not in _BLAKE2_ALGORITHMS:
+            raise ValueError('digest_size is only supported by '
+                             f'{" and ".join(_BLAKE2_ALGORITHMS)}')
+        hasher = partial(getattr(hashlib, digest), digest_size=digest_size)
+    elif digest in hashlib.algorithms_guaranteed:
+        hasher = getattr(hashlib, digest)
+    else:
+        hasher = partial(hashlib.new, digest)
+
+    # Fail early on unknown algorithms and invalid digest sizes.
+    if not hasher(b'').digest_size:
+        raise ValueError(f'{digest} produces variable-length digests')
+
+    return hasher
+
+
+class KeyMapper:
+    """Map cache keys to fixed-size digests.
+
+    Args:
+        digest: Name of a ``hashlib`` algorithm used to hash encoded keys.
+        digest_size: Digest size in bytes. Only supported by the
+            ``blake2b`` and ``blake2s`` algorithms.
+        memo: Maximum number of recently mapped ``str``, ``bytes`` and
+            ``int`` keys to remember. ``None`` or ``0`` disables the memo.
+        binary: Map keys to raw digest bytes instead of hexadecimal
+            strings. Only adapters that declare the
+            ``Capability.BINARY_KEYS`` capability accept binary keys.
+
+    Raises:
+        ValueError: If the digest algorithm is unknown or produces
+            variable-length digests (such as ``shake_128``), or if
+            ``digest_size`` is used with an algorithm that does not support
+            it.
+
+    >>> KeyMapper().map_key('foo')
+    '8b7fcf2f1aaaaa4c0edef5f8f9a003158a47a326'
+    >>> KeyMapper(digest='blake2b', digest_size=8).map_key('foo')
+    'e193695cc945854f'
+    >>> len(KeyMapper(digest='blake2b', digest_size=8,
+    ...               binary=True).map_key('foo'))
+    8
+
+    """
+
+    def __init__(self,
+                 digest: str = 'sha1',
+                 digest_size: int | None = None,
+                 memo: int | None = None,
+                 binary: bool = False) -> None:
+        hasher = _make_hasher(digest, digest_size)
+
+        if memo is not None and memo < 0:
+            raise ValueError('memo must be greater or equal to zero')
+
+        self.digest = digest
+        self.digest_size = digest_size
+        self.memo = memo
+        self.binary = binary
+
+        if binary:
+            def map_key(key: Any) -> Any:
+                return hasher(encode_key(key)).digest()
+        else:
+            def map_key(key: Any) -> Any:
+                return hasher(encode_key(key)).hexdigest()
+
+        self.map_key: Callable[[Any], Any] = map_key
+
+        if memo:
+            memoized = lru_cache(maxsize=memo, typed=True)(map_key)
+
+            def map_key_memo(key: Any) -> Any:
+                if type(key) in _MEMO_TYPES:
+                    return memoized(key)
+                return map_key(key)
+
+            self.map_key = map_key_memo
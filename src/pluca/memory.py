@@ -1,14 +1,21 @@
-from collections.abc import Iterable, Mapping
-import pickle
+from collections.abc import Callable, Iterable, Mapping
+import heapq
 import sys
 import time
 from typing import Any, NamedTuple
 
+from pluca.adapter import Capability
+from pluca.codec import (Codec, LazyValue, RawCodec, decode, decode_bytes,
+                         get_codec)
+
+_MISSING = object()
+
 
 class _Entry(NamedTuple):
     data: Any
     expire: float | None
     index_: int
+    cost: float = 0.0
 
     @property
     def is_fresh(self) -> bool:
@@ -16,30 +23,92 @@ class _Entry(NamedTuple):
 
 
 class MemoryAdapter:
-    """Memory cache adapter for pluca."""
+    """Memory cache adapter for pluca.
+
+    Args:
+        max_entries: Maximum number of entries. If ``None``, the number of
+            entries is unlimited.
+        prune: Number of entries removed when ``max_entries`` is exceeded.
+        binary_keys: Keep keys as raw digest bytes instead of hexadecimal
+            strings, which uses less memory.
+        codec: Codec name or object used to serialize values.
+        eviction: Policy used to choose the entries removed when
+            ``max_entries`` is exceeded. ``'expire'`` removes the entries
+            that expire first, then the oldest ones. ``'cost'`` removes
+            the entries that save the least computation time per byte
+            (GreedyDual-Size), using the compute times recorded by
+            ``Cache.get_put()`` and the decorator. Entries stored without
+            a compute time, such as those stored with ``Cache.put()``, are
+            removed first.
+
+    """
+
+    capabilities = (Capability.HAS
+                    | Capability.PUT_MANY
+                    | Capability.GET_MANY
+                    | Capability.REMOVE_MANY
+                    | Capability.GET_OR
+                    | Capability.BYTES
+                    | Capability.GET_MANY_LAZY
+                    | Capability.NON_BLOCKING
+                    | Capability.JITTER
+                    | Capability.COST
+                    | Capability.TOUCH)
 
     def __init__(self,
                  max_entries: int | None = None,
-                 prune: int | None = None) -> None:
+                 prune: int | None = None,
+                 binary_keys: bool = False,
+                 codec: str | Codec = 'pickle',
+                 eviction: str = 'expire') -> None:
         if (max_entries is not None
                 and prune is not None
                 and (prune < 1 or prune > max_entries)):
             raise ValueError('prune must be greater than 0 '
                              'and less than max_entries')
+        if eviction not in ('expire', 'cost'):
+            raise ValueError("eviction must be 'expire' or 'cost', "
+                             f'got {eviction!r}')
         self.prune = prune
         self.max_entries = max_entries
+        self.eviction = eviction
         self._storage: dict[Any, _Entry] = {}
         self._count = 0
+        # GreedyDual-Size state: the priority of each entry, and the
+        # priority of the last evicted entry, which ages all the others.
+        self._credits: dict[Any, float] | None = (
+            {} if eviction == 'cost' else None)
+        self._inflation = 0.0
+
+        if binary_keys:
+            self.capabilities = (MemoryAdapter.capabilities
+                                 | Capability.BINARY_KEYS)
+        self.binary_keys = binary_keys
+        self.codec = get_codec(codec)
 
     def put_mapped(self, mkey: Any, value: Any,
-                   max_age: float | None = None) -> None:
+                   max_age: float | None = None,
+                   cost: float | None = None) -> None:
+        self._put_data(mkey, self.codec.encode(value), max_age, cost)
+
+    def put_bytes_mapped(self, mkey: Any, data: Any,
+                         max_age: float | None = None) -> None:
+        self._put_data(mkey, RawCodec.tag + data, max_age)
+
+    def _put_data(self, mkey: Any, data: bytes,
+                  max_age: float | None,
+                  cost: float | None = None) -> None:
         expire = None if max_age is None else time.time() + max_age
         if mkey not in self._storage:
             self._count += 1
+        density = 0.0 if cost is None else cost / max(len(data), 1)
         self._storage[mkey] = _Entry(
-            data=pickle.dumps(value),
+            data=data,
             expire=expire,
-            index_=self._count)
+            index_=self._count,
+            cost=density)
+        if self._credits is not None:
+            self._credits[mkey] = self._inflation + density
         if (self.max_entries is not None
                 and self._count > self.max_entries):
             self.gc()
@@ -47,6 +116,10 @@ class MemoryAdapter:
     def _prune(self) -> None:
         assert self.max_entries is not None
 
+        if self._credits is not None:
+            self._prune_cost()
+            return
+
         items = sorted(self._storage.items(),
                        key=lambda x: (x[1].expire or sys.float_info.max,
                                       x[1].index_),
@@ -62,49 +135,114 @@ class MemoryAdapter:
             if self._count > max_entries:
                 break
 
+    def _prune_cost(self) -> None:
+        assert self.max_entries is not None
+        assert self._credits is not None
+
+        entry_credits = self._credits
+        storage = self._storage
+        keep = self.max_entries - (self.prune or 1) + 1
+        victims = heapq.nsmallest(
+            self._count - keep, storage,
+            key=lambda mkey: (entry_credits[mkey], storage[mkey].index_))
+        for mkey in victims:
+            self._inflation = max(self._inflation, entry_credits.pop(mkey))
+            del storage[mkey]
+        self._count = len(storage)
+
     def get_mapped(self, mkey: Any) -> Any:
-        entry = self._storage[mkey]
+        value = self.get_mapped_or(mkey, _MISSING)
+        if value is _MISSING:
+            raise KeyError(mkey)
+        return value
+
+    def get_mapped_or(self, mkey: Any, default: Any) -> Any:
+        data = self._get_data_or(mkey, _MISSING)
+        return default if data is _MISSING else decode(data)
+
+    def get_bytes_mapped_or(self, mkey: Any, default: Any) -> Any:
+        data = self._get_data_or(mkey, _MISSING)
+        return default if data is _MISSING else decode_bytes(data)
+
+    def _get_data_or(self, mkey: Any, default: Any) -> Any:
+        entry = self._storage.get(mkey)
+        if entry is None:
+            return default
         if not entry.is_fresh:
             del self._storage[mkey]
             self._count -= 1
-            raise KeyError(mkey)
-        return pickle.loads(entry.data)
+            if self._credits is not None:
+                del self._credits[mkey]
+            return default
+        if self._credits is not None:
+            self._credits[mkey] = self._inflation + entry.cost
+        return entry.data
 
     def remove_mapped(self, mkey: Any) -> None:
         entry = self._storage[mkey]
         del self._storage[mkey]
         self._count -= 1
+        if self._credits is not None:
+            del self._credits[mkey]
         if not entry.is_fresh:
             raise KeyError(mkey)
 
+    def touch_mapped(self, mkey: Any, max_age: float | None = None) -> None:
+        if self._get_data_or(mkey, _MISSING) is _MISSING:
+            raise KeyError(mkey)
+        expire = None if max_age is None else time.time() + max_age
+        self._storage[mkey] = self._storage[mkey]._replace(expire=expire)
+
     def flush(self) -> None:
         self._storage = {}
         self._count = 0
+        if self._credits is not None:
+            self._credits = {}
+            self._inflation = 0.0
 
     def has_mapped(self, mkey: Any) -> bool:
         return mkey in self._storage
 
     def put_many_mapped(self,
                         data: Mapping[Any, Any] | Iterable[tuple[Any, Any]],
-                        max_age: float | None = None) -> None:
+                        max_age: float | None = None,
+                        jitter: Callable[[float], float] | None = None
+                        ) -> None:
         if isinstance(data, Mapping):
             data = data.items()
-        for mkey, value in data:
-            self.put_mapped(mkey, value, max_age)
+        if max_age is None or jitter is None:
+            for mkey, value in data:
+                self.put_mapped(mkey, value, max_age)
+        else:
+            for mkey, value in data:
+                self.put_mapped(mkey, value, jitter(max_age))
 
     def get_many_mapped(self, keys: Iterable[Any],
                         default: Any = ...) -> list[tuple[Any, Any]]:
         data = []
         for mkey in keys:
-            try:
-                value = self.get_mapped(mkey)
-            except KeyError:
+            value = self.get_mapped_or(mkey, _MISSING)
+            if value is _MISSING:
                 if default is Ellipsis:
                     continue
                 value = default
             data.append((mkey, value))
         return data
 
+    def get_many_lazy_mapped(
+            self, keys: Iterable[Any],
+            default: Any = ...) -> list[tuple[Any, LazyValue]]:
+        data = []
+        for mkey in keys:
+            value = self._get_data_or(mkey, _MISSING)
+            if value is _MISSING:
+                if default is Ellipsis:
+                    continue
+                data.append((mkey, default))
+            else:
+                data.append((mkey, LazyValue(decode, value)))
+        return data
+
     def remove_many_mapped(self, keys: Iterable[Any]) -> None:
         for mkey in keys:
             try:
@@ -116,6 +254,8 @@ class MemoryAdapter:
         """Delete expired entries and enforce entry limits."""
         self._storage = {k: e for k, e in self._storage.items() if e.is_fresh}
         self._count = len(self._storage)
+        if self._credits is not None:
+            self._credits = {k: self._credits[k] for k in self._storage}
         if (self.max_entries is not None
                 and self._count > self.max_entries):
             self._prune()
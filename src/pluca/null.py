@@ -1,10 +1,22 @@
-from collections.abc import Iterable, Mapping
+from collections.abc import Callable, Iterable, Mapping
 from typing import Any
 
+from pluca.adapter import Capability
+
 
 class NullAdapter:
     """Null cache adapter for pluca."""
 
+    capabilities = (Capability.HAS
+                    | Capability.PUT_MANY
+                    | Capability.GET_MANY
+                    | Capability.REMOVE_MANY
+                    | Capability.GET_OR
+                    | Capability.BINARY_KEYS
+                    | Capability.NON_BLOCKING
+                    | Capability.JITTER
+                    | Capability.TOUCH)
+
     def put_mapped(self, mkey: Any, value: Any,
                    max_age: float | None = None) -> None:
         _ = (mkey, value, max_age)
@@ -12,9 +24,16 @@ class NullAdapter:
     def get_mapped(self, mkey: Any) -> Any:
         raise KeyError(mkey)
 
+    def get_mapped_or(self, mkey: Any, default: Any) -> Any:
+        _ = mkey
+        return default
+
     def remove_mapped(self, mkey: Any) -> None:
         raise KeyError(mkey)
 
+    def touch_mapped(self, mkey: Any, max_age: float | None = None) -> None:
+        raise KeyError(mkey)
+
     def flush(self) -> None:
         pass
 
@@ -24,8 +43,10 @@ class NullAdapter:
 
     def put_many_mapped(self,
                         data: Mapping[Any, Any] | Iterable[tuple[Any, Any]],
-                        max_age: float | None = None) -> None:
-        _ = (data, max_age)
+                        max_age: float | None = None,
+                        jitter: Callable[[float], float] | None = None
+                        ) -> None:
+        _ = (data, max_age, jitter)
 
     def get_many_mapped(self, keys: Iterable[Any],
                         default: Any = ...) -> list[tuple[Any, Any]]:
@@ -1,9 +1,23 @@
-import pickle
+from contextlib import contextmanager
+import io
 import re
 import sqlite3
+import tempfile
 import time
-from collections.abc import Iterable, Mapping
-from typing import Any
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from typing import Any, BinaryIO, cast
+
+from pluca.adapter import Capability
+from pluca.codec import (Codec, CompressedCodec, LazyValue, RawCodec,
+                         decode, decode_bytes, encode_many, get_codec)
+
+_MISSING = object()
+
+# Values of streamed entries hold this tag followed by the row ID of the
+# blob table row with the entry data.
+_STREAM_TAG = b'S'
+
+_STREAM_CHUNK_SIZE = 1024 * 1024
 
 _VALID_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
 
@@ -15,20 +29,59 @@ def _validate_identifier(name: str, kind: str) -> str:
 
 
 class SQLite3Adapter:
-    """SQLite3 cache adapter for pluca."""
+    """SQLite3 cache adapter for pluca.
+
+    Args:
+        filename: Database file name, or ``':memory:'``.
+        pragma: PRAGMA directives to run on the database connection.
+        binary_keys: Store keys as raw digest ``BLOB`` values instead of
+            hexadecimal strings. Call ``migrate_keys()`` to convert the
+            keys of an existing database after changing this option.
+        codec: Codec name or object used to serialize values.
+        compression: Compress encoded values with ``'zlib'``, ``'lzma'``
+            or ``'bz2'``. ``None`` disables compression.
+        compress_threshold: Minimum encoded size, in bytes, of compressed
+            values.
+        compress_workers: Number of threads used to compress values in
+            ``put_many()`` batches. ``None`` compresses in the calling
+            thread.
+        **kwargs: Named arguments passed to ``sqlite3.connect()``.
+
+    """
+
+    capabilities = (Capability.HAS
+                    | Capability.PUT_MANY
+                    | Capability.GET_MANY
+                    | Capability.REMOVE_MANY
+                    | Capability.GET_OR
+                    | Capability.BYTES
+                    | Capability.BYTES_MANY
+                    | Capability.STREAMS
+                    | Capability.GET_MANY_LAZY
+                    | Capability.JITTER
+                    | Capability.TRANSACTION
+                    | Capability.TOUCH)
 
     def __init__(self,
                  filename: str,
                  pragma: Mapping[str, str | float | bool] | None = None,
+                 binary_keys: bool = False,
+                 codec: str | Codec = 'pickle',
+                 compression: str | None = None,
+                 compress_threshold: int = 1024,
+                 compress_workers: int | None = None,
                  **kwargs: Any) -> None:
         self._conn = sqlite3.connect(filename, **kwargs)
+        self._in_batch = False
         self._table = 'cache'
         self._k_col = 'k'
         self._v_col = 'v'
         self._exp_col = 'expires'
+        self._blob_table = f'{self._table}_blob'
         self._ph = '?'
 
         _validate_identifier(self._table, 'table')
+        _validate_identifier(self._blob_table, 'table')
         _validate_identifier(self._k_col, 'column')
         _validate_identifier(self._v_col, 'column')
         _validate_identifier(self._exp_col, 'column')
@@ -39,20 +92,87 @@ class SQLite3Adapter:
                 self._conn.execute(f'PRAGMA {name} = {value!r}')
 
         self._conn.execute(f'CREATE TABLE IF NOT EXISTS {self._table} ('
-                           f'{self._k_col} VARCHAR PRIMARY KEY, '
+                           f'{self._k_col} '
+                           f'{"BLOB" if binary_keys else "VARCHAR"} '
+                           'PRIMARY KEY, '
                            f'{self._v_col} BLOB NOT NULL, '
                            f'{self._exp_col} FLOAT) '
                            'WITHOUT ROWID')
 
+        # Streamed entries are stored in a rowid table, which supports
+        # incremental blob I/O. Triggers delete blobs of streamed entries
+        # when they are removed or overwritten.
+        stream_row = f'CAST(substr(OLD.{self._v_col}, 2) AS INTEGER)'
+        is_stream = (f'substr(OLD.{self._v_col}, 1, 1) '
+                     f'= X\'{_STREAM_TAG.hex()}\'')
+        self._conn.execute(f'CREATE TABLE IF NOT EXISTS {self._blob_table} ('
+                           'id INTEGER PRIMARY KEY, '
+                           'data BLOB NOT NULL)')
+        self._conn.execute('CREATE TRIGGER IF NOT EXISTS '
+                           f'{self._blob_table}_delete '
+                           f'AFTER DELETE ON {self._table} '
+                           f'WHEN {is_stream} BEGIN '
+                           f'DELETE FROM {self._blob_table} '
+                           f'WHERE id = {stream_row}; END')
+        self._conn.execute('CREATE TRIGGER IF NOT EXISTS '
+                           f'{self._blob_table}_update '
+                           f'AFTER UPDATE OF {self._v_col} ON {self._table} '
+                           f'WHEN {is_stream} '
+                           f'AND OLD.{self._v_col} IS NOT NEW.{self._v_col} '
+                           f'BEGIN DELETE FROM {self._blob_table} '
+                           f'WHERE id = {stream_row}; END')
+        self._commit()
+
+        if binary_keys:
+            self.capabilities = (SQLite3Adapter.capabilities
+                                 | Capability.BINARY_KEYS)
+
         self.filename = filename
+        self.binary_keys = binary_keys
+        self.codec = get_codec(codec)
+        if compression is not None:
+            self.codec = CompressedCodec(self.codec, compression,
+                                         threshold=compress_threshold,
+                                         workers=compress_workers)
 
     def _commit(self) -> None:
-        if self._conn.in_transaction:
+        if self._conn.in_transaction and not self._in_batch:
             self._conn.commit()
 
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Run writes in a single transaction.
+
+        Writes done in the context are committed once when it exits, or
+        rolled back if it exits with an exception. Transactions do not
+        nest.
+
+        """
+        if self._in_batch:
+            raise RuntimeError('A transaction is already running')
+        if not self._conn.in_transaction:
+            self._conn.execute('BEGIN')
+        self._in_batch = True
+        try:
+            yield
+        except BaseException:
+            self._in_batch = False
+            if self._conn.in_transaction:
+                self._conn.rollback()
+            raise
+        self._in_batch = False
+        self._commit()
+
     def put_mapped(self, mkey: Any, value: Any,
                    max_age: float | None = None) -> None:
-        svalue = pickle.dumps(value)
+        self._put_data(mkey, self.codec.encode(value), max_age)
+
+    def put_bytes_mapped(self, mkey: Any, data: Any,
+                         max_age: float | None = None) -> None:
+        self._put_data(mkey, RawCodec.tag + data, max_age)
+
+    def _put_data(self, mkey: Any, svalue: bytes,
+                  max_age: float | None) -> None:
         expires = None if max_age is None else time.time() + max_age
 
         cur = self._conn.cursor()
@@ -68,15 +188,36 @@ class SQLite3Adapter:
 
     def put_many_mapped(self,
                         data: Mapping[Any, Any] | Iterable[tuple[Any, Any]],
-                        max_age: float | None = None) -> None:
+                        max_age: float | None = None,
+                        jitter: Callable[[float], float] | None = None
+                        ) -> None:
         if isinstance(data, Mapping):
             data = data.items()
-
-        expires = None if max_age is None else time.time() + max_age
-        values = []
-        for mkey, value in data:
-            svalue = pickle.dumps(value)
-            values.append((mkey, svalue, expires, svalue, expires))
+        items = list(data)
+        svalues = encode_many(self.codec, (value for _, value in items))
+        self._put_many_data(zip((mkey for mkey, _ in items), svalues),
+                            max_age, jitter)
+
+    def put_many_bytes_mapped(self, data: Iterable[tuple[Any, Any]],
+                              max_age: float | None = None) -> None:
+        self._put_many_data(((mkey, RawCodec.tag + value)
+                             for mkey, value in data),
+                            max_age)
+
+    def _put_many_data(self, data: Iterable[tuple[Any, bytes]],
+                       max_age: float | None,
+                       jitter: Callable[[float], float] | None = None
+                       ) -> None:
+        if max_age is None or jitter is None:
+            expires = None if max_age is None else time.time() + max_age
+            values = [(mkey, svalue, expires, svalue, expires)
+                      for mkey, svalue in data]
+        else:
+            now = time.time()
+            values = []
+            for mkey, svalue in data:
+                expires = now + jitter(max_age)
+                values.append((mkey, svalue, expires, svalue, expires))
 
         if not values:
             return
@@ -105,6 +246,19 @@ class SQLite3Adapter:
         self._commit()
 
     def get_mapped(self, mkey: Any) -> Any:
+        value = self.get_mapped_or(mkey, _MISSING)
+        if value is _MISSING:
+            raise KeyError(mkey)
+        return value
+
+    def get_mapped_or(self, mkey: Any, default: Any) -> Any:
+        return self._get_or(mkey, default, decode)
+
+    def get_bytes_mapped_or(self, mkey: Any, default: Any) -> Any:
+        return self._get_or(mkey, default, decode_bytes)
+
+    def _get_or(self, mkey: Any, default: Any,
+                decoder: Callable[[bytes], Any]) -> Any:
         cur = self._conn.cursor()
         cur.execute(f'SELECT {self._v_col}, {self._exp_col} '
                     f'FROM {self._table} '
@@ -115,11 +269,43 @@ class SQLite3Adapter:
         row = cur.fetchone()
         cur.close()
         if not row:
-            raise KeyError(mkey)
-        return pickle.loads(row[0])
+            return default
+        return self._decode(row[0], decoder)
+
+    def _decode(self, svalue: bytes, decoder: Callable[[bytes], Any]) -> Any:
+        if svalue[0] == _STREAM_TAG[0]:
+            cur = self._conn.execute(f'SELECT data FROM {self._blob_table} '
+                                     f'WHERE id = {self._ph}',
+                                     (int(svalue[1:]),))
+            data = cur.fetchone()[0]
+            cur.close()
+            return data
+        return decoder(svalue)
+
+    def _load(self, svalue: bytes) -> Any:
+        return self._decode(svalue, decode)
+
+    def _load_bytes(self, svalue: bytes) -> Any:
+        return self._decode(svalue, decode_bytes)
+
+    def _load_lazy(self, svalue: bytes) -> LazyValue:
+        return LazyValue(self._load, svalue)
 
     def get_many_mapped(self, keys: Iterable[Any],
                         default: Any = ...) -> list[tuple[Any, Any]]:
+        return self._get_many(keys, default, self._load)
+
+    def get_many_bytes_mapped(self, keys: Iterable[Any],
+                              default: Any = ...) -> list[tuple[Any, Any]]:
+        return self._get_many(keys, default, self._load_bytes)
+
+    def get_many_lazy_mapped(
+            self, keys: Iterable[Any],
+            default: Any = ...) -> list[tuple[Any, LazyValue]]:
+        return self._get_many(keys, default, self._load_lazy)
+
+    def _get_many(self, keys: Iterable[Any], default: Any,
+                  loader: Callable[[bytes], Any]) -> list[tuple[Any, Any]]:
         all_mkeys = list(dict.fromkeys(keys))
         if not all_mkeys:
             return []
@@ -139,7 +325,7 @@ class SQLite3Adapter:
                     tuple(args))
 
         for row in cur.fetchall():
-            values_by_key[row[0]] = pickle.loads(row[1])
+            values_by_key[row[0]] = loader(row[1])
 
         cur.close()
 
@@ -154,6 +340,80 @@ class SQLite3Adapter:
                 result.append((key, values_by_key[key]))
         return result
 
+    def put_stream_mapped(self, mkey: Any, fileobj: BinaryIO,
+                          max_age: float | None = None) -> None:
+        try:
+            start = fileobj.tell()
+            size = fileobj.seek(0, io.SEEK_END) - start
+            fileobj.seek(start)
+        except (AttributeError, OSError):
+            # The blob size must be known in advance, so spool
+            # non-seekable streams first.
+            with tempfile.SpooledTemporaryFile(_STREAM_CHUNK_SIZE) as spool:
+                while chunk := fileobj.read(_STREAM_CHUNK_SIZE):
+                    spool.write(chunk)
+                spool.seek(0)
+                self.put_stream_mapped(mkey, cast(BinaryIO, spool), max_age)
+            return
+
+        expires = None if max_age is None else time.time() + max_age
+
+        started_transaction = False
+        if not self._conn.in_transaction:
+            self._conn.execute('BEGIN')
+            started_transaction = True
+
+        cur = self._conn.cursor()
+        try:
+            cur.execute(f'INSERT INTO {self._blob_table} (data) '
+                        f'VALUES (zeroblob({self._ph}))',
+                        (size,))
+            rowid = cur.lastrowid
+            assert rowid is not None
+            with self._conn.blobopen(self._blob_table, 'data',
+                                     rowid) as blob:
+                while size > 0:
+                    chunk = fileobj.read(min(size, _STREAM_CHUNK_SIZE))
+                    if not chunk:
+                        raise ValueError('Stream ended before its '
+                                         'expected size')
+                    blob.write(chunk)
+                    size -= len(chunk)
+            svalue = _STREAM_TAG + str(rowid).encode('ascii')
+            cur.execute(f'INSERT INTO {self._table} '
+                        f'({self._k_col}, {self._v_col}, {self._exp_col}) '
+                        f'VALUES ({self._ph}, {self._ph}, {self._ph}) '
+                        f'ON CONFLICT({self._k_col}) DO UPDATE SET '
+                        f'{self._v_col} = {self._ph}, '
+                        f'{self._exp_col} = {self._ph}',
+                        (mkey, svalue, expires, svalue, expires))
+        except BaseException:
+            if started_transaction and self._conn.in_transaction:
+                self._conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+        self._commit()
+
+    def open_stream_mapped(self, mkey: Any) -> BinaryIO:
+        cur = self._conn.cursor()
+        cur.execute(f'SELECT {self._v_col} '
+                    f'FROM {self._table} '
+                    f'WHERE {self._k_col} = {self._ph} '
+                    f'AND ({self._exp_col} IS NULL '
+                    f'OR {self._exp_col} > {self._ph})',
+                    (mkey, time.time()))
+        row = cur.fetchone()
+        cur.close()
+        if not row:
+            raise KeyError(mkey)
+        svalue = row[0]
+        if svalue[0] == _STREAM_TAG[0]:
+            return cast(BinaryIO, self._conn.blobopen(
+                self._blob_table, 'data', int(svalue[1:]), readonly=True))
+        return io.BytesIO(decode_bytes(svalue))
+
     def remove_mapped(self, mkey: Any) -> None:
         cur = self._conn.cursor()
         cur.execute(f'DELETE FROM {self._table} '
@@ -165,6 +425,22 @@ class SQLite3Adapter:
         if rowcount == 0:
             raise KeyError(mkey)
 
+    def touch_mapped(self, mkey: Any, max_age: float | None = None) -> None:
+        now = time.time()
+        expires = None if max_age is None else now + max_age
+        cur = self._conn.cursor()
+        cur.execute(f'UPDATE {self._table} '
+                    f'SET {self._exp_col} = {self._ph} '
+                    f'WHERE {self._k_col} = {self._ph} '
+                    f'AND ({self._exp_col} IS NULL '
+                    f'OR {self._exp_col} > {self._ph})',
+                    (expires, mkey, now))
+        rowcount = cur.rowcount
+        cur.close()
+        self._commit()
+        if rowcount == 0:
+            raise KeyError(mkey)
+
     def remove_many_mapped(self, keys: Iterable[Any]) -> None:
         items = tuple(keys)
         if not items:
@@ -196,12 +472,63 @@ class SQLite3Adapter:
         cur.close()
         return has
 
+    def migrate_keys(self) -> None:
+        """Convert stored keys to the current key storage mode.
+
+        Hexadecimal string keys are converted to binary keys when
+        ``binary_keys`` is enabled, and binary keys are converted back to
+        hexadecimal strings otherwise. Keys that cannot be converted are
+        deleted, because they cannot be reached anymore.
+
+        """
+        if self.binary_keys:
+            def unhex(value: str) -> bytes | str:
+                try:
+                    return bytes.fromhex(value)
+                except ValueError:
+                    return value
+
+            self._conn.create_function('pluca_unhex', 1, unhex,
+                                       deterministic=True)
+            old_type = 'text'
+            convert = f'pluca_unhex({self._k_col})'
+        else:
+            old_type = 'blob'
+            convert = f'lower(hex({self._k_col}))'
+
+        cur = self._conn.cursor()
+        try:
+            if not self._conn.in_transaction:
+                cur.execute('BEGIN')
+            cur.execute(f'UPDATE OR REPLACE {self._table} '
+                        f'SET {self._k_col} = {convert} '
+                        f'WHERE typeof({self._k_col}) = {self._ph}',
+                        (old_type,))
+            cur.execute(f'DELETE FROM {self._table} '
+                        f'WHERE typeof({self._k_col}) = {self._ph}',
+                        (old_type,))
+        except sqlite3.Error:
+            if self._conn.in_transaction:
+                self._conn.rollback()
+            raise
+        finally:
+            cur.close()
+        self._commit()
+
     def gc(self) -> None:
         """Delete expired rows, commit, and optimize the database."""
         cur = self._conn.cursor()
         cur.execute(f'DELETE FROM {self._table} '
                     f'WHERE {self._exp_col} <= {self._ph}',
                     (time.time(),))
+        # Delete blobs left behind by rows that were replaced without
+        # firing triggers (for example, by migrate_keys()).
+        cur.execute(f'DELETE FROM {self._blob_table} '
+                    'WHERE id NOT IN ('
+                    f'SELECT CAST(substr({self._v_col}, 2) AS INTEGER) '
+                    f'FROM {self._table} '
+                    f'WHERE substr({self._v_col}, 1, 1) '
+                    f'= X\'{_STREAM_TAG.hex()}\')')
         cur.close()
         self._commit()
         self._conn.execute('PRAGMA optimize')
@@ -209,6 +536,8 @@ class SQLite3Adapter:
     def shutdown(self) -> None:
         """Close the SQLite connection."""
         self._conn.close()
+        if isinstance(self.codec, CompressedCodec):
+            self.codec.shutdown()
 
 
 Adapter = SQLite3Adapter
@@ -1,4 +1,6 @@
 import abc
+from concurrent.futures import ThreadPoolExecutor
+import io
 import time
 import unittest
 from typing import TYPE_CHECKING
@@ -64,6 +66,24 @@ class AdapterTester(abc.ABC, _BaseClass):
         cache = self.get_cache()
         self.assertIsNone(cache.get('nonexistent', None))
 
+    def test_get_default_is_returned_as_is(self) -> None:
+        cache = self.get_cache()
+        default = object()
+        self.assertIs(cache.get('nonexistent', default), default)
+
+    def test_get_mapped_or(self) -> None:
+        adapter = self.get_adapter()
+        get_mapped_or = getattr(adapter, 'get_mapped_or', None)
+        if get_mapped_or is None:
+            self.skipTest('Adapter does not implement get_mapped_or()')
+
+        default = object()
+        adapter.put_mapped('foo', 'bar')
+        adapter.put_mapped('expired', 'bar', 0)
+        self.assertEqual(get_mapped_or('foo', default), 'bar')
+        self.assertIs(get_mapped_or('nonexistent', default), default)
+        self.assertIs(get_mapped_or('expired', default), default)
+
     def test_put_max_age(self) -> None:
         cache = self.get_cache()
         key = uuid.uuid4()
@@ -202,6 +222,78 @@ class AdapterTester(abc.ABC, _BaseClass):
         self.assertIn('nonexistent', res)
         self.assertIsNone(res['nonexistent'])
 
+    def test_put_get_bytes(self) -> None:
+        cache = self.get_cache()
+        cache.put_bytes('foo', b'bar')
+        cache.put_bytes('zee', memoryview(b'zee'))
+        self.assertEqual(bytes(cache.get_bytes('foo')), b'bar')
+        self.assertEqual(bytes(cache.get_bytes('zee')), b'zee')
+
+    def test_get_bytes_missing(self) -> None:
+        cache = self.get_cache()
+        with self.assertRaises(KeyError):
+            cache.get_bytes('foo')
+        self.assertIsNone(cache.get_bytes('foo', None))
+
+    def test_get_bytes_from_put(self) -> None:
+        cache = self.get_cache()
+        cache.put('foo', b'bar')
+        cache.put('zee', 'zee')
+        self.assertEqual(bytes(cache.get_bytes('foo')), b'bar')
+        with self.assertRaises(TypeError):
+            cache.get_bytes('zee')
+
+    def test_put_get_many_bytes(self) -> None:
+        cache = self.get_cache()
+        cache.put_many_bytes({'foo': b'bar', 'zee': b'zee'})
+        res = {key: bytes(data) for key, data
+               in cache.get_many_bytes(['foo', 'zee', 'nonexistent'])}
+        self.assertEqual(res, {'foo': b'bar', 'zee': b'zee'})
+        res = dict(cache.get_many_bytes(['nonexistent'], None))
+        self.assertEqual(res, {'nonexistent': None})
+
+    def test_put_stream_open_stream(self) -> None:
+        cache = self.get_cache()
+        data = bytes(range(256)) * 100
+        cache.put_stream('foo', io.BytesIO(data))
+        with cache.open_stream('foo') as stream:
+            self.assertEqual(stream.read(10), data[:10])
+            self.assertEqual(stream.read(), data[10:])
+        self.assertEqual(bytes(cache.get_bytes('foo')), data)
+
+    def test_open_stream_missing(self) -> None:
+        cache = self.get_cache()
+        with self.assertRaises(KeyError):
+            cache.open_stream('foo')
+        cache.put_stream('foo', io.BytesIO(b'bar'), max_age=0)
+        with self.assertRaises(KeyError):
+            cache.open_stream('foo')
+
+    def test_open_stream_from_put_bytes(self) -> None:
+        cache = self.get_cache()
+        cache.put_bytes('foo', b'bar')
+        cache.put('zee', b'zee')
+        with cache.open_stream('foo') as stream:
+            self.assertEqual(stream.read(), b'bar')
+        with cache.open_stream('zee') as stream:
+            self.assertEqual(stream.read(), b'zee')
+
+    def test_get_many_lazy(self) -> None:
+        cache = self.get_cache()
+        cache.put_many({'foo': 'bar', 'zee': [1, 2]})
+        res = cache.get_many(['foo', 'zee', 'nonexistent'], lazy=True)
+        self.assertEqual([key for key, _ in res], ['foo', 'zee'])
+        self.assertEqual([handle.value for _, handle in res],
+                         ['bar', [1, 2]])
+
+    def test_get_many_lazy_default(self) -> None:
+        cache = self.get_cache()
+        cache.put('foo', 'bar')
+        res = dict(cache.get_many(['foo', 'nonexistent'], None, lazy=True))
+        self.assertEqual(res['foo'].value, 'bar')
+        self.assertTrue(res['nonexistent'].is_decoded)
+        self.assertIsNone(res['nonexistent'].value)
+
     def test_decorator(self) -> None:
         cache = self.get_cache()
 
@@ -219,6 +311,224 @@ class AdapterTester(abc.ABC, _BaseClass):
 
         self.assertEqual(calls, 2)
 
+    def test_get_put_stale(self) -> None:
+        cache = self.get_cache()
+
+        # With max_age=0, values become stale right after being stored.
+        self.assertEqual(cache.get_put('k', lambda: 1, max_age=0,
+                                       stale_ttl=60), 1)
+        self.assertEqual(cache.get('k'), 1)
+        self.assertEqual(cache.get_many(['k']), [('k', 1)])
+
+        self.assertEqual(cache.get_put('k', lambda: 2, max_age=0,
+                                       stale_ttl=60), 1)
+        for _ in range(100):
+            if cache.get('k') == 2:
+                break
+            time.sleep(0.01)
+        self.assertEqual(cache.get('k'), 2)
+
+    def test_get_put_early_refresh(self) -> None:
+        cache = self.get_cache()
+
+        def compute(value: int) -> int:
+            time.sleep(0.001)
+            return value
+
+        self.assertEqual(cache.get_put('k', lambda: compute(1), max_age=60,
+                                       early_refresh=1.0), 1)
+        self.assertEqual(cache.get_put('k', lambda: compute(2), max_age=60,
+                                       early_refresh=1.0), 1)
+
+        # A huge factor always refreshes early.
+        self.assertEqual(cache.get_put('k', lambda: compute(3), max_age=60,
+                                       early_refresh=1e12), 3)
+        self.assertEqual(cache.get('k'), 3)
+
+    def test_get_put_stale_validate(self) -> None:
+        cache = self.get_cache()
+        with self.assertRaises(ValueError):
+            cache.get_put('k', lambda: 1, stale_ttl=60)
+        with self.assertRaises(ValueError):
+            cache.get_put('k', lambda: 1, max_age=1, stale_ttl=-1)
+        with self.assertRaises(ValueError):
+            cache.get_put('k', lambda: 1, early_refresh=1.0)
+
+    def test_put_many_jitter(self) -> None:
+        cache = pluca.Cache(self.get_adapter(), jitter='50%')
+        data = {f'key{i}': i for i in range(10)}
+        cache.put_many(data, max_age=60)
+        cache.put('foo', 'bar', max_age=60)
+        self.assertEqual(dict(cache.get_many(data)), data)
+        self.assertEqual(cache.get('foo'), 'bar')
+
+    def test_jitter_validate(self) -> None:
+        for jitter in (-1, '-10%', '200%', '10'):
+            with self.subTest(jitter=jitter):
+                with self.assertRaises(ValueError):
+                    pluca.Cache(self.get_adapter(), jitter=jitter)
+
+    def test_batched(self) -> None:
+        cache = self.get_cache()
+
+        calls = []
+
+        @cache.batched
+        def func(items: list[int], factor: int = 1) -> dict[int, int]:
+            calls.append(items)
+            return {item: item * factor for item in items if item != 0}
+
+        self.assertEqual(func([1, 2, 0]), {1: 1, 2: 2})
+        self.assertEqual(func([3, 2, 1, 3]), {3: 3, 2: 2, 1: 1})
+        self.assertEqual(list(func([2, 3, 1])), [2, 3, 1])
+        self.assertEqual(func([1, 2], factor=10), {1: 10, 2: 20})
+        self.assertEqual(func([]), {})
+
+        self.assertEqual(calls, [[1, 2, 0], [3], [1, 2]])
+
+    def test_map(self) -> None:
+        cache = self.get_cache()
+
+        calls = []
+
+        def func(item: int) -> int:
+            calls.append(item)
+            return item * 2
+
+        self.assertEqual(list(cache.map(func, [1, 2, 1])), [2, 4, 2])
+        self.assertEqual(list(cache.map(func, [3, 2, 1], batch_size=1)),
+                         [6, 4, 2])
+        self.assertEqual(cache(func)(3), 6)
+        with ThreadPoolExecutor(2) as executor:
+            self.assertEqual(list(cache.map(func, range(6),
+                                            executor=executor)),
+                             [0, 2, 4, 6, 8, 10])
+        self.assertEqual(sorted(calls), [0, 1, 2, 3, 4, 5])
+
+        with self.assertRaises(ValueError):
+            cache.map(func, [1], max_age=-1)
+        with self.assertRaises(ValueError):
+            cache.map(func, [1], batch_size=0)
+
+    def test_get_put_many(self) -> None:
+        cache = self.get_cache()
+        cache.put('key1', 1)
+
+        calls = []
+
+        def loader(keys: list[str]) -> dict[str, int]:
+            calls.append(keys)
+            return {key: int(key[3:]) for key in keys if key != 'key0'}
+
+        self.assertEqual(cache.get_put_many(['key1', 'key2', 'key0'], loader),
+                         [('key1', 1), ('key2', 2)])
+        self.assertEqual(cache.get_put_many(['key2', 'key3', 'key1'], loader),
+                         [('key2', 2), ('key3', 3), ('key1', 1)])
+        self.assertEqual(cache.get_put_many(['key3'], loader), [('key3', 3)])
+        self.assertEqual(calls, [['key2', 'key0'], ['key3']])
+
+        with self.assertRaises(ValueError):
+            cache.get_put_many(['key4'], loader, max_age=-1)
+
+    def test_batch(self) -> None:
+        cache = self.get_cache()
+        cache.put_many({'foo': 1, 'bar': 2, 'zee': 3})
+
+        with cache.batch() as batch:
+            batch.put('foo', 10)
+            batch.put('new', 4, max_age=60)
+            batch.put_many({'zee': 30, 'tmp': 0})
+            batch.remove('bar')
+            batch.remove_many(['tmp', 'missing'])
+
+            self.assertEqual(batch.get('foo'), 10)
+            self.assertEqual(batch.get('bar', None), None)
+            self.assertFalse(batch.has('tmp'))
+            self.assertTrue(batch.has('new'))
+            self.assertEqual(batch.get_many(['foo', 'bar', 'zee', 'new'],
+                                            default=None),
+                             [('foo', 10), ('bar', None), ('zee', 30),
+                              ('new', 4)])
+            with self.assertRaises(KeyError):
+                batch.get('tmp')
+
+            self.assertEqual(cache.get('foo'), 1)
+            self.assertEqual(len(batch), 6)
+
+        self.assertEqual(len(batch), 0)
+        self.assertEqual(cache.get_many(['foo', 'bar', 'zee', 'new', 'tmp']),
+                         [('foo', 10), ('zee', 30), ('new', 4)])
+
+    def test_batch_discard(self) -> None:
+        cache = self.get_cache()
+        cache.put('foo', 1)
+
+        with self.assertRaises(RuntimeError):
+            with cache.batch() as batch:
+                batch.put('foo', 2)
+                batch.remove('foo')
+                batch.put('bar', 3)
+                raise RuntimeError()
+
+        self.assertEqual(cache.get('foo'), 1)
+        self.assertFalse(cache.has('bar'))
+
+        with self.assertRaises(ValueError):
+            cache.batch().put('foo', 1, max_age=-1)
+
+    def test_pipeline(self) -> None:
+        cache = self.get_cache()
+        cache.put_many({'foo': 1, 'bar': 2})
+
+        with cache.pipeline() as pipeline:
+            got_foo = pipeline.get('foo')
+            has_bar = pipeline.has('bar')
+            put = pipeline.put('zee', 3, max_age=60)
+            removed = pipeline.remove('bar')
+            pipeline.remove('missing')
+            got_bar = pipeline.get('bar', None)
+            zee = pipeline.get('zee')
+            missing = pipeline.get('missing')
+            cancelled = pipeline.put('cancelled', 4)
+            self.assertTrue(cancelled.cancel())
+            self.assertFalse(got_foo.done())
+            self.assertEqual(len(pipeline), 9)
+
+        self.assertEqual(len(pipeline), 0)
+        self.assertEqual(got_foo.result(), 1)
+        self.assertTrue(has_bar.result())
+        self.assertIsNone(put.result())
+        self.assertIsNone(removed.result())
+        self.assertIsNone(got_bar.result())
+        self.assertEqual(zee.result(), 3)
+        with self.assertRaises(KeyError):
+            missing.result()
+        self.assertEqual(cache.get_many(['foo', 'bar', 'zee', 'cancelled']),
+                         [('foo', 1), ('zee', 3)])
+
+        with self.assertRaises(ValueError):
+            cache.pipeline().put('foo', 1, max_age=-1)
+
+    def test_touch(self) -> None:
+        cache = self.get_cache()
+        cache.put('foo', 'bar', max_age=60)
+        cache.put('zee', 'lee', max_age=60)
+
+        cache.touch('foo')
+        self.assertEqual(cache.get('foo'), 'bar')
+        cache.touch('foo', 0)
+        with self.assertRaises(KeyError):
+            cache.get('foo')
+        with self.assertRaises(KeyError):
+            cache.touch('foo', 60)
+        with self.assertRaises(KeyError):
+            cache.touch('missing')
+        with self.assertRaises(ValueError):
+            cache.touch('zee', -1)
+
+        self.assertEqual(cache.get('zee', touch=0), 'lee')
+        self.assertIsNone(cache.get('zee', None, touch=60))
+
     def test_gc(self) -> None:
         # This really only checks that the method is not generating
         # any errors.
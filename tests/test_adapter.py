@@ -0,0 +1,180 @@
+import unittest
+from typing import Any
+
+import pluca
+import pluca.memory
+import pluca.sqlite3
+from pluca.adapter import AdapterOps, Capability, get_capabilities
+
+
+class _CountingAdapter:
+
+    def __init__(self) -> None:
+        self.storage: dict[Any, Any] = {}
+        self.calls: dict[str, int] = {}
+        self.max_ages: list[float | None] = []
+
+    def _count(self, name: str) -> None:
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def put_mapped(self, mkey: Any, value: Any,
+                   max_age: float | None = None) -> None:
+        self._count('put_mapped')
+        self.max_ages.append(max_age)
+        self.storage[mkey] = value
+
+    def get_mapped(self, mkey: Any) -> Any:
+        self._count('get_mapped')
+        return self.storage[mkey]
+
+    def remove_mapped(self, mkey: Any) -> None:
+        self._count('remove_mapped')
+        del self.storage[mkey]
+
+    def flush(self) -> None:
+        self.storage.clear()
+
+    def has_mapped(self, mkey: Any) -> bool:
+        _ = mkey
+        self._count('has_mapped')
+        raise NotImplementedError
+
+    def put_many_mapped(self,
+                        data: Any,
+                        max_age: float | None = None) -> None:
+        _ = (data, max_age)
+        self._count('put_many_mapped')
+        raise NotImplementedError
+
+    def get_many_mapped(self, keys: Any,
+                        default: Any = ...) -> list[tuple[Any, Any]]:
+        _ = (keys, default)
+        self._count('get_many_mapped')
+        raise NotImplementedError
+
+    def remove_many_mapped(self, keys: Any) -> None:
+        _ = keys
+        self._count('remove_many_mapped')
+        raise NotImplementedError
+
+    def gc(self) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        pass
+
+
+class _DeclaredAdapter(_CountingAdapter):
+    capabilities = Capability.NONE
+
+
+class TestAdapter(unittest.TestCase):
+
+    def test_get_capabilities(self) -> None:
+        self.assertIsNone(get_capabilities(_CountingAdapter()))
+        self.assertEqual(get_capabilities(_DeclaredAdapter()),
+                         Capability.NONE)
+        capabilities = get_capabilities(pluca.memory.Adapter())
+        assert capabilities is not None
+        self.assertIn(Capability.GET_MANY, capabilities)
+
+    def test_get_capabilities_invalid(self) -> None:
+        adapter = _CountingAdapter()
+        # pylint: disable-next=attribute-defined-outside-init
+        adapter.capabilities = 'all'  # type: ignore[attr-defined]
+        with self.assertRaises(TypeError):
+            get_capabilities(adapter)
+
+    def test_declared_capabilities_bind_native(self) -> None:
+        adapter = pluca.memory.Adapter()
+        ops = AdapterOps(adapter)
+        self.assertEqual(ops.get_many_mapped, adapter.get_many_mapped)
+        self.assertEqual(ops.get_mapped_or, adapter.get_mapped_or)
+
+    def test_declared_capabilities_bind_fallback(self) -> None:
+        adapter = _DeclaredAdapter()
+        cache = pluca.Cache(adapter)
+
+        cache.put_many({'foo': 1, 'bar': 2})
+        self.assertTrue(cache.has('foo'))
+        self.assertEqual(cache.get_many(['foo', 'bar', 'zee']),
+                         [('foo', 1), ('bar', 2)])
+        cache.remove_many(['foo', 'zee'])
+        self.assertFalse(cache.has('foo'))
+
+        for name in ('has_mapped', 'put_many_mapped', 'get_many_mapped',
+                     'remove_many_mapped'):
+            with self.subTest(name=name):
+                self.assertNotIn(name, adapter.calls)
+
+    def test_bytes_fallback(self) -> None:
+        adapter = _DeclaredAdapter()
+        cache = pluca.Cache(adapter)
+        cache.put_bytes('foo', memoryview(b'bar'))
+        cache.put_many_bytes({'zee': bytearray(b'zee')})
+        self.assertEqual(adapter.storage[cache.key_mapper.map_key('foo')],
+                         b'bar')
+        self.assertEqual(cache.get_bytes('foo'), b'bar')
+        self.assertEqual(cache.get_many_bytes(['zee', 'nonexistent']),
+                         [('zee', b'zee')])
+
+    def test_bytes_many_binding(self) -> None:
+        adapter = pluca.memory.Adapter()
+        ops = AdapterOps(adapter)
+        ops.put_many_bytes_mapped([('foo', b'bar')])
+        # Raw entries are read back as views, without unpickling.
+        value = adapter.get_bytes_mapped_or('foo', None)
+        self.assertIsInstance(value, memoryview)
+        self.assertEqual(bytes(value), b'bar')
+        self.assertEqual(ops.get_many_bytes_mapped(['foo', 'zee'], None),
+                         [('foo', b'bar'), ('zee', None)])
+
+        sqlite_adapter = pluca.sqlite3.Adapter(':memory:')
+        ops = AdapterOps(sqlite_adapter)
+        self.assertEqual(ops.put_many_bytes_mapped,
+                         sqlite_adapter.put_many_bytes_mapped)
+        self.assertEqual(ops.get_many_bytes_mapped,
+                         sqlite_adapter.get_many_bytes_mapped)
+        sqlite_adapter.shutdown()
+
+    def test_undeclared_capabilities_probe_once(self) -> None:
+        adapter = _CountingAdapter()
+        cache = pluca.Cache(adapter)
+
+        for _ in range(3):
+            cache.put_many({'foo': 1})
+            cache.has('foo')
+            cache.get_many(['foo'])
+            cache.remove_many(['foo'])
+
+        for name in ('has_mapped', 'put_many_mapped', 'get_many_mapped',
+                     'remove_many_mapped'):
+            with self.subTest(name=name):
+                self.assertEqual(adapter.calls[name], 1)
+
+    def test_jitter_fallback(self) -> None:
+        adapter = _DeclaredAdapter()
+        cache = pluca.Cache(adapter, jitter=10)
+        cache.put_many({f'key{i}': i for i in range(20)}, max_age=100)
+        self.assertEqual(len(adapter.max_ages), 20)
+        self.assertGreater(len(set(adapter.max_ages)), 1)
+        for max_age in adapter.max_ages:
+            assert max_age is not None
+            self.assertTrue(90 <= max_age <= 100)
+
+    def test_cost_fallback(self) -> None:
+        adapter = _DeclaredAdapter()
+        cache = pluca.Cache(adapter)
+        self.assertEqual(cache.get_put('foo', lambda: 'bar', max_age=10),
+                         'bar')
+        self.assertEqual(adapter.max_ages, [10])
+
+    def test_touch_fallback(self) -> None:
+        adapter = _DeclaredAdapter()
+        cache = pluca.Cache(adapter)
+        cache.put('foo', 'bar')
+        cache.touch('foo', 60)
+        self.assertEqual(adapter.max_ages, [None, 60])
+        self.assertEqual(cache.get('foo'), 'bar')
+        with self.assertRaises(KeyError):
+            cache.touch('missing')
@@ -0,0 +1,197 @@
+from pathlib import Path
+import tempfile
+import threading
+import time
+import unittest
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Any
+
+import pluca
+import pluca.file
+import pluca.memory
+import pluca.sqlite3
+from pluca.adapter import Capability
+from pluca.aio import AsyncCache
+
+if TYPE_CHECKING:
+    _BaseClass = unittest.IsolatedAsyncioTestCase
+else:
+    _BaseClass = object
+
+
+class _NativeAsyncAdapter(pluca.memory.Adapter):
+
+    capabilities = pluca.memory.Adapter.capabilities | Capability.ASYNC
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls: list[str] = []
+
+    async def aput_mapped(self, mkey: Any, value: Any,
+                          max_age: float | None = None) -> None:
+        self.calls.append('aput_mapped')
+        self.put_mapped(mkey, value, max_age)
+
+    async def aget_mapped_or(self, mkey: Any, default: Any) -> Any:
+        self.calls.append('aget_mapped_or')
+        return self.get_mapped_or(mkey, default)
+
+    async def aremove_mapped(self, mkey: Any) -> None:
+        self.calls.append('aremove_mapped')
+        self.remove_mapped(mkey)
+
+    async def aput_many_mapped(self, data: Iterable[tuple[Any, Any]],
+                               max_age: float | None = None) -> None:
+        self.calls.append('aput_many_mapped')
+        self.put_many_mapped(data, max_age)
+
+    async def aget_many_mapped(self, keys: Iterable[Any],
+                               default: Any = ...) -> list[tuple[Any, Any]]:
+        self.calls.append('aget_many_mapped')
+        return self.get_many_mapped(keys, default)
+
+
+class _ThreadRecordingAdapter(pluca.memory.Adapter):
+
+    capabilities = (pluca.memory.Adapter.capabilities
+                    & ~Capability.NON_BLOCKING)
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.threads: list[str] = []
+
+    def get_many_mapped(self, keys: Iterable[Any],
+                        default: Any = ...) -> list[tuple[Any, Any]]:
+        self.threads.append(threading.current_thread().name)
+        return super().get_many_mapped(keys, default)
+
+
+class AsyncCacheTester(_BaseClass):
+
+    def get_cache(self) -> pluca.Cache:
+        raise NotImplementedError()
+
+    async def asyncSetUp(self) -> None:  # pylint: disable=invalid-name
+        self.acache = AsyncCache(self.get_cache())
+
+    async def asyncTearDown(self) -> None:  # pylint: disable=invalid-name
+        await self.acache.shutdown()
+
+    async def test_put_get(self) -> None:
+        await self.acache.put('foo', {'bar': 1})
+        self.assertEqual(await self.acache.get('foo'), {'bar': 1})
+
+    async def test_get_missing(self) -> None:
+        with self.assertRaises(KeyError):
+            await self.acache.get('foo')
+        self.assertIsNone(await self.acache.get('foo', None))
+
+    async def test_has_remove(self) -> None:
+        await self.acache.put('foo', 'bar')
+        self.assertTrue(await self.acache.has('foo'))
+        await self.acache.remove('foo')
+        self.assertFalse(await self.acache.has('foo'))
+        with self.assertRaises(KeyError):
+            await self.acache.remove('foo')
+
+    async def test_put_many_get_many(self) -> None:
+        await self.acache.put_many({'a': 1, 'b': 2})
+        self.assertEqual(await self.acache.get_many(['a', 'b', 'c']),
+                         [('a', 1), ('b', 2)])
+        self.assertEqual(await self.acache.get_many(['a', 'c'], default=0),
+                         [('a', 1), ('c', 0)])
+
+    async def test_remove_many(self) -> None:
+        await self.acache.put_many({'a': 1, 'b': 2})
+        await self.acache.remove_many(['a', 'b', 'c'])
+        self.assertEqual(await self.acache.get_many(['a', 'b']), [])
+
+    async def test_get_put(self) -> None:
+        self.assertEqual(await self.acache.get_put('foo', lambda: 1), 1)
+        self.assertEqual(await self.acache.get_put('foo', lambda: 2), 1)
+
+    async def test_get_put_coroutine(self) -> None:
+        async def compute() -> int:
+            return 42
+        self.assertEqual(await self.acache.get_put('foo', compute), 42)
+        self.assertEqual(await self.acache.get('foo'), 42)
+
+    async def test_flush_gc(self) -> None:
+        await self.acache.put('foo', 'bar')
+        await self.acache.gc()
+        await self.acache.flush()
+        self.assertFalse(await self.acache.has('foo'))
+
+
+class TestAsyncMemory(AsyncCacheTester, unittest.IsolatedAsyncioTestCase):
+
+    def get_cache(self) -> pluca.Cache:
+        return pluca.Cache(pluca.memory.Adapter())
+
+    def test_max_workers(self) -> None:
+        with self.assertRaises(ValueError):
+            AsyncCache(self.get_cache(), max_workers=0)
+
+
+class TestAsyncFile(AsyncCacheTester, unittest.IsolatedAsyncioTestCase):
+
+    def get_cache(self) -> pluca.Cache:
+        # enterContext() cleans up the directory after the test.
+        # pylint: disable-next=consider-using-with
+        tmpdir = self.enterContext(tempfile.TemporaryDirectory())
+        return pluca.Cache(pluca.file.Adapter(name='test',
+                                              cache_dir=Path(tmpdir)))
+
+
+class TestAsyncSqlite3(AsyncCacheTester, unittest.IsolatedAsyncioTestCase):
+
+    def get_cache(self) -> pluca.Cache:
+        return pluca.Cache(pluca.sqlite3.Adapter(':memory:',
+                                                 check_same_thread=False))
+
+
+class TestAsyncNative(AsyncCacheTester, unittest.IsolatedAsyncioTestCase):
+
+    def get_cache(self) -> pluca.Cache:
+        self.adapter = _NativeAsyncAdapter()
+        return pluca.Cache(self.adapter)
+
+    async def test_native_calls(self) -> None:
+        await self.acache.put('foo', 'bar')
+        await self.acache.get('foo')
+        await self.acache.put_many({'a': 1})
+        await self.acache.get_many(['a'])
+        await self.acache.remove('foo')
+        self.assertEqual(self.adapter.calls,
+                         ['aput_mapped', 'aget_mapped_or',
+                          'aput_many_mapped', 'aget_many_mapped',
+                          'aremove_mapped'])
+
+    async def test_native_jitter(self) -> None:
+        acache = AsyncCache(pluca.Cache(self.adapter, jitter=10))
+        start = time.time()
+        await acache.put('foo', 'bar', max_age=100)
+        await acache.put_many({f'key{i}': i for i in range(20)},
+                              max_age=100)
+        end = time.time()
+        expires = [entry.expire for entry in self.adapter._storage.values()]
+        self.assertEqual(len(expires), 21)
+        self.assertGreater(len(set(expires)), 1)
+        for expire in expires:
+            assert expire is not None
+            self.assertTrue(start + 90 <= expire <= end + 100)
+        self.assertEqual(self.adapter.calls, ['aput_mapped'] * 21)
+        await acache.shutdown()
+
+
+class TestAsyncExecutor(unittest.IsolatedAsyncioTestCase):
+
+    async def test_batch_single_job(self) -> None:
+        adapter = _ThreadRecordingAdapter()
+        acache = AsyncCache(pluca.Cache(adapter))
+        await acache.put_many({'a': 1, 'b': 2})
+        self.assertEqual(await acache.get_many(['a', 'b']),
+                         [('a', 1), ('b', 2)])
+        await acache.shutdown()
+        self.assertEqual(len(adapter.threads), 1)
+        self.assertTrue(adapter.threads[0].startswith('pluca-aio'))
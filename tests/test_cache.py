@@ -73,6 +73,13 @@ class TestCache(unittest.TestCase):
             except KeyError:
                 pass
 
+    def test_get_without_get_mapped_or(self) -> None:
+        cache = pluca.Cache(_ConfigProbeAdapter())
+        self.assertEqual(cache.get('foo', 'default'), 'default')
+        with self.assertRaises(KeyError):
+            cache.get('foo')
+        self.assertEqual(cache.get_put('foo', lambda: 'bar'), 'bar')
+
     def test_add_get(self) -> None:
         plc.add(None, 'pluca.file')
         plc.add('mod', 'pluca.null')
@@ -440,6 +447,23 @@ class TestCache(unittest.TestCase):
         self.assertEqual(cache.max_entries, 2)
         self.assertIsInstance(cache.max_entries, int)
 
+    def test_from_toml_codec(self) -> None:
+        # pylint: disable-next=consider-using-with
+        temp = tempfile.NamedTemporaryFile(mode='w+', suffix='.toml')
+        temp.write('''
+        [__root__]
+        factory = 'pluca.memory'
+        codec = 'json'
+        ''')
+        temp.flush()
+        temp.seek(0)
+
+        plc.from_toml(temp.name)
+
+        cache = plc.get_cache()
+        self._assert_memory_cache(cache)
+        self.assertEqual(cache.codec.name, 'json')
+
     def test_from_toml_types_preserved(self) -> None:
         # pylint: disable-next=consider-using-with
         temp = tempfile.NamedTemporaryFile(mode='w+', suffix='.toml')
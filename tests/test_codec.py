@@ -0,0 +1,230 @@
+import mmap
+import pickle
+import unittest
+from typing import Any
+
+import pluca.codec
+from pluca.codec import (CompressedCodec, JsonCodec, LazyValue,
+                         MarshalCodec, OutOfBandPickleCodec, PickleCodec,
+                         RawCodec, decode, encode_many, get_codec,
+                         register_codec)
+
+
+class _ReprCodec:
+    name = 'test-repr'
+    tag = b'P'
+
+    def encode(self, value: object) -> bytes:
+        return self.tag + repr(value).encode('utf-8')
+
+    def decode(self, data: bytes) -> object:
+        return data[1:].decode('utf-8')
+
+
+class _Blob:
+
+    def __init__(self, data: Any) -> None:
+        self.data = data
+
+    def __reduce_ex__(self, protocol: Any) -> Any:
+        if protocol >= 5:
+            return type(self), (pickle.PickleBuffer(self.data),)
+        return type(self), (bytes(self.data),)
+
+
+class TestCodec(unittest.TestCase):
+
+    def test_round_trip(self) -> None:
+        value = {'foo': [1, 2.5, 'bar'], 'zee': None}
+        for codec in (PickleCodec(), MarshalCodec(), JsonCodec()):
+            with self.subTest(codec=codec.name):
+                data = codec.encode(value)
+                self.assertEqual(data[:1], codec.tag)
+                self.assertEqual(codec.decode(data), value)
+                self.assertEqual(decode(data), value)
+
+    def test_raw(self) -> None:
+        codec = RawCodec()
+        for value in (b'foo', bytearray(b'foo'), memoryview(b'foo')):
+            with self.subTest(value=value):
+                self.assertEqual(decode(codec.encode(value)), b'foo')
+
+    def test_raw_rejects_non_bytes(self) -> None:
+        with self.assertRaises(TypeError):
+            RawCodec().encode('foo')
+
+    def test_pickle_protocol(self) -> None:
+        self.assertEqual(PickleCodec(2).encode(1), pickle.dumps(1, 2))
+        with self.assertRaises(ValueError):
+            PickleCodec(1)
+
+    def test_decode_legacy_pickle(self) -> None:
+        self.assertEqual(decode(pickle.dumps(('foo', 1))), ('foo', 1))
+
+    def test_decode_unknown(self) -> None:
+        with self.assertRaises(ValueError):
+            decode(b'?foo')
+        with self.assertRaises(ValueError):
+            decode(b'')
+
+    def test_get_codec(self) -> None:
+        self.assertIsInstance(get_codec('marshal'), MarshalCodec)
+        codec = JsonCodec()
+        self.assertIs(get_codec(codec), codec)
+        with self.assertRaises(ValueError):
+            get_codec('foo')
+
+    def test_register_codec(self) -> None:
+        codec = _ReprCodec()
+        register_codec(codec)
+        try:
+            self.assertIs(get_codec('test-repr'), codec)
+            self.assertEqual(decode(codec.encode([1])), '[1]')
+        finally:
+            # pylint: disable=protected-access
+            del pluca.codec._codecs_by_name[codec.name]
+            del pluca.codec._codecs_by_tag[codec.tag[0]]
+
+    def test_register_codec_validation(self) -> None:
+        codec = _ReprCodec()
+        codec.tag = b'PP'
+        with self.assertRaises(ValueError):
+            register_codec(codec)
+        codec.tag = b'J'
+        with self.assertRaises(ValueError):
+            register_codec(codec)
+        codec.tag = b'Z'
+        with self.assertRaises(ValueError):
+            register_codec(codec)
+
+
+class TestCompressedCodec(unittest.TestCase):
+
+    def test_round_trip(self) -> None:
+        value = 'foo' * 1000
+        for compression in ('zlib', 'lzma', 'bz2'):
+            with self.subTest(compression=compression):
+                codec = CompressedCodec('pickle', compression, threshold=0)
+                data = codec.encode(value)
+                self.assertLess(len(data), 1000)
+                self.assertEqual(codec.decode(data), value)
+                self.assertEqual(decode(data), value)
+
+    def test_threshold(self) -> None:
+        codec = CompressedCodec('json', threshold=10)
+        self.assertEqual(codec.encode('foo'), get_codec('json').encode('foo'))
+        self.assertEqual(codec.encode('foo' * 10)[:1], b'Z')
+
+    def test_level(self) -> None:
+        value = 'foo' * 1000
+        self.assertEqual(decode(CompressedCodec('pickle', threshold=0,
+                                                level=1).encode(value)),
+                         value)
+
+    def test_encode_many(self) -> None:
+        values = [str(i) * i for i in range(100)]
+        for workers in (None, 1, 4):
+            with self.subTest(workers=workers):
+                codec = CompressedCodec('pickle', threshold=50,
+                                        workers=workers)
+                encoded = encode_many(codec, values)
+                self.assertEqual([decode(data) for data in encoded], values)
+                codec.shutdown()
+
+    def test_encode_many_reuses_executor(self) -> None:
+        codec = CompressedCodec('pickle', threshold=0, workers=2)
+        encode_many(codec, ['a', 'b'])
+        executor = codec._executor
+        self.assertIsNotNone(executor)
+        encode_many(codec, ['c', 'd'])
+        self.assertIs(codec._executor, executor)
+
+        codec.shutdown()
+        self.assertIsNone(codec._executor)
+        self.assertEqual([decode(data)
+                          for data in encode_many(codec, ['e', 'f'])],
+                         ['e', 'f'])
+        codec.shutdown()
+
+    def test_encode_many_plain_codec(self) -> None:
+        self.assertEqual(encode_many(JsonCodec(), [1, 2]), [b'J1', b'J2'])
+
+    def test_validation(self) -> None:
+        with self.assertRaises(ValueError):
+            CompressedCodec('pickle', 'foo')
+        with self.assertRaises(ValueError):
+            CompressedCodec('pickle', threshold=-1)
+        with self.assertRaises(ValueError):
+            CompressedCodec('pickle', workers=0)
+
+
+class TestOutOfBandPickleCodec(unittest.TestCase):
+
+    def test_small_values_are_plain_pickles(self) -> None:
+        codec = OutOfBandPickleCodec(threshold=100)
+        data = codec.encode(_Blob(b'x' * 10))
+        self.assertEqual(data[:1], pickle.PROTO)
+        self.assertEqual(bytes(decode(data).data), b'x' * 10)
+
+    def test_out_of_band(self) -> None:
+        codec = OutOfBandPickleCodec(threshold=100)
+        value = [_Blob(b'a' * 1000), 'foo', _Blob(b'b' * 10),
+                 _Blob(b'c' * 200)]
+
+        segments = codec.encode_segments(value)
+        data = b''.join(segments)
+        self.assertEqual(data, codec.encode(value))
+        self.assertEqual(data[:1], b'O')
+
+        # Out-of-band buffers are page aligned.
+        for buffer in (b'a' * 1000, b'c' * 200):
+            self.assertEqual(data.index(buffer) % mmap.PAGESIZE, 0)
+
+        decoded = decode(data)
+        self.assertEqual(decoded[1], 'foo')
+        for blob, expected in zip((decoded[0], decoded[3]),
+                                  (b'a' * 1000, b'c' * 200)):
+            self.assertIsInstance(blob.data, memoryview)
+            self.assertTrue(blob.data.readonly)
+            self.assertEqual(blob.data, expected)
+        self.assertEqual(bytes(decoded[2].data), b'b' * 10)
+
+    def test_bytearray(self) -> None:
+        codec = OutOfBandPickleCodec(threshold=0)
+        value = bytearray(b'foo' * 100)
+        self.assertEqual(decode(codec.encode(value)), value)
+
+    def test_validation(self) -> None:
+        with self.assertRaises(ValueError):
+            OutOfBandPickleCodec(threshold=-1)
+
+
+class TestLazyValue(unittest.TestCase):
+
+    def test_decodes_once(self) -> None:
+        calls = []
+
+        def decoder(data: bytes) -> str:
+            calls.append(data)
+            return data.decode()
+
+        lazy = LazyValue(decoder, b'foo')
+        self.assertFalse(lazy.is_decoded)
+        self.assertEqual(calls, [])
+        self.assertEqual(lazy.value, 'foo')
+        self.assertEqual(lazy.value, 'foo')
+        self.assertTrue(lazy.is_decoded)
+        self.assertEqual(calls, [b'foo'])
+
+    def test_decode_error_is_retried(self) -> None:
+        lazy = LazyValue(decode, b'?')
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                _ = lazy.value
+        self.assertFalse(lazy.is_decoded)
+
+    def test_resolved(self) -> None:
+        lazy = LazyValue.resolved(None)
+        self.assertTrue(lazy.is_decoded)
+        self.assertIsNone(lazy.value)
+        self.assertEqual(repr(lazy), 'LazyValue.resolved(None)')
@@ -264,3 +264,17 @@ class TestComposite(AdapterTester, unittest.TestCase):
 
         self.assertTrue(cache.has('foo'))
         self.assertFalse(cache.has('not-there'))
+
+    def test_comp_wrappers_with_lossy_tier(self) -> None:
+        adapter = pluca.comp.CompositeAdapter()
+        adapter.add_cache(pluca.Cache(pluca.memory.Adapter()))
+        adapter.add_cache(pluca.Cache(pluca.memory.Adapter(codec='json')))
+        cache = pluca.Cache(adapter)
+
+        with self.assertRaises(ValueError):
+            cache.get_put('foo', lambda: 'bar', max_age=10, stale_ttl=5)
+        with self.assertRaises(ValueError):
+            cache(max_age=10, stale_ttl=5)
+
+        self.assertEqual(cache.get_put('foo', lambda: 'bar', max_age=10),
+                         'bar')
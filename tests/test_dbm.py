@@ -1,4 +1,5 @@
 import dbm
+import pickle
 import tempfile
 import unittest
 from pathlib import Path
@@ -44,6 +45,55 @@ class TestDbm(_TestMixin, AdapterTester, unittest.TestCase):
         with self.assertRaises(KeyError):
             cache.get('foo')
 
+    def test_legacy_entries(self) -> None:
+        cache = self.get_cache()
+        mkey = cache.key_mapper.map_key
+        self._db[mkey('foo')] = pickle.dumps(pluca.dbm._Entry('bar', None))
+        self._db[mkey('zee')] = pickle.dumps(pluca.dbm._Entry('zee', 0.0))
+
+        self.assertEqual(cache.get('foo'), 'bar')
+        self.assertIsNone(cache.get('zee', None))
+
+    def test_legacy_entries_gc(self) -> None:
+        cache = self.get_cache()
+        mkey = cache.key_mapper.map_key
+        self._db[mkey('foo')] = pickle.dumps(pluca.dbm._Entry('bar', None))
+        self._db[mkey('zee')] = pickle.dumps(pluca.dbm._Entry('zee', 0.0))
+        cache.gc()
+        self.assertTrue(cache.has('foo'))
+        self.assertFalse(cache.has('zee'))
+
+    def test_compression(self) -> None:
+        cache = pluca.Cache(pluca.dbm.Adapter(self._db, compression='lzma',
+                                              compress_threshold=100))
+        cache.put_many({'small': 'a', 'large': 'a' * 10_000})
+        self.assertLess(len(self._db[cache.key_mapper.map_key('large')]),
+                        1000)
+        self.assertEqual(cache.get('small'), 'a')
+        self.assertEqual(cache.get('large'), 'a' * 10_000)
+
+    def test_mixed_codecs(self) -> None:
+        pluca.Cache(pluca.dbm.Adapter(self._db,
+                                      codec='json')).put('foo', [1, 2])
+        cache = self.get_cache()
+        self.assertEqual(cache.get('foo'), [1, 2])
+
+
+class TestDbmBinaryKeys(_TestMixin, AdapterTester, unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._open_db()
+
+    def get_adapter(self) -> pluca.dbm.Adapter:
+        return pluca.dbm.Adapter(self._db, binary_keys=True)
+
+    def test_keys_are_binary(self) -> None:
+        cache = self.get_cache()
+        cache.put('foo', 'bar')
+        self.assertEqual(list(self._db.keys()),
+                         [cache.key_mapper.map_key('foo')])
+        self.assertIsInstance(cache.key_mapper.map_key('foo'), bytes)
+
 
 class TestGeneric(unittest.TestCase):
 
@@ -0,0 +1,414 @@
+import asyncio
+import inspect
+import pickle
+import threading
+import time
+import unittest
+from typing import Any
+
+import pluca
+import pluca.memory
+from pluca.adapter import Capability
+from pluca.keymap import KeyMapper
+
+
+class NotFound(Exception):
+
+    def __init__(self, code: int, msg: str) -> None:
+        super().__init__(msg)
+        self.code = code
+
+
+class TestDecorator(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.cache = pluca.Cache(pluca.memory.Adapter())
+        self.calls: list[Any] = []
+
+    def test_argument_binding(self) -> None:
+        @self.cache
+        def func(val1: int, val2: int = 2, /, *, val3: int = 3) -> int:
+            self.calls.append((val1, val2, val3))
+            return val1 + val2 + val3
+
+        self.assertEqual(func(1), 6)
+        self.assertEqual(func(1, 2), 6)
+        self.assertEqual(func(1, 2, val3=3), 6)
+        self.assertEqual(func(1, val3=4), 7)
+        self.assertEqual(self.calls, [(1, 2, 3), (1, 2, 4)])
+
+    def test_keyword_binding(self) -> None:
+        @self.cache
+        def func(val1: int, val2: int = 2) -> int:
+            self.calls.append((val1, val2))
+            return val1 + val2
+
+        self.assertEqual(func(1), 3)
+        self.assertEqual(func(1, 2), 3)
+        self.assertEqual(func(1, val2=2), 3)
+        self.assertEqual(func(val2=2, val1=1), 3)
+        self.assertEqual(func(2), 4)
+        self.assertEqual(self.calls, [(1, 2), (2, 2)])
+
+    def test_var_arguments(self) -> None:
+        @self.cache
+        def func(*args: int, **kwargs: int) -> int:
+            self.calls.append((args, kwargs))
+            return sum(args) + sum(kwargs.values())
+
+        self.assertEqual(func(1, 2, foo=3, bar=4), 10)
+        self.assertEqual(func(1, 2, bar=4, foo=3), 10)
+        self.assertEqual(func(2, 1, foo=3, bar=4), 10)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_no_signature(self) -> None:
+        with self.assertRaises(ValueError):
+            inspect.signature(max)
+        func = self.cache(max)
+        self.assertEqual(func(1, 2), 2)
+        self.assertEqual(func([3, 1], default=0), 3)
+        self.assertEqual(list(self.cache.map(str, [1, 2])), ['1', '2'])
+        with self.assertRaises(ValueError):
+            self.cache(max, ignore=['default'])
+
+    def test_invalid_call(self) -> None:
+        @self.cache
+        def func(val1: int) -> int:
+            return val1
+
+        with self.assertRaises(TypeError):
+            func()  # pylint: disable=no-value-for-parameter
+        with self.assertRaises(TypeError):
+            func(1, 2)  # pylint: disable=too-many-function-args
+        with self.assertRaises(TypeError):
+            func(1, val2=2)  # pylint: disable=unexpected-keyword-arg
+        with self.assertRaises(TypeError):
+            func(1, val1=1)  # pylint: disable=redundant-keyword-arg
+
+    def test_ignore(self) -> None:
+        @self.cache(ignore=['conn'])
+        def func(conn: object, val: int) -> int:
+            _ = conn
+            self.calls.append(val)
+            return val
+
+        self.assertEqual(func(object(), 1), 1)
+        self.assertEqual(func(object(), 1), 1)
+        self.assertEqual(func(conn=object(), val=1), 1)
+        self.assertEqual(self.calls, [1])
+
+    def test_ignore_self(self) -> None:
+        cache = self.cache
+
+        class Repo:
+
+            def __init__(self) -> None:
+                self.calls = 0
+
+            @cache(ignore=['self'])
+            def get(self, val: int) -> int:
+                self.calls += 1
+                return val
+
+        self.assertEqual(Repo().get(1), 1)
+        repo = Repo()
+        self.assertEqual(repo.get(1), 1)
+        self.assertEqual(repo.calls, 0)
+
+    def test_key(self) -> None:
+        @self.cache(key=lambda data, verbose=False: data['id'])
+        def func(data: dict[str, Any], verbose: bool = False) -> str:
+            _ = verbose
+            self.calls.append(data['id'])
+            return str(data['name'])
+
+        self.assertEqual(func({'id': 1, 'name': 'foo'}), 'foo')
+        self.assertEqual(func({'id': 1, 'name': 'bar'}, True), 'foo')
+        self.assertEqual(func({'id': 2, 'name': 'bar'}), 'bar')
+        self.assertEqual(self.calls, [1, 2])
+
+    def test_functions_do_not_share_entries(self) -> None:
+        @self.cache
+        def func1(val: int) -> int:
+            return val + 1
+
+        @self.cache
+        def func2(val: int) -> int:
+            return val + 2
+
+        self.assertEqual(func1(1), 2)
+        self.assertEqual(func2(1), 3)
+
+    def test_batched_modules_do_not_share_entries(self) -> None:
+        def func(items: list[int]) -> dict[int, str]:
+            return {item: func.__module__ for item in items}
+
+        func.__module__ = 'module1'
+        func1 = self.cache.batched(func)
+        self.assertEqual(func1([1]), {1: 'module1'})
+        func.__module__ = 'module2'
+        func2 = self.cache.batched(func)
+        self.assertEqual(func2([1]), {1: 'module2'})
+
+    def test_memo(self) -> None:
+        cache = pluca.Cache(pluca.memory.Adapter(),
+                            key_mapper=KeyMapper(memo=100))
+
+        @cache
+        def func(val: str) -> str:
+            self.calls.append(val)
+            return val
+
+        self.assertEqual(func('foo'), 'foo')
+        self.assertEqual(func('foo'), 'foo')
+        self.assertEqual(self.calls, ['foo'])
+
+    def test_validation(self) -> None:
+        def func(val: int) -> int:
+            return val
+
+        with self.assertRaises(ValueError):
+            self.cache(func, ignore=['nonexistent'])
+        with self.assertRaises(ValueError):
+            self.cache(key=lambda val: val, ignore=['val'])
+
+    def test_codec_without_wrappers(self) -> None:
+        for codec in ('json', 'marshal'):
+            cache = pluca.Cache(pluca.memory.Adapter(codec=codec))
+            with self.subTest(codec=codec):
+                with self.assertRaises(ValueError):
+                    cache(max_age=10, stale_ttl=10)
+                with self.assertRaises(ValueError):
+                    cache(max_age=10, early_refresh=1.0)
+                with self.assertRaises(ValueError):
+                    cache(negative_ttl=10, negative_exceptions=KeyError)
+                with self.assertRaises(ValueError):
+                    cache.get_put('key', lambda: 1, max_age=10,
+                                  stale_ttl=10)
+                self.assertEqual(cache.get_put('key', lambda: 1,
+                                               max_age=10, negative_ttl=1),
+                                 1)
+
+
+class TestNegativeResults(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.adapter = pluca.memory.Adapter()
+        self.cache = pluca.Cache(self.adapter)
+        self.calls: list[Any] = []
+
+    def _max_expire(self) -> float:
+        # pylint: disable=protected-access
+        return max(entry.expire or 0.0
+                   for entry in self.adapter._storage.values())
+
+    def test_none_uses_negative_ttl(self) -> None:
+        @self.cache(max_age=1000, negative_ttl=10)
+        def func(val: int) -> int | None:
+            self.calls.append(val)
+            return None
+
+        now = time.time()
+        self.assertIsNone(func(1))
+        self.assertIsNone(func(1))
+        self.assertEqual(self.calls, [1])
+        self.assertLessEqual(self._max_expire(), time.time() + 10)
+        self.assertGreaterEqual(self._max_expire(), now + 10)
+
+    def test_none_without_negative_ttl(self) -> None:
+        @self.cache(max_age=1000)
+        def func() -> None:
+            return None
+
+        now = time.time()
+        func()
+        self.assertGreaterEqual(self._max_expire(), now + 1000)
+
+    def test_exception(self) -> None:
+        @self.cache(negative_ttl=10, negative_exceptions=LookupError)
+        def func(val: int) -> int:
+            self.calls.append(val)
+            raise KeyError(val)
+
+        for _ in range(2):
+            with self.assertRaises(KeyError) as ctx:
+                func(1)
+            self.assertEqual(ctx.exception.args, (1,))
+        self.assertEqual(self.calls, [1])
+
+    def test_unlisted_exception(self) -> None:
+        @self.cache(negative_ttl=10, negative_exceptions=(KeyError,))
+        def func(val: int) -> int:
+            self.calls.append(val)
+            raise ValueError(val)
+
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                func(1)
+        self.assertEqual(self.calls, [1, 1])
+
+    def test_exception_not_unpicklable(self) -> None:
+        @self.cache(negative_ttl=10, negative_exceptions=NotFound)
+        def func(val: int) -> int:
+            self.calls.append(val)
+            raise NotFound(404, 'not found')
+
+        for _ in range(2):
+            with self.assertRaises(NotFound):
+                func(1)
+        self.assertEqual(self.calls, [1, 1])
+
+    def test_unreadable_negative_is_miss(self) -> None:
+        data = pickle.dumps(NotFound(404, 'not found'))
+        # pylint: disable-next=protected-access
+        self.cache.put('key', pluca._Negative(data))
+        self.assertEqual(
+            self.cache.get_put('key', lambda: 1, negative_ttl=10,
+                               negative_exceptions=NotFound),
+            1)
+
+    def test_exception_expires(self) -> None:
+        @self.cache(negative_ttl=0, negative_exceptions=KeyError)
+        def func(val: int) -> int:
+            self.calls.append(val)
+            raise KeyError(val)
+
+        for _ in range(2):
+            with self.assertRaises(KeyError):
+                func(1)
+        self.assertEqual(self.calls, [1, 1])
+
+    def test_get_put(self) -> None:
+        def func() -> int:
+            self.calls.append(None)
+            raise KeyError('foo')
+
+        for _ in range(2):
+            with self.assertRaises(KeyError):
+                self.cache.get_put('key', func, negative_ttl=10,
+                                   negative_exceptions=KeyError)
+        self.assertEqual(len(self.calls), 1)
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_validation(self) -> None:
+        with self.assertRaises(ValueError):
+            self.cache(negative_ttl=-1)
+        with self.assertRaises(ValueError):
+            self.cache(negative_exceptions=KeyError)
+        with self.assertRaises(ValueError):
+            self.cache.get_put('key', lambda: 1,
+                               negative_exceptions=KeyError)
+
+
+class _ThreadRecordingAdapter(pluca.memory.Adapter):
+
+    capabilities = (pluca.memory.Adapter.capabilities
+                    & ~Capability.NON_BLOCKING)
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.threads: set[str] = set()
+
+    def get_mapped_or(self, mkey: Any, default: Any) -> Any:
+        self.threads.add(threading.current_thread().name)
+        return super().get_mapped_or(mkey, default)
+
+
+class TestAsyncDecorator(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        self.cache = pluca.Cache(pluca.memory.Adapter())
+        self.calls: list[Any] = []
+
+    async def test_coroutine(self) -> None:
+        @self.cache
+        async def func(val: int) -> int:
+            self.calls.append(val)
+            await asyncio.sleep(0)
+            return val * 2
+
+        self.assertTrue(inspect.iscoroutinefunction(func))
+        self.assertEqual(await func(1), 2)
+        self.assertEqual(await func(1), 2)
+        self.assertEqual(await func(2), 4)
+        self.assertEqual(self.calls, [1, 2])
+
+    async def test_in_flight_sharing(self) -> None:
+        @self.cache(max_age=60)
+        async def func(val: int) -> int:
+            self.calls.append(val)
+            await asyncio.sleep(0.05)
+            return val * 2
+
+        results = await asyncio.gather(*(func(1) for _ in range(10)))
+        self.assertEqual(results, [2] * 10)
+        self.assertEqual(self.calls, [1])
+
+    async def test_error(self) -> None:
+        @self.cache
+        async def func(val: int) -> int:
+            self.calls.append(val)
+            await asyncio.sleep(0.01)
+            raise RuntimeError('failed')
+
+        results = await asyncio.gather(func(1), func(1),
+                                       return_exceptions=True)
+        self.assertEqual([type(result) for result in results],
+                         [RuntimeError, RuntimeError])
+        with self.assertRaises(RuntimeError):
+            await func(1)
+        self.assertEqual(self.calls, [1, 1])
+
+    async def test_negative_exception(self) -> None:
+        @self.cache(negative_ttl=10, negative_exceptions=RuntimeError)
+        async def func(val: int) -> int:
+            self.calls.append(val)
+            raise RuntimeError('failed')
+
+        for _ in range(2):
+            with self.assertRaises(RuntimeError):
+                await func(1)
+        self.assertEqual(self.calls, [1])
+
+    async def test_cancelled_awaiter(self) -> None:
+        @self.cache
+        async def func(val: int) -> int:
+            self.calls.append(val)
+            await asyncio.sleep(0.05)
+            return val * 2
+
+        first = asyncio.ensure_future(func(1))
+        await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(func(1))
+        await asyncio.sleep(0)
+        first.cancel()
+        self.assertEqual(await second, 2)
+        self.assertEqual(self.calls, [1])
+
+    async def test_stale(self) -> None:
+        @self.cache(max_age=0, stale_ttl=60)
+        async def func() -> int:
+            self.calls.append(None)
+            return len(self.calls)
+
+        self.assertEqual(await func(), 1)
+        self.assertEqual(await func(), 1)
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if len(self.calls) == 2:
+                break
+        self.assertEqual(await func(), 2)
+
+    async def test_blocking_adapter_off_loop(self) -> None:
+        adapter = _ThreadRecordingAdapter()
+        cache = pluca.Cache(adapter)
+
+        @cache
+        async def func(val: int) -> int:
+            return val
+
+        self.assertEqual(await func(1), 1)
+        self.assertEqual(await func(1), 1)
+        cache.shutdown()
+        self.assertEqual(len(adapter.threads), 1)
+        self.assertTrue(adapter.threads.pop().startswith('pluca-aio'))
@@ -1,16 +1,44 @@
+import io
+import mmap
 import os
+import pickle
 import unittest
 import tempfile
+import threading
 import shutil
 import uuid
 import time
+from collections.abc import Callable
 from pathlib import Path
+from typing import Any
 
 import pluca
 import pluca.file
 from pluca.test import AdapterTester
 
 
+class _Blob:
+
+    def __init__(self, data: Any) -> None:
+        self.data = data
+
+    def __reduce_ex__(self, protocol: Any) -> Any:
+        if protocol >= 5:
+            return type(self), (pickle.PickleBuffer(self.data),)
+        return type(self), (bytes(self.data),)
+
+
+# pylint: disable-next=abstract-method
+class _SlowExpiryAdapter(pluca.file.FileAdapter):
+    # Widens the window between writing an entry and setting its
+    # expiration time.
+
+    def _set_max_age(self, filename: Path,
+                     max_age: float | None = None) -> None:
+        time.sleep(0.001)
+        super()._set_max_age(filename, max_age)
+
+
 class TestFile(AdapterTester, unittest.TestCase):
 
     def setUp(self) -> None:
@@ -69,6 +97,169 @@ class TestFile(AdapterTester, unittest.TestCase):
         self.assertEqual(cache.get('key'), 'value')
         self.assertIsNone(cache.locking)
 
+    def test_codec(self) -> None:
+        assert self._dir is not None
+        cache = pluca.Cache(pluca.file.Adapter(cache_dir=self._dir,
+                                               codec='raw'))
+        cache.put('key', b'value')
+        self.assertEqual(cache.get('key'), b'value')
+        self.assertEqual(cache.codec.name, 'raw')
+
+    def test_compression(self) -> None:
+        assert self._dir is not None
+        cache = pluca.Cache(pluca.file.Adapter(cache_dir=self._dir,
+                                               compression='bz2',
+                                               compress_threshold=100,
+                                               compress_workers=2))
+        cache.put_many({'small': 'a', 'large': 'a' * 1000})
+        self.assertEqual(cache.get('small'), 'a')
+        self.assertEqual(cache.get('large'), 'a' * 1000)
+
+    def test_get_bytes_mmap(self) -> None:
+        assert self._dir is not None
+        for locking in (None, 'mkdir', 'auto'):
+            with self.subTest(locking=locking):
+                cache = pluca.Cache(pluca.file.Adapter(
+                    name=f'mmap-{locking}', cache_dir=self._dir,
+                    locking=locking, mmap=True))
+                cache.put_bytes('key', b'value')
+                data = cache.get_bytes('key')
+                self.assertIsInstance(data, memoryview)
+                self.assertTrue(data.readonly)
+                self.assertEqual(data, b'value')
+
+                # Views are not affected by later writes.
+                cache.put_bytes('key', b'other')
+                self.assertEqual(data, b'value')
+                self.assertEqual(cache.get_bytes('key'), b'other')
+
+    def test_open_stream_seek(self) -> None:
+        cache = self.get_cache()
+        cache.put_stream('key', io.BytesIO(b'foobar'))
+        with cache.open_stream('key') as stream:
+            self.assertEqual(stream.read(3), b'foo')
+            self.assertEqual(stream.tell(), 3)
+            stream.seek(0)
+            self.assertEqual(stream.read(), b'foobar')
+
+    def test_put_stream_failure_keeps_entry(self) -> None:
+        class _Failing(io.BytesIO):
+            def read(self, size: int | None = -1) -> bytes:
+                raise OSError('read failed')
+
+        for locking in (None, 'mkdir', 'auto'):
+            with self.subTest(locking=locking):
+                assert self._dir is not None
+                cache = pluca.Cache(pluca.file.Adapter(
+                    name=f'stream-{locking}', cache_dir=self._dir,
+                    locking=locking))
+                cache.put_bytes('key', b'value')
+                with self.assertRaises(OSError):
+                    cache.put_stream('key', _Failing())
+                self.assertEqual(cache.get_bytes('key'), b'value')
+
+    def test_touch_locking(self) -> None:
+        for locking in (None, 'mkdir', 'auto'):
+            with self.subTest(locking=locking):
+                assert self._dir is not None
+                adapter = pluca.file.Adapter(name=f'touch-{locking}',
+                                             cache_dir=self._dir,
+                                             locking=locking)
+                cache = pluca.Cache(adapter)
+                cache.put('key', 'value', max_age=60)
+                cache.touch('key', 120)
+                filename = adapter._get_filename(
+                    cache.key_mapper.map_key('key'))
+                self.assertGreater(filename.stat().st_mtime,
+                                   time.time() + 60)
+
+                cache.put('expired', 'value', max_age=0)
+                with self.assertRaises(KeyError):
+                    cache.touch('expired', 60)
+                self.assertFalse(cache.has('expired'))
+
+    def _count_concurrent_misses(
+            self, cache: pluca.Cache,
+            write: Callable[[pluca.Cache], None]) -> int:
+        # Rewrite an entry from a thread while reading it, and return the
+        # number of reads that missed it.
+        errors: list[BaseException] = []
+
+        def writer() -> None:
+            try:
+                for _ in range(50):
+                    write(cache)
+            except Exception as ex:  # pylint: disable=broad-exception-caught
+                errors.append(ex)
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        misses = 0
+        while thread.is_alive():
+            if cache.get_bytes('key', None) is None:
+                misses += 1
+        thread.join()
+        self.assertEqual(errors, [])
+        return misses
+
+    @unittest.skipIf(os.name == 'nt', 'flock is unavailable')
+    def test_replace_concurrent_reads(self) -> None:
+        assert self._dir is not None
+        value = b'x' * 2048
+
+        def put_bytes(cache: pluca.Cache) -> None:
+            cache.put_bytes('key', value, max_age=60)
+
+        def put(cache: pluca.Cache) -> None:
+            cache.put('key', value, max_age=60)
+
+        def put_stream(cache: pluca.Cache) -> None:
+            cache.put_stream('key', io.BytesIO(value), max_age=60)
+
+        writes: dict[str, tuple[dict[str, Any],
+                                Callable[[pluca.Cache], None]]] = {
+            'mmap': ({'mmap': True}, put_bytes),
+            'oob': ({'oob_threshold': 1024}, put),
+            'stream': ({}, put_stream),
+        }
+        for name, (options, write) in writes.items():
+            with self.subTest(name=name):
+                cache = pluca.Cache(_SlowExpiryAdapter(
+                    name=f'replace-{name}', cache_dir=self._dir,
+                    locking='flock', **options))
+                write(cache)
+                self.assertEqual(self._count_concurrent_misses(cache, write),
+                                 0)
+                self.assertEqual(cache.get_bytes('key'), value)
+
+    def test_oob_threshold(self) -> None:
+        assert self._dir is not None
+        for locking in (None, 'mkdir', 'auto'):
+            with self.subTest(locking=locking):
+                cache = pluca.Cache(pluca.file.Adapter(
+                    name=f'oob-{locking}', cache_dir=self._dir,
+                    locking=locking, oob_threshold=1024))
+                cache.put('key', _Blob(b'a' * 100_000))
+                value = cache.get('key')
+                self.assertIsInstance(value.data, memoryview)
+                self.assertIsInstance(value.data.obj, mmap.mmap)
+                self.assertTrue(value.data.readonly)
+                self.assertEqual(value.data, b'a' * 100_000)
+
+                # Loaded views are not affected by later writes.
+                cache.put_many({'key': _Blob(b'b' * 100_000)})
+                self.assertEqual(value.data, b'a' * 100_000)
+                self.assertEqual(cache.get('key').data, b'b' * 100_000)
+
+    def test_oob_threshold_validation(self) -> None:
+        assert self._dir is not None
+        with self.assertRaises(ValueError):
+            pluca.file.Adapter(cache_dir=self._dir, oob_threshold=0,
+                               codec='json')
+        with self.assertRaises(ValueError):
+            pluca.file.Adapter(cache_dir=self._dir, oob_threshold=0,
+                               compression='zlib')
+
     def test_locking_mkdir_works(self) -> None:
         assert self._dir is not None
         cache = pluca.Cache(pluca.file.Adapter(
@@ -241,3 +432,16 @@ class TestFile(AdapterTester, unittest.TestCase):
         shutil.rmtree(self._dir / 'test')
         cache.gc()
         self.assertEqual(len(os.listdir(self._dir)), 0)
+
+
+class TestFileOutOfBand(AdapterTester, unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._dir = Path(tempfile.mkdtemp(prefix='pluca-file-test'))
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self._dir)
+
+    def get_adapter(self) -> pluca.file.Adapter:
+        return pluca.file.Adapter(name='test', cache_dir=self._dir,
+                                  oob_threshold=0)
@@ -0,0 +1,127 @@
+import threading
+import time
+import unittest
+from typing import Any
+
+import pluca
+import pluca.memory
+from pluca.flight import SingleFlight
+
+_THREADS = 8
+
+
+def _run_threads(target: Any) -> list[Any]:
+    results: list[Any] = [None] * _THREADS
+    barrier = threading.Barrier(_THREADS)
+
+    def run(index: int) -> None:
+        barrier.wait()
+        results[index] = target()
+
+    threads = [threading.Thread(target=run, args=(i,))
+               for i in range(_THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class _Counter:
+
+    def __init__(self, delay: float = 0.1) -> None:
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self) -> int:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return 42
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_do(self) -> None:
+        flight = SingleFlight()
+        counter = _Counter()
+        results = _run_threads(lambda: flight.do('foo', counter))
+        self.assertEqual(results, [42] * _THREADS)
+        self.assertEqual(counter.calls, 1)
+        self.assertEqual(flight.in_flight, 0)
+
+    def test_error(self) -> None:
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        errors = []
+
+        def fail() -> None:
+            started.set()
+            release.wait()
+            raise RuntimeError('failed')
+
+        def call() -> None:
+            try:
+                flight.do('foo', fail)
+            except RuntimeError as ex:
+                errors.append(ex)
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait()
+        waiter = threading.Thread(target=call)
+        waiter.start()
+        time.sleep(0.05)
+        release.set()
+        leader.join()
+        waiter.join()
+
+        self.assertEqual(len(errors), 2)
+        self.assertEqual(flight.in_flight, 0)
+        self.assertEqual(flight.do('foo', lambda: 1), 1)
+
+    def test_timeout(self) -> None:
+        flight = SingleFlight(timeout=0.01)
+        counter = _Counter(delay=0.2)
+        _run_threads(lambda: flight.do('foo', counter))
+        self.assertGreater(counter.calls, 1)
+
+    def test_invalid_timeout(self) -> None:
+        with self.assertRaises(ValueError):
+            SingleFlight(timeout=-1)
+
+
+class TestCacheSingleFlight(unittest.TestCase):
+
+    def test_get_put(self) -> None:
+        cache = pluca.Cache(pluca.memory.Adapter(), single_flight=True)
+        counter = _Counter()
+        results = _run_threads(lambda: cache.get_put('foo', counter))
+        self.assertEqual(results, [42] * _THREADS)
+        self.assertEqual(counter.calls, 1)
+        self.assertEqual(cache.get('foo'), 42)
+
+    def test_decorator(self) -> None:
+        cache = pluca.Cache(pluca.memory.Adapter(), single_flight=True)
+        counter = _Counter()
+
+        @cache
+        def func(arg: int) -> int:
+            return counter() + arg
+
+        results = _run_threads(lambda: func(1))
+        self.assertEqual(results, [43] * _THREADS)
+        self.assertEqual(counter.calls, 1)
+
+    def test_disabled(self) -> None:
+        cache = pluca.Cache(pluca.memory.Adapter())
+        counter = _Counter()
+        _run_threads(lambda: cache.get_put('foo', counter))
+        self.assertEqual(counter.calls, _THREADS)
+
+    def test_invalid_timeout(self) -> None:
+        with self.assertRaises(ValueError):
+            pluca.Cache(pluca.memory.Adapter(), single_flight=True,
+                        flight_timeout=-1)
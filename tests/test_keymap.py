@@ -0,0 +1,94 @@
+import unittest
+import uuid
+
+import pluca
+import pluca.memory
+from pluca.keymap import KeyMapper, encode_key
+
+
+class TestKeyMap(unittest.TestCase):
+
+    def test_encode_key_distinguishes_types(self) -> None:
+        keys = ('1', b'1', 1, 1.0, True, ('1',), (1,), (True,), [1], None)
+        encoded = [encode_key(key) for key in keys]
+        self.assertEqual(len(set(encoded)), len(keys))
+
+    def test_encode_key_str_subclass_uses_repr(self) -> None:
+
+        class _Str(str):
+            pass
+
+        self.assertNotEqual(encode_key(_Str('foo')), encode_key('foo'))
+
+    def test_encode_key_tuple_is_not_list(self) -> None:
+        self.assertNotEqual(encode_key((1, 2)), encode_key([1, 2]))
+
+    def test_encode_key_large_int(self) -> None:
+        self.assertEqual(encode_key(10 ** 10_000)[0:1], b'i')
+
+    def test_map_key_is_stable(self) -> None:
+        mapper = KeyMapper()
+        key = ('foo', 1, uuid.UUID(int=1))
+        self.assertEqual(mapper.map_key(key), KeyMapper().map_key(key))
+
+    def test_digest_size(self) -> None:
+        mapper = KeyMapper(digest='blake2b', digest_size=10)
+        self.assertEqual(len(mapper.map_key('foo')), 20)
+
+    def test_digest_size_unsupported(self) -> None:
+        with self.assertRaises(ValueError):
+            KeyMapper(digest='sha1', digest_size=10)
+
+    def test_digest_size_invalid(self) -> None:
+        with self.assertRaises(ValueError):
+            KeyMapper(digest='blake2b', digest_size=100)
+
+    def test_variable_length_digest(self) -> None:
+        with self.assertRaises(ValueError):
+            KeyMapper(digest='shake_128')
+
+    def test_unknown_digest(self) -> None:
+        with self.assertRaises(ValueError):
+            KeyMapper(digest='nonexistent')
+
+    def test_memo(self) -> None:
+        memo_mapper = KeyMapper(memo=2)
+        mapper = KeyMapper()
+        for key in ('foo', 'foo', b'foo', 1, True, 1.0, ('foo',), 'bar'):
+            with self.subTest(key=key):
+                self.assertEqual(memo_mapper.map_key(key),
+                                 mapper.map_key(key))
+
+    def test_memo_validation(self) -> None:
+        with self.assertRaises(ValueError):
+            KeyMapper(memo=-1)
+
+    def test_cache_key_mapper(self) -> None:
+        mapper = KeyMapper(digest='blake2b', digest_size=8, memo=10)
+        cache = pluca.Cache(pluca.memory.Adapter(), key_mapper=mapper)
+        self.assertIs(cache.key_mapper, mapper)
+        cache.put('foo', 'bar')
+        cache.put(1, 'one')
+        self.assertEqual(cache.get('foo'), 'bar')
+        self.assertEqual(cache.get(1), 'one')
+        self.assertFalse(cache.has(True))
+
+    def test_binary(self) -> None:
+        mapper = KeyMapper(digest='blake2b', digest_size=16, binary=True)
+        mkey = mapper.map_key('foo')
+        self.assertIsInstance(mkey, bytes)
+        self.assertEqual(len(mkey), 16)
+        self.assertEqual(
+            mkey.hex(),
+            KeyMapper(digest='blake2b', digest_size=16).map_key('foo'))
+
+    def test_cache_binary_key_mapper_unsupported(self) -> None:
+        with self.assertRaises(ValueError):
+            pluca.Cache(pluca.memory.Adapter(),
+                        key_mapper=KeyMapper(binary=True))
+
+    def test_cache_default_key_mapper_binary(self) -> None:
+        cache = pluca.Cache(pluca.memory.Adapter(binary_keys=True))
+        self.assertTrue(cache.key_mapper.binary)
+        cache = pluca.Cache(pluca.memory.Adapter())
+        self.assertFalse(cache.key_mapper.binary)
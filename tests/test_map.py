@@ -0,0 +1,44 @@
+from concurrent.futures import ProcessPoolExecutor
+import unittest
+from typing import Any
+
+import pluca
+import pluca.memory
+
+
+def _double(item: int) -> int:
+    return item * 2
+
+
+class TestMap(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.cache = pluca.Cache(pluca.memory.Adapter())
+        self.calls: list[Any] = []
+
+    def _func(self, item: int) -> int:
+        self.calls.append(item)
+        return item * 2
+
+    def test_process_pool(self) -> None:
+        with ProcessPoolExecutor(2) as executor:
+            self.assertEqual(list(self.cache.map(_double, range(10),
+                                                 executor=executor)),
+                             [item * 2 for item in range(10)])
+        self.assertEqual(self.cache(_double)(9), 18)
+
+    def test_stop_early(self) -> None:
+        results = self.cache.map(self._func, range(10))
+        self.assertEqual(next(results), 0)
+        self.assertEqual(next(results), 2)
+        results.close()
+
+        self.assertEqual(list(self.cache.map(self._func, range(3))),
+                         [0, 2, 4])
+        self.assertEqual(self.calls, [0, 1, 2])
+
+    def test_shares_decorator_entries(self) -> None:
+        func = self.cache(self._func, max_age=60, stale_ttl=60)
+        func(1)
+        self.assertEqual(list(self.cache.map(self._func, [1, 2])), [2, 4])
+        self.assertEqual(self.calls, [1, 2])
@@ -1,3 +1,4 @@
+import time
 import unittest
 
 import pluca
@@ -36,9 +37,80 @@ class TestMemory(AdapterTester, unittest.TestCase):
         self.assertTrue(cache.has('key2'))
         self.assertFalse(cache.has('key1'))
 
+    def test_codec(self) -> None:
+        cache = pluca.Cache(pluca.memory.Adapter(codec='marshal'))
+        cache.put('foo', {'bar': (1, 2)})
+        self.assertEqual(cache.get('foo'), {'bar': (1, 2)})
+        with self.assertRaises(ValueError):
+            pluca.memory.Adapter(codec='foo')
+        with self.assertRaises(ValueError):
+            cache.put('zee', object())
+
+    def test_put_many_jitter(self) -> None:
+        super().test_put_many_jitter()
+        adapter = pluca.memory.Adapter()
+        cache = pluca.Cache(adapter, jitter='10%')
+        now = time.time()
+        cache.put_many({f'key{i}': i for i in range(20)}, max_age=100)
+        expires = [entry.expire for entry in adapter._storage.values()]
+        self.assertGreater(len(set(expires)), 1)
+        for expire in expires:
+            assert expire is not None
+            self.assertTrue(now + 90 <= expire <= time.time() + 100)
+
     def test_constructor_validation(self) -> None:
         with self.assertRaises(ValueError):
             pluca.memory.Adapter(max_entries=2, prune=3)
+        with self.assertRaises(ValueError):
+            pluca.memory.Adapter(eviction='foo')
+
+    def test_cost_eviction(self) -> None:
+        adapter = pluca.memory.Adapter(max_entries=3, eviction='cost')
+        adapter.put_mapped('slow', 1, cost=2.0)
+        adapter.put_mapped('fast', 1, cost=0.00001)
+        adapter.put_mapped('big', 'x' * 10000, cost=2.0)
+        adapter.put_mapped('new', 1, cost=1.0)
+
+        self.assertTrue(adapter.has_mapped('slow'))
+        self.assertTrue(adapter.has_mapped('big'))
+        self.assertTrue(adapter.has_mapped('new'))
+        self.assertFalse(adapter.has_mapped('fast'))
+
+        # Evicted entries age the remaining ones, so entries that are not
+        # used are eventually evicted, however costly they were.
+        for i in range(50):
+            adapter.put_mapped(f'key{i}', 1, cost=0.5)
+            adapter.get_mapped('new')
+        self.assertTrue(adapter.has_mapped('new'))
+        self.assertFalse(adapter.has_mapped('slow'))
+
+    def test_cost_eviction_records_compute_time(self) -> None:
+        cache = pluca.Cache(pluca.memory.Adapter(max_entries=2,
+                                                 eviction='cost'))
+
+        def slow() -> int:
+            time.sleep(0.01)
+            return 1
+
+        cache.get_put('slow', slow)
+        cache.get_put('fast', lambda: 2)
+        cache.put('stored', 3)
+
+        self.assertTrue(cache.has('slow'))
+        self.assertTrue(cache.has('fast'))
+        self.assertFalse(cache.has('stored'))
+
+    def test_touch_keeps_data(self) -> None:
+        adapter = pluca.memory.Adapter()
+        cache = pluca.Cache(adapter)
+        cache.put('foo', 'bar', max_age=10)
+        data = next(iter(adapter._storage.values())).data
+        now = time.time()
+        cache.touch('foo', 100)
+        entry = next(iter(adapter._storage.values()))
+        self.assertIs(entry.data, data)
+        assert entry.expire is not None
+        self.assertGreaterEqual(entry.expire, now + 100)
 
     def test_copy_data(self) -> None:
         cache = pluca.Cache(pluca.memory.Adapter())
@@ -56,3 +128,14 @@ class TestMemory(AdapterTester, unittest.TestCase):
         cache.put('foo', 'bar', max_age=0)
         with self.assertRaises(KeyError):
             cache.get('foo')
+
+
+class TestMemoryBinaryKeys(AdapterTester, unittest.TestCase):
+
+    def get_adapter(self) -> pluca.memory.Adapter:
+        return pluca.memory.Adapter(binary_keys=True)
+
+    def test_keys_are_binary(self) -> None:
+        cache = self.get_cache()
+        self.assertTrue(cache.key_mapper.binary)
+        self.assertIsInstance(cache.key_mapper.map_key('foo'), bytes)
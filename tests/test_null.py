@@ -1,3 +1,4 @@
+import io
 import unittest
 
 import pluca.null
@@ -46,6 +47,45 @@ class TestNull(AdapterTester, unittest.TestCase):
         with self.assertRaises(KeyError):
             cache.get('k2')
 
+    def test_put_get_bytes(self) -> None:
+        cache = self.get_cache()
+        cache.put_bytes('k', b'v')
+        with self.assertRaises(KeyError):
+            cache.get_bytes('k')
+
+    def test_get_bytes_from_put(self) -> None:
+        cache = self.get_cache()
+        cache.put('k', b'v')
+        self.assertIsNone(cache.get_bytes('k', None))
+
+    def test_put_get_many_bytes(self) -> None:
+        cache = self.get_cache()
+        cache.put_many_bytes({'k': b'v'})
+        self.assertEqual(cache.get_many_bytes(['k']), [])
+
+    def test_put_stream_open_stream(self) -> None:
+        cache = self.get_cache()
+        cache.put_stream('k', io.BytesIO(b'v'))
+        with self.assertRaises(KeyError):
+            cache.open_stream('k')
+
+    def test_open_stream_from_put_bytes(self) -> None:
+        cache = self.get_cache()
+        cache.put_bytes('k', b'v')
+        with self.assertRaises(KeyError):
+            cache.open_stream('k')
+
+    def test_get_many_lazy(self) -> None:
+        cache = self.get_cache()
+        cache.put('k', 'v')
+        self.assertEqual(cache.get_many(['k'], lazy=True), [])
+
+    def test_get_many_lazy_default(self) -> None:
+        cache = self.get_cache()
+        res = cache.get_many(['k'], 'default', lazy=True)
+        self.assertEqual([(key, handle.value) for key, handle in res],
+                         [('k', 'default')])
+
     def test_get_many(self) -> None:
         cache = self.get_cache()
         cache.put('k', 'v')
@@ -58,6 +98,12 @@ class TestNull(AdapterTester, unittest.TestCase):
         values = cache.get_many(['k'], 'default')
         self.assertEqual(values, [('k', 'default')])
 
+    def test_get_mapped_or(self) -> None:
+        adapter = self.get_adapter()
+        default = object()
+        adapter.put_mapped('k', 'v')
+        self.assertIs(adapter.get_mapped_or('k', default), default)
+
     def _pass(self) -> None:
         pass
 
@@ -68,3 +114,98 @@ class TestNull(AdapterTester, unittest.TestCase):
     test_put_dict_key = _pass
     test_get_many_default_none = _pass
     test_decorator = _pass
+
+    def test_get_put_stale(self) -> None:
+        cache = self.get_cache()
+        self.assertEqual(cache.get_put('k', lambda: 1, max_age=0,
+                                       stale_ttl=60), 1)
+        self.assertEqual(cache.get_put('k', lambda: 2, max_age=0,
+                                       stale_ttl=60), 2)
+
+    def test_get_put_early_refresh(self) -> None:
+        cache = self.get_cache()
+        self.assertEqual(cache.get_put('k', lambda: 1, max_age=60,
+                                       early_refresh=1.0), 1)
+        self.assertEqual(cache.get_put('k', lambda: 2, max_age=60,
+                                       early_refresh=1.0), 2)
+
+    def test_put_many_jitter(self) -> None:
+        cache = pluca.Cache(self.get_adapter(), jitter='50%')
+        cache.put_many({'k': 'v'}, max_age=60)
+        self.assertEqual(cache.get_many(['k']), [])
+
+    def test_batched(self) -> None:
+        cache = self.get_cache()
+
+        calls = []
+
+        @cache.batched(max_age=60)
+        def func(items: list[int]) -> dict[int, int]:
+            calls.append(items)
+            return {item: item for item in items}
+
+        self.assertEqual(func([1, 2]), {1: 1, 2: 2})
+        self.assertEqual(func([1, 2]), {1: 1, 2: 2})
+        self.assertEqual(calls, [[1, 2], [1, 2]])
+
+    def test_map(self) -> None:
+        cache = self.get_cache()
+
+        calls = []
+
+        def func(item: int) -> int:
+            calls.append(item)
+            return item * 2
+
+        self.assertEqual(list(cache.map(func, [1, 2])), [2, 4])
+        self.assertEqual(list(cache.map(func, [1, 2])), [2, 4])
+        self.assertEqual(calls, [1, 2, 1, 2])
+
+    def test_get_put_many(self) -> None:
+        cache = self.get_cache()
+
+        calls = []
+
+        def loader(keys: list[str]) -> list[tuple[str, int]]:
+            calls.append(keys)
+            return [(key, 1) for key in keys]
+
+        self.assertEqual(cache.get_put_many(['key1'], loader), [('key1', 1)])
+        self.assertEqual(cache.get_put_many(['key1'], loader), [('key1', 1)])
+        self.assertEqual(calls, [['key1'], ['key1']])
+
+    def test_batch(self) -> None:
+        cache = self.get_cache()
+
+        with cache.batch() as batch:
+            batch.put('foo', 1)
+            self.assertEqual(batch.get('foo'), 1)
+
+        self.assertFalse(cache.has('foo'))
+
+    def test_batch_discard(self) -> None:
+        cache = self.get_cache()
+        with self.assertRaises(RuntimeError):
+            with cache.batch() as batch:
+                batch.put('foo', 1)
+                raise RuntimeError()
+        self.assertEqual(len(batch), 0)
+
+    def test_touch(self) -> None:
+        cache = self.get_cache()
+        cache.put('foo', 'bar')
+        with self.assertRaises(KeyError):
+            cache.touch('foo', 60)
+        self.assertIsNone(cache.get('foo', None, touch=60))
+
+    def test_pipeline(self) -> None:
+        cache = self.get_cache()
+
+        with cache.pipeline() as pipeline:
+            put = pipeline.put('foo', 1)
+            found = pipeline.get('foo', None)
+            has = pipeline.has('foo')
+
+        self.assertIsNone(put.result())
+        self.assertIsNone(found.result())
+        self.assertFalse(has.result())
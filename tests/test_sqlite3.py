@@ -1,13 +1,23 @@
+import io
 import unittest
 import sqlite3
 import tempfile
-from typing import Any
+from typing import Any, BinaryIO, cast
 
 import pluca
 import pluca.sqlite3
 from pluca.test import AdapterTester
 
 
+class _Unseekable:
+
+    def __init__(self, data: bytes) -> None:
+        self._stream = io.BytesIO(data)
+
+    def read(self, size: int = -1) -> bytes:
+        return self._stream.read(size)
+
+
 class _Undumpable:
 
     def __reduce__(self) -> tuple[object, tuple[Any, ...]]:
@@ -17,7 +27,8 @@ class _Undumpable:
 class TestSqlite3BackEnd(AdapterTester, unittest.TestCase):
 
     def get_adapter(self) -> pluca.sqlite3.Adapter:
-        return pluca.sqlite3.Adapter(':memory:')
+        # Stale values are refreshed from background threads.
+        return pluca.sqlite3.Adapter(':memory:', check_same_thread=False)
 
     def test_put_max_age_zero(self) -> None:
         cache = self.get_cache()
@@ -25,6 +36,82 @@ class TestSqlite3BackEnd(AdapterTester, unittest.TestCase):
         with self.assertRaises(KeyError):
             cache.get('foo')
 
+    def test_get_bytes_is_view(self) -> None:
+        cache = self.get_cache()
+        cache.put_bytes('foo', b'bar')
+        data = cache.get_bytes('foo')
+        self.assertIsInstance(data, memoryview)
+        self.assertEqual(data, b'bar')
+
+    def _count_blobs(self, cache: pluca.Cache) -> int:
+        count: int = cache._conn.execute(
+            'SELECT COUNT(*) FROM cache_blob').fetchone()[0]
+        return count
+
+    def test_put_stream_uses_blob_io(self) -> None:
+        cache = self.get_cache()
+        data = b'x' * (3 * 1024 * 1024 + 10)
+        cache.put_stream('foo', io.BytesIO(data))
+        self.assertEqual(self._count_blobs(cache), 1)
+        with cache.open_stream('foo') as stream:
+            self.assertIsInstance(stream, sqlite3.Blob)
+            self.assertEqual(stream.read(), data)
+        self.assertEqual(cache.get('foo'), data)
+
+    def test_put_stream_unseekable(self) -> None:
+        cache = self.get_cache()
+        cache.put_stream('foo', cast(BinaryIO, _Unseekable(b'bar')))
+        with cache.open_stream('foo') as stream:
+            self.assertEqual(stream.read(), b'bar')
+
+    def test_put_stream_from_offset(self) -> None:
+        cache = self.get_cache()
+        stream = io.BytesIO(b'foobar')
+        stream.seek(3)
+        cache.put_stream('foo', stream)
+        self.assertEqual(cache.get_bytes('foo'), b'bar')
+
+    def test_stream_blobs_are_deleted(self) -> None:
+        cache = self.get_cache()
+        cache.put_stream('foo', io.BytesIO(b'foo'))
+        cache.put_stream('foo', io.BytesIO(b'bar'))
+        self.assertEqual(self._count_blobs(cache), 1)
+        cache.put('foo', 'foo')
+        self.assertEqual(self._count_blobs(cache), 0)
+
+        cache.put_stream('foo', io.BytesIO(b'foo'))
+        cache.put_stream('bar', io.BytesIO(b'bar'))
+        cache.remove('foo')
+        self.assertEqual(self._count_blobs(cache), 1)
+        cache.flush()
+        self.assertEqual(self._count_blobs(cache), 0)
+
+    def test_gc_deletes_orphan_blobs(self) -> None:
+        cache = self.get_cache()
+        cache.put_stream('foo', io.BytesIO(b'foo'))
+        cache._conn.execute('INSERT INTO cache_blob (data) VALUES (?)',
+                            (b'orphan',))
+        cache.gc()
+        self.assertEqual(self._count_blobs(cache), 1)
+        self.assertEqual(cache.get_bytes('foo'), b'foo')
+
+    def test_get_many_lazy_is_deferred(self) -> None:
+        cache = self.get_cache()
+        cache.put('foo', 'bar')
+        cache.put_stream('zee', io.BytesIO(b'zee'))
+        res = dict(cache.get_many(['foo', 'zee'], lazy=True))
+        self.assertFalse(res['foo'].is_decoded)
+        self.assertFalse(res['zee'].is_decoded)
+        self.assertEqual(res['foo'].value, 'bar')
+        self.assertEqual(res['zee'].value, b'zee')
+
+    def test_put_many_jitter_per_entry(self) -> None:
+        cache = pluca.Cache(self.get_adapter(), jitter=10)
+        cache.put_many({f'key{i}': i for i in range(20)}, max_age=100)
+        count = cache._conn.execute(
+            'SELECT COUNT(DISTINCT expires) FROM cache').fetchone()[0]
+        self.assertGreater(count, 1)
+
     def test_pragma(self) -> None:
         with self.assertRaises(sqlite3.OperationalError) as ex:
             pluca.Cache(pluca.sqlite3.Adapter(':memory:',
@@ -102,6 +189,68 @@ class TestSqlite3BackEnd(AdapterTester, unittest.TestCase):
         with self.assertRaises(KeyError):
             cache.get('ok')
 
+    def test_batch_is_atomic(self) -> None:
+        cache = self.get_cache()
+        cache.put('foo', 'bar')
+
+        with self.assertRaises(TypeError):
+            with cache.batch() as batch:
+                batch.put('ok', 'value', max_age=60)
+                batch.remove('foo')
+                batch.put('boom', _Undumpable())
+
+        self.assertEqual(cache.get('foo'), 'bar')
+        with self.assertRaises(KeyError):
+            cache.get('ok')
+
+    def test_pipeline_is_atomic(self) -> None:
+        cache = self.get_cache()
+        cache.put('foo', 'bar')
+
+        pipeline = cache.pipeline()
+        removed = pipeline.remove('foo')
+        found = pipeline.get('foo', None)
+        failed = pipeline.put('boom', _Undumpable())
+        with self.assertRaises(TypeError):
+            pipeline.execute()
+
+        self.assertEqual(cache.get('foo'), 'bar')
+        for future in (removed, found, failed):
+            with self.assertRaises(TypeError):
+                future.result()
+
+    def test_transaction_commits_once(self) -> None:
+        with tempfile.NamedTemporaryFile() as ctx:
+            adapter = pluca.sqlite3.Adapter(ctx.name)
+            other = pluca.Cache(pluca.sqlite3.Adapter(ctx.name))
+            cache = pluca.Cache(adapter)
+
+            with adapter.transaction():
+                cache.put('foo', 'bar')
+                cache.put_many({'zee': 'lee'})
+                cache.remove('foo')
+                cache.put('foo', 'baz')
+                self.assertFalse(other.has('foo'))
+                with self.assertRaises(RuntimeError):
+                    with adapter.transaction():
+                        pass
+
+            self.assertEqual(other.get('foo'), 'baz')
+            self.assertEqual(other.get('zee'), 'lee')
+
+    def test_touch_updates_expiration_only(self) -> None:
+        cache = self.get_cache()
+        cache.put('foo', 'bar', max_age=10)
+        before = cache._conn.execute('SELECT v, expires FROM cache').fetchone()
+        cache.touch('foo', 100)
+        after = cache._conn.execute('SELECT v, expires FROM cache').fetchone()
+        self.assertEqual(after[0], before[0])
+        self.assertGreaterEqual(after[1], before[1] + 90)
+
+        cache.touch('foo')
+        self.assertIsNone(
+            cache._conn.execute('SELECT expires FROM cache').fetchone()[0])
+
     def test_table_is_created_without_rowid(self) -> None:
         with tempfile.NamedTemporaryFile() as ctx:
             cache = pluca.Cache(pluca.sqlite3.Adapter(ctx.name))
@@ -170,3 +319,75 @@ class TestSqlite3BackEnd(AdapterTester, unittest.TestCase):
             cache = pluca.Cache(pluca.sqlite3.Adapter(ctx.name))
             with self.assertRaises(KeyError):
                 cache.get('foo')
+
+
+class TestSqlite3BinaryKeys(AdapterTester, unittest.TestCase):
+
+    def get_adapter(self) -> pluca.sqlite3.Adapter:
+        return pluca.sqlite3.Adapter(':memory:', binary_keys=True,
+                                     check_same_thread=False)
+
+    def _get_key_types(self, cache: pluca.Cache) -> set[str]:
+        return {row[0] for row in cache._conn.execute(
+            'SELECT typeof(k) FROM cache')}
+
+    def test_keys_are_binary(self) -> None:
+        cache = self.get_cache()
+        cache.put('foo', 'bar')
+        self.assertEqual(self._get_key_types(cache), {'blob'})
+
+    def test_migrate_keys(self) -> None:
+        with tempfile.NamedTemporaryFile() as ctx:
+            cache = pluca.Cache(pluca.sqlite3.Adapter(ctx.name))
+            cache.put('foo', 'bar')
+            cache.put_many({'zee': 'lee', 'xii': 'moo'})
+            cache.shutdown()
+
+            cache = pluca.Cache(pluca.sqlite3.Adapter(ctx.name,
+                                                      binary_keys=True))
+            with self.assertRaises(KeyError):
+                cache.get('foo')
+            cache.migrate_keys()
+            self.assertEqual(self._get_key_types(cache), {'blob'})
+            self.assertEqual(cache.get('foo'), 'bar')
+            self.assertEqual(cache.get_many(['zee', 'xii']),
+                             [('zee', 'lee'), ('xii', 'moo')])
+            cache.shutdown()
+
+            cache = pluca.Cache(pluca.sqlite3.Adapter(ctx.name))
+            cache.migrate_keys()
+            self.assertEqual(self._get_key_types(cache), {'text'})
+            self.assertEqual(cache.get('foo'), 'bar')
+            cache.shutdown()
+
+    def test_migrate_keys_drops_unconvertible_keys(self) -> None:
+        cache = self.get_cache()
+        cache.put('foo', 'bar')
+        cache._conn.execute("INSERT INTO cache (k, v) VALUES ('zz', x'00')")
+        cache.migrate_keys()
+        self.assertEqual(cache._conn.execute(
+            'SELECT COUNT(*) FROM cache').fetchone()[0], 1)
+        self.assertEqual(cache.get('foo'), 'bar')
+
+
+class TestSqlite3Compressed(AdapterTester, unittest.TestCase):
+
+    def get_adapter(self) -> pluca.sqlite3.Adapter:
+        return pluca.sqlite3.Adapter(':memory:', compression='zlib',
+                                     compress_threshold=0,
+                                     compress_workers=2,
+                                     check_same_thread=False)
+
+    def test_small_values_are_not_compressed(self) -> None:
+        cache = pluca.Cache(pluca.sqlite3.Adapter(':memory:',
+                                                  compression='zlib',
+                                                  compress_threshold=100))
+        cache.put('small', 'a')
+        cache.put('large', 'a' * 1000)
+        rows = dict(cache._conn.execute(
+            'SELECT substr(v, 1, 1), length(v) FROM cache').fetchall())
+        self.assertIn(b'Z', rows)
+        self.assertIn(cache.codec.tag, rows)
+        self.assertLess(rows[b'Z'], 100)
+        self.assertEqual(cache.get('small'), 'a')
+        self.assertEqual(cache.get('large'), 'a' * 1000)